@@ -6,19 +6,23 @@ import os
 import shutil
 import logging
 import random
+import socket
 import traceback
 import inspect
-from time import sleep
 from datetime import datetime, timedelta
 
-import pyautogui
+import requests
 
 import lolbot.bot.launcher as launcher
-from lolbot.common import api, utils
+from lolbot.common import api, cassette, inputs, utils
+from lolbot.common.events import EventStream
 from lolbot.bot.game import Game
-from lolbot.common.account import AccountManager
+from lolbot.common.account import AccountGenerator, SQLiteAccountManager
+from lolbot.common.coordinator import RemoteAccountManager
+from lolbot.common.scheduler import AccountScheduler
 from lolbot.common.config import Constants, ConfigRW
 from lolbot.common.handler import MultiProcessLogHandler
+from lolbot.common.tracing import sleep, traced, tracer
 
 
 class ClientError(Exception):
@@ -38,19 +42,23 @@ class Client:
     POPUP_SEND_EMAIL_X_RATIO = (0.6960, 0.1238)
     MAX_CLIENT_ERRORS = 5
     MAX_PHASE_ERRORS = 20
+    PHASE_WAIT = 1.5  # seconds to wait for a phase transition before re-reading the phase
 
     def __init__(self, message_queue) -> None:
         self.handler = MultiProcessLogHandler(message_queue, Constants.LOG_DIR)
         self.log = logging.getLogger(__name__)
         self.handler.set_logs()
-        self.account_manager = AccountManager()
         self.connection = api.Connection()
+        self.events = EventStream(self.connection)
+        self.events.subscribe(EventStream.READY_CHECK, self.on_ready_check)
         self.launcher = launcher.Launcher()
         self.config = ConfigRW()
+        self.account_manager = self.create_account_manager()
         self.max_level = self.config.get_data('max_level')
         self.lobby = self.config.get_data('lobby')
         self.champs = self.config.get_data('champs')
         self.dialog = self.config.get_data('dialog')
+        self.config.on_change(self.on_config_change)
         self.account = None
         self.phase = ""
         self.prev_phase = None
@@ -58,7 +66,49 @@ class Client:
         self.phase_errors = 0
         self.game_errors = 0
         utils.print_ascii()
-        self.account_loop()
+        if self.config.get_data('trace'):
+            self.start_trace()
+        if self.config.get_data('record'):
+            self.start_recording()
+        try:
+            self.account_loop()
+        finally:
+            if isinstance(self.account_manager, RemoteAccountManager):
+                self.account_manager.release()
+            tracer.stop()
+            cassette.eject()
+
+    def on_config_change(self, keys: set) -> None:
+        """Applies settings edited while the bot runs, the lobby is used from the next lobby on"""
+        for key in sorted(keys & {'max_level', 'lobby', 'champs', 'dialog'}):
+            setattr(self, key, self.config.get_data(key))
+            self.log.info(f"Setting {key} changed to {getattr(self, key)}")
+
+    def create_account_manager(self) -> AccountGenerator:
+        """Leases accounts from the configured coordinator, or schedules them from the local account store"""
+        url = self.config.get_data('coordinator')
+        if url:
+            worker = f"{socket.gethostname()}:{os.getpid()}"
+            self.log.info(f"Getting accounts from coordinator {url} as {worker}")
+            return RemoteAccountManager(url, worker, self.config.get_data('coordinator_key'))
+        return AccountScheduler(SQLiteAccountManager(), self.config.get_data('account_policy'),
+                                self.config.get_data('account_cooldown') * 60)
+
+    def start_trace(self) -> None:
+        """Records phase, request, input and game spans to a Chrome trace file in the traces folder"""
+        if not os.path.exists(Constants.TRACE_DIR):
+            os.makedirs(Constants.TRACE_DIR)
+        path = os.path.join(Constants.TRACE_DIR, datetime.now().strftime('%d%m%Y_%H%M.json'))
+        tracer.start(path)
+        self.log.info(f"Tracing enabled. Writing trace to {path}")
+
+    def start_recording(self) -> None:
+        """Records every client and game request to a cassette in the cassettes folder"""
+        if not os.path.exists(Constants.CASSETTE_DIR):
+            os.makedirs(Constants.CASSETTE_DIR)
+        path = os.path.join(Constants.CASSETTE_DIR, datetime.now().strftime('%d%m%Y_%H%M.jsonl.gz'))
+        cassette.record(path)
+        self.log.info(f"Recording requests to {path}")
 
     def account_loop(self) -> None:
         """Main loop, gets an account, launches league, levels the account, and repeats"""
@@ -73,6 +123,7 @@ class Client:
                 self.client_errors = 0
                 self.phase_errors = 0
                 self.game_errors = 0
+                self.log.debug(f"API metrics: {dict(api.metrics)}")
             except ClientError as ce:
                 self.log.error(ce.__str__())
                 self.client_errors += 1
@@ -94,9 +145,18 @@ class Client:
                 self.log.error("Unknown Error. Exiting")
                 return
 
+    @traced(cat='client')
     def leveling_loop(self) -> None: 
         """Loop that runs the correct function based on the phase of the League Client, continuously starts games"""
         self.connection.connect_lcu(verbose=False)
+        self.events.start()
+        try:
+            self.run_phases()
+        finally:
+            self.events.stop()
+
+    def run_phases(self) -> None:
+        """Runs phase handlers until the account is leveled"""
         phase = self.get_phase()
         if phase != 'InProgress' and phase != 'Reconnect':
             self.check_patch()
@@ -122,6 +182,7 @@ class Client:
                     else:
                         self.game_errors = 0
                     del game
+                    tracer.flush()
                 case 'Reconnect':
                     self.reconnect()
                 case 'WaitingForStats':
@@ -133,33 +194,44 @@ class Client:
                 case _:
                     raise ClientError(f"Unknown phase. {self.phase}")
 
-    def get_phase(self) -> str:
-        """Requests the League Client phase"""
-        for i in range(15):
-            r = self.connection.request('get', '/lol-gameflow/v1/gameflow-phase')
-            if r.status_code == 200:
-                self.prev_phase = self.phase
-                self.phase = r.json()
-                self.log.debug(f"New Phase: {self.phase}, Previous Phase: {self.prev_phase}")
-                if self.prev_phase == self.phase and self.phase != "Matchmaking":
-                    self.phase_errors += 1
-                    if self.phase_errors == Client.MAX_PHASE_ERRORS:
-                        raise ClientError("Transition error. Phase will not change")
-                    else:
-                        self.log.debug(f"Phase same as previous. Phase: {self.phase}, Previous Phase: {self.prev_phase}, Errno {self.phase_errors}")
-                else:
-                    self.phase_errors = 0
-                sleep(1.5)
-                return self.phase
-            sleep(1)
-        raise ClientError("Could not get phase")
+    @traced(cat='client')
+    def get_phase(self, wait: float = PHASE_WAIT) -> str:
+        """Gets the League Client phase, waiting up to wait seconds for it to transition when events are available"""
+        phase = None
+        if self.events.is_connected():
+            phase = self.events.wait_for_change(EventStream.GAMEFLOW_PHASE, self.phase, wait)
+        if phase is None:
+            try:
+                r = self.connection.request('get', '/lol-gameflow/v1/gameflow-phase', accept=lambda r: r.status_code == 200)
+            except requests.exceptions.RequestException as e:
+                raise ClientError(f"Could not get phase. League Client is not responding: {e}")
+            if r.status_code != 200:
+                raise ClientError("Could not get phase")
+            phase = r.json()
+            sleep(wait)
+        self.prev_phase = self.phase
+        self.phase = phase
+        self.log.debug(f"New Phase: {self.phase}, Previous Phase: {self.prev_phase}")
+        if self.prev_phase == self.phase and self.phase != "Matchmaking":
+            self.phase_errors += 1
+            if self.phase_errors == Client.MAX_PHASE_ERRORS:
+                raise ClientError("Transition error. Phase will not change")
+            else:
+                self.log.debug(f"Phase same as previous. Phase: {self.phase}, Previous Phase: {self.prev_phase}, Errno {self.phase_errors}")
+        else:
+            self.phase_errors = 0
+        if self.prev_phase != self.phase:
+            api.response_cache.invalidate()
+        return self.phase
 
+    @traced(cat='phase')
     def create_lobby(self, lobby_id: int) -> None:
         """Creates a lobby for given lobby ID"""
         self.log.info(f"Creating lobby with lobby_id: {lobby_id}")
         self.connection.request('post', '/lol-lobby/v2/lobby', data={'queueId': lobby_id})
         sleep(1.5)
 
+    @traced(cat='phase')
     def start_matchmaking(self, lobby_id: int) -> None:
         """Starts matchmaking for a given lobby ID, will also wait out dodge timers"""
         self.log.info(f"Starting queue for lobby_id: {lobby_id}")
@@ -168,19 +240,29 @@ class Client:
             self.create_lobby(lobby_id)
             sleep(1)
         self.connection.request('post', '/lol-lobby/v2/lobby/matchmaking/search')
-        sleep(1.5)
 
         # Check for dodge timer
-        r = self.connection.request('get', '/lol-matchmaking/v1/search')
-        if r.status_code == 200 and len(r.json()['errors']) != 0:
-            dodge_timer = int(r.json()['errors'][0]['penaltyTimeRemaining'])
+        search = self.matchmaking_search()
+        if search is not None and len(search['errors']) != 0:
+            dodge_timer = int(search['errors'][0]['penaltyTimeRemaining'])
             self.log.info(f"Dodge Timer. Time Remaining: {utils.seconds_to_min_sec(dodge_timer)}")
             sleep(dodge_timer)
 
-        if r.status_code == 200:
-            if float(r.json()['estimatedQueueTime']) > 6000:
+        if search is not None:
+            if float(search['estimatedQueueTime']) > 6000:
                 self.log.warning("Queue times are too long")
 
+    def matchmaking_search(self) -> dict or None:
+        """Gets the matchmaking search state once it has been created"""
+        if self.events.is_connected():
+            return self.events.wait_for_change(EventStream.MATCHMAKING_SEARCH, None, 1.5)
+        sleep(1.5)
+        r = self.connection.request('get', '/lol-matchmaking/v1/search')
+        if r.status_code == 200:
+            return r.json()
+        return None
+
+    @traced(cat='phase')
     def queue(self) -> None:
         """Waits until the League Client Phase changes to something other than 'Matchmaking'"""
         self.log.info("In queue. Waiting for match")
@@ -192,13 +274,21 @@ class Client:
                 raise ClientError("Queue Timeout")
             elif datetime.now() - start > timedelta(minutes=10):
                 self.connection.request('delete', '/lol-lobby/v2/lobby/matchmaking/search')
-            sleep(1)
+            if not self.events.is_connected():
+                sleep(1)
 
+    @traced(cat='phase')
     def accept_match(self) -> None:
         """Accepts the Ready Check"""
         self.log.info("Accepting match")
         self.connection.request('post', '/lol-matchmaking/v1/ready-check/accept')
 
+    def on_ready_check(self, uri: str, ready_check: dict or None) -> None:
+        """Accepts a ready check as soon as it is pushed by the League Client"""
+        if ready_check is not None and ready_check.get('state') == 'InProgress' and ready_check.get('playerResponse') == 'None':
+            self.accept_match()
+
+    @traced(cat='phase')
     def game_lobby(self) -> None:
         """Handles the Champ Select Lobby"""
         self.log.info("Lobby opened, picking champ")
@@ -215,7 +305,7 @@ class Client:
         champ_index = 0
         f2p_index = 0
         requested = False
-        while r.status_code == 200:
+        while cs is not None:
             lobby_state = cs['timer']['phase']
             lobby_time_left = int(float(cs['timer']['adjustedTimeLeftInPhase']) / 1000)
 
@@ -254,32 +344,41 @@ class Client:
                             requested = True
                 else:
                     self.log.debug(f"Lobby State: {lobby_state}. Time Left in Lobby: {lobby_time_left}s. Action: Waiting")
-                r = self.connection.request('get', '/lol-champ-select/v1/session')
-                if r.status_code != 200:
+                cs = self.next_champ_select_session(cs)
+                if cs is None:
                     self.log.info('Lobby closed')
                     return
-                cs = r.json()
-                sleep(3)
 
+    def next_champ_select_session(self, cs: dict) -> dict or None:
+        """Gets the next champ select session, returns None if the lobby closed"""
+        if self.events.is_connected():
+            return self.events.wait_for_change(EventStream.CHAMP_SELECT, cs, 3)
+        r = self.connection.request('get', '/lol-champ-select/v1/session')
+        if r.status_code != 200:
+            return None
+        sleep(3)
+        return r.json()
+
+    @traced(cat='phase')
     def reconnect(self) -> None:
         """Attempts to reconnect to an ongoing League of Legends match"""
         self.log.info("Reconnecting to game")
-        for i in range(3):
-            r = self.connection.request('post', '/lol-gameflow/v1/reconnect')
-            if r.status_code == 204:
-                return
-            sleep(2)
-        self.log.warning('Could not reconnect to game')
+        r = self.connection.request('post', '/lol-gameflow/v1/reconnect', accept=lambda r: r.status_code == 204)
+        if r.status_code != 204:
+            self.log.warning('Could not reconnect to game')
 
+    @traced(cat='phase')
     def wait_for_stats(self) -> None:
         """Waits for the League Client Phase to change to something other than 'WaitingForStats'"""
         self.log.info("Waiting for stats")
         for i in range(60):
-            sleep(2)
-            if self.get_phase() != 'WaitingForStats':
+            if not self.events.is_connected():
+                sleep(2)
+            if self.get_phase(wait=3.5) != 'WaitingForStats':
                 return
         raise ClientError("Waiting for stats timeout")
 
+    @traced(cat='phase')
     def pre_end_of_game(self) -> None:
         """Handles league of legends client reopening after a game, honoring teammates, and clearing level-up/mission rewards"""
         self.log.info("Honoring teammates and accepting rewards")
@@ -292,24 +391,30 @@ class Client:
                 utils.click(Client.POST_GAME_SELECT_CHAMP_RATIO, utils.LEAGUE_CLIENT_WINNAME, 1)
                 utils.click(Client.POST_GAME_OK_RATIO, utils.LEAGUE_CLIENT_WINNAME, 1)
             utils.click(Client.POPUP_SEND_EMAIL_X_RATIO, utils.LEAGUE_CLIENT_WINNAME, 1)
-        except (utils.WindowNotFound, pyautogui.FailSafeException):
+        except (utils.WindowNotFound, inputs.InputAborted):
             sleep(3)
 
+    @traced(cat='phase')
     def end_of_game(self) -> None:
         """Transitions League Client to 'Lobby' phase."""
         self.log.info("Post game. Starting a new loop")
         posted = False
-        for i in range(15):
+
+        def leave_post_game() -> bool:
+            nonlocal posted
             if self.get_phase() != 'EndOfGame':
-                return
+                return True
             if not posted:
                 self.connection.request('post', '/lol-lobby/v2/play-again')
             else:
                 self.create_lobby(self.lobby)
             posted = not posted
-            sleep(1)
-        raise ClientError("Could not exit play-again screen")
+            return False
+
+        if not api.PLAY_AGAIN_POLICY.run(leave_post_game, accept=bool):
+            raise ClientError("Could not exit play-again screen")
 
+    @traced(cat='phase')
     def account_leveled(self) -> bool:
         """Checks if account has reached the constants.MAX_LEVEL (default 30)"""
         r = self.connection.request('get', '/lol-chat/v1/me')
@@ -322,6 +427,7 @@ class Client:
                 self.log.info("SUCCESS: Account Leveled")
                 return True
 
+    @traced(cat='phase')
     def check_patch(self) -> None:
         """Checks if the League Client is patching and waits till it is finished"""
         self.log.info("Checking for Client Updates")
@@ -339,18 +445,17 @@ class Client:
             self.log.debug(r.json())
         self.log.info("Client is up to date")
 
+    @traced(cat='phase')
     def honor_player(self) -> None:
         """Honors a player in the post game lobby"""
-        for i in range(3):
-            r = self.connection.request('get', '/lol-honor-v2/v1/ballot')
-            if r.status_code == 200:
-                players = r.json()['eligiblePlayers']
-                index = random.randint(0, len(players)-1)
-                self.connection.request('post', '/lol-honor-v2/v1/honor-player', data={"summonerId": players[index]['summonerId']})
-                self.log.debug(f"Honor Success: Player {index+1}. Champ: {players[index]['championName']}. Summoner: {players[index]['summonerName']}. ID: {players[index]['summonerId']}")
-                sleep(2)
-                return
+        r = self.connection.request('get', '/lol-honor-v2/v1/ballot', accept=lambda r: r.status_code == 200)
+        if r.status_code == 200:
+            players = r.json()['eligiblePlayers']
+            index = random.randint(0, len(players)-1)
+            self.connection.request('post', '/lol-honor-v2/v1/honor-player', data={"summonerId": players[index]['summonerId']})
+            self.log.debug(f"Honor Success: Player {index+1}. Champ: {players[index]['championName']}. Summoner: {players[index]['summonerName']}. ID: {players[index]['summonerId']}")
             sleep(2)
+            return
         self.log.warning('Honor Failure. Player -1, Champ: NULL. Summoner: NULL. ID: -1')
         self.connection.request('post', '/lol-honor-v2/v1/honor-player', data={"summonerId": 0})  # will clear honor screen
 
@@ -375,6 +480,7 @@ class Client:
         else:
             self.log.debug(f"Message success. Msg: {msg}. Caller: {inspect.stack()[1][3]}")
 
+    @traced(cat='phase')
     def set_game_config(self) -> None:
         """Overwrites the League of Legends game config"""
         self.log.info("Overwriting game configs")
@@ -3,18 +3,23 @@ Plays and monitors the state of a single League of Legends match
 """
 
 import logging
-import inspect
 import random
 import threading
+from dataclasses import dataclass, replace
 from enum import Enum
-from datetime import datetime, timedelta
-from time import sleep
+from datetime import datetime
+from time import monotonic
+from typing import Callable
 
-import pyautogui
 import requests
 
-from lolbot.common import utils
-from lolbot.common.config import ConfigRW
+from lolbot.common import api, inputs, utils
+from lolbot.bot.poller import StatePoller
+from lolbot.bot.timeline import TimelineRecorder
+from lolbot.common.config import ConfigRW, Constants
+from lolbot.common.liveclient import LiveClient
+from lolbot.common.clock import deadline
+from lolbot.common.tracing import sleep, traced, tracer
 
 
 class GameState(Enum):
@@ -24,6 +29,101 @@ class GameState(Enum):
     LATE_GAME = 3  # constants.EARLY_GAME_END_TIME -> end of game
 
 
+@dataclass(frozen=True, slots=True)
+class GameSnapshot:
+    """Game state read from the live client on one poll. The poller publishes a new snapshot each tick by swapping
+    Game.snapshot, so readers always see a consistent set of values"""
+    tick: int = 0
+    game_time: int = 0
+    game_state: GameState = None
+    is_dead: bool = False
+    respawn_in: float = 0
+    current_gold: float = 0
+    max_health: float = 0
+    current_hp_ratio: float = 1
+    hp_change: float = 0  # hp ratio lost since the previous snapshot
+    low_hp: bool = False
+    buying_items: bool = False
+    consumables: int = -1
+    mid_turret_destroyed: bool = False
+
+    @property
+    def formatted_game_time(self) -> str:
+        return utils.seconds_to_min_sec(self.game_time)
+
+
+# Named conditions the game loop waits for
+def has_state(snapshot: GameSnapshot) -> bool:
+    return snapshot.game_state is not None
+
+
+def game_started(snapshot: GameSnapshot) -> bool:
+    return snapshot.game_time >= 3
+
+
+def minions_spawned(snapshot: GameSnapshot) -> bool:
+    return snapshot.game_state in (GameState.EARLY_GAME, GameState.LATE_GAME)
+
+
+def died(snapshot: GameSnapshot) -> bool:
+    return snapshot.is_dead
+
+
+def respawned(snapshot: GameSnapshot) -> bool:
+    return not snapshot.is_dead
+
+
+def gold_ready(snapshot: GameSnapshot) -> bool:
+    return snapshot.buying_items
+
+
+def mid_turret_down(snapshot: GameSnapshot) -> bool:
+    return snapshot.mid_turret_destroyed
+
+
+def hp_dropped(since_tick: int) -> Callable[[GameSnapshot], bool]:
+    """Condition that a snapshot newer than since_tick lost more than HP_DROP of max health or is under LOW_HP"""
+    def condition(snapshot: GameSnapshot) -> bool:
+        return snapshot.tick > since_tick and (snapshot.hp_change > Game.HP_DROP or snapshot.current_hp_ratio < Game.LOW_HP)
+    return condition
+
+
+class SnapshotChannel:
+    """Hands snapshots from the poller thread to the game loop and wakes the game loop when a condition it waits for
+    becomes true. If the poller stops with an error, the error is raised in the waiting thread"""
+
+    def __init__(self) -> None:
+        self.snapshot = GameSnapshot()
+        self.error = None
+        self.condition = threading.Condition()
+
+    def publish(self, snapshot: GameSnapshot) -> None:
+        with self.condition:
+            self.snapshot = snapshot
+            self.condition.notify_all()
+
+    def close(self, error: Exception) -> None:
+        """Stops the channel, waiters raise error"""
+        with self.condition:
+            self.error = error
+            self.condition.notify_all()
+
+    def wait(self, condition: Callable[[GameSnapshot], bool], timeout: float) -> GameSnapshot or None:
+        """Blocks until the latest snapshot satisfies condition and returns it, or returns None after timeout seconds"""
+        end = deadline(timeout)
+        with tracer.span(getattr(condition, '__qualname__', 'condition'), 'wait', timeout=timeout):
+            with self.condition:
+                while True:
+                    if self.error is not None:
+                        raise self.error
+                    if condition(self.snapshot):
+                        return self.snapshot
+                    remaining = end - monotonic()
+                    if remaining <= 0:
+                        return None
+                    self.condition.wait(remaining)
+
+
 class GameError(Exception):
     """Indicates the game should be terminated"""
 
@@ -36,10 +136,6 @@ class GameError(Exception):
 
 class Game:
     """Game class that handles the tasks needed to play/win a bot game of League of Legends"""
-    MINI_MAP_UNDER_TURRET = tuple(ConfigRW().get_data('ally_mid_turret'))
-    MINI_MAP_CENTER_MID = tuple(ConfigRW().get_data('attack_mid_turret'))
-    MINI_MAP_ENEMY_NEXUS = tuple(ConfigRW().get_data('attack_nexus'))
-
     ULT_DIRECTION = (0.7298, 0.2689)
     CENTER_OF_SCREEN = (0.5, 0.5)
 
@@ -48,54 +144,106 @@ class Game:
     SHOP_ITEM_BUTTONS = [(0.3216, 0.5036), (0.4084, 0.5096), (0.4943, 0.4928)]
     SHOP_PURCHASE_ITEM_BUTTON = (0.7586, 0.8221)
 
+    # Seconds to wait after input for the game UI to respond
+    SHOP_OPEN_WAIT = 0.5
+    UI_WAIT = 0.25
+    KEY_WAIT = 0.1
+
+    MID_TURRET = 'Turret_T2_C_05_A'
+    HP_DROP = 0.1  # ratio of max health lost between polls that interrupts an attack
+    LOW_HP = 0.3
+    LOADING_SCREEN_TIMEOUT = 600
+    AFK_CHECK_INTERVAL = 3
+
+    # Seconds between live client polls
+    POLL_LOADING = 3
+    POLL_DEFAULT = 2
+    POLL_COMBAT = 1
+    POLL_LOW_HP = 0.5
+    POLL_DEAD_MAX = 5
     EARLY_GAME_END_TIME = 630
     MAX_GAME_TIME = 3000
+    MAX_BAD_RESPONSES = 15  # unusable live client responses in a row before the game is given up
 
     def __init__(self) -> None:
         self.log = logging.getLogger(__name__)
+        self.config = ConfigRW()
+        self.connection = api.Connection()
+        self.connection.set_game_headers()
+        self.live_client = LiveClient(self.connection)
         self.connection_errors = 0
-        self.game_data = None
-        self.current_player = None
-        self.game_time = None
-        self.formatted_game_time = None
-        self.game_state = None
-        self.mid_turret_destroyed = False
+        self.channel = SnapshotChannel()
+        self.poller = StatePoller(self.update_state, self.poll_interval, self.channel.close, 'GamePoller')
+        self.timeline = TimelineRecorder(Constants.TIMELINE_DIR) if self.config.get_data('timeline') else None
+        self.started = datetime.now()
+        self.bought_tick = -1  # snapshot tick of the last shop visit
+        self.respawned_tick = -1  # snapshot tick of the last respawn wait
         self.screen_locked = True
         self.in_lane = False
-        self.is_dead = False
-        self.respawn_in = 0
-        self.low_hp = False
-        self.buying_items = False
         self.ability_upgrades = ['ctrl+r', 'ctrl+q', 'ctrl+w', 'ctrl+e']
-        self.consumables = -1
-        self.current_hp_ratio = 1
-        self.hp_change = 0
 
+    # Minimap positions are read from the settings on every use so edits apply to the running game
+    @property
+    def MINI_MAP_UNDER_TURRET(self) -> tuple:
+        return tuple(self.config.get_data('ally_mid_turret'))
+
+    @property
+    def MINI_MAP_CENTER_MID(self) -> tuple:
+        return tuple(self.config.get_data('attack_mid_turret'))
+
+    @property
+    def MINI_MAP_ENEMY_NEXUS(self) -> tuple:
+        return tuple(self.config.get_data('attack_nexus'))
+
+    @traced(cat='game')
     def play_game(self) -> bool:
         """Plays a single game of League of Legends, takes actions based on game time"""
         try:
             self.wait_for_game_window()
             self.wait_for_connection()
-            threading.Thread(target=self.update_state_loop, daemon=True).start()
+            self.poller.start()
+            if self.channel.wait(has_state, 60) is None:
+                raise GameError("Connected to game server but no game data received")
             while True:
-                match self.game_state:
+                match self.snapshot.game_state:
                     case GameState.LOADING_SCREEN:
                         self.loading_screen()
                     case GameState.PRE_MINIONS:
                         self.game_start()
                     case GameState.EARLY_GAME:
-                        self.play(Game.MINI_MAP_CENTER_MID, Game.MINI_MAP_UNDER_TURRET, 20)
+                        self.play(self.MINI_MAP_CENTER_MID, self.MINI_MAP_UNDER_TURRET, 20)
                     case GameState.LATE_GAME:
-                        self.play(Game.MINI_MAP_ENEMY_NEXUS, Game.MINI_MAP_UNDER_TURRET, 30)
+                        self.play(self.MINI_MAP_ENEMY_NEXUS, self.MINI_MAP_UNDER_TURRET, 30)
         except GameError as e:
             self.log.warning(e.__str__())
+            self.end_game('error')
             utils.close_game()
             sleep(30)
             return False
-        except (utils.WindowNotFound, pyautogui.FailSafeException):
-            self.log.info(f"Game Complete. Game Time: {self.formatted_game_time}")
+        except (utils.WindowNotFound, inputs.InputAborted):
+            self.log.info(f"Game Complete. Game Time: {self.snapshot.formatted_game_time}")
+            self.end_game('complete')
             return True
-
+        finally:
+            self.poller.stop()
+
+    def end_game(self, result: str) -> None:
+        """Stops polling and saves the game timeline"""
+        self.poller.stop()
+        self.log.info(f"Game state poller. {self.poller.summary()}")
+        self.save_timeline(result)
+
+    def act(self, action: str) -> None:
+        """Records an action in the game timeline"""
+        if self.timeline is not None:
+            self.timeline.action(self.snapshot, action)
+
+    def save_timeline(self, result: str) -> None:
+        if self.timeline is not None and len(self.timeline.timeline):
+            path = self.timeline.save(self.started.strftime('%d%m%Y_%H%M%S'), result=result, game_time=self.snapshot.game_time)
+            self.log.debug(f"Game timeline saved to {path}")
+
+    @traced(cat='game')
     def wait_for_game_window(self) -> None:
         """Loop that waits for game window to open"""
         self.log.debug("Waiting for game window to open")
@@ -108,29 +256,27 @@ class Game:
                 return
         raise GameError("Game window did not open")
 
+    @traced(cat='game')
     def wait_for_connection(self) -> None:
         """Loop that waits for connection to local game server"""
         self.log.debug("Connecting to game server...")
-        for i in range(120):
-            try:
-                response = requests.get('https://127.0.0.1:2999/liveclientdata/allgamedata', timeout=10, verify=False)
-                if response.status_code == 200:
-                    self.log.debug("Connected to game server")
-                    return
-            except ConnectionError:
-                pass
-            sleep(1)
-        raise GameError("Game window opened but connection failed")
+        try:
+            response = self.connection.request('get', '/liveclientdata/gamestats', timeout=2, policy=api.GAME_CONNECT_POLICY, accept=lambda r: r.status_code == 200)
+        except requests.exceptions.RequestException:
+            raise GameError("Game window opened but connection failed")
+        if response.status_code != 200:
+            raise GameError("Game window opened but connection failed")
+        self.log.debug("Connected to game server")
 
+    @traced(cat='game')
     def loading_screen(self) -> None:
         """Loop that waits for loading screen to end"""
         self.log.info("In loading screen. Waiting for game to start")
-        start = datetime.now()
-        while self.game_time < 3:
-            if datetime.now() - start > timedelta(minutes=10):
-                raise GameError("Loading Screen max time limit exceeded")
+        if self.channel.wait(game_started, Game.LOADING_SCREEN_TIMEOUT) is None:
+            raise GameError("Loading Screen max time limit exceeded")
         utils.click(Game.CENTER_OF_SCREEN, utils.LEAGUE_GAME_CLIENT_WINNAME, 2)
 
+    @traced(cat='game')
     def game_start(self) -> None:
         """Buys starter items and waits for minions to clash (minions clash at 90 seconds)"""
         self.log.info("Game start. Waiting for minions")
@@ -138,76 +284,109 @@ class Game:
         self.buy_item()
         self.lock_screen()
         self.upgrade_abilities()
-        while self.game_state == GameState.PRE_MINIONS:
-            utils.right_click(Game.MINI_MAP_UNDER_TURRET, utils.LEAGUE_GAME_CLIENT_WINNAME, 2)  # to prevent afk warning popup
-            utils.click(Game.AFK_OK_BUTTON, utils.LEAGUE_GAME_CLIENT_WINNAME)
+        while self.channel.wait(minions_spawned, Game.AFK_CHECK_INTERVAL) is None:
+            self.act('afk')
+            utils.right_click(self.MINI_MAP_UNDER_TURRET, utils.LEAGUE_GAME_CLIENT_WINNAME, 0)  # to prevent afk warning popup
+            utils.click(Game.AFK_OK_BUTTON, utils.LEAGUE_GAME_CLIENT_WINNAME, 0)
         self.in_lane = True
 
+    @traced(cat='game')
     def play(self, attack_position: tuple, retreat_position: tuple, time_to_lane: int) -> None:
         """A set of player actions. Buys items, levels up abilities, heads to lane, attacks, then retreats"""
-        self.log.debug(f"Main player loop. GameState: {self.game_state}")
+        self.log.debug(f"Main player loop. GameState: {self.snapshot.game_state}")
         utils.click(Game.AFK_OK_BUTTON, utils.LEAGUE_GAME_CLIENT_WINNAME)
 
-        if self.is_dead:
+        if self.is_dead():
             self.dead_activities()
 
         if not self.in_lane:
+            self.act('lane')
             utils.press('d', utils.LEAGUE_GAME_CLIENT_WINNAME)  # ghost
             utils.attack_move_click(attack_position, time_to_lane, self)
             self.in_lane = True
 
         # Main attack move loop. This sequence attacks and then de-aggros to prevent them from dying 50 times.
-        while not self.buying_items and not self.low_hp:
-            if self.is_dead:
+        while not self.needs_items() and not self.snapshot.low_hp:
+            if self.is_dead():
                 self.dead_activities()
                 return
 
-            if attack_position == Game.MINI_MAP_CENTER_MID and self.game_state == GameState.LATE_GAME:
+            snapshot = self.snapshot
+            if attack_position == self.MINI_MAP_CENTER_MID and snapshot.game_state == GameState.LATE_GAME:
                 return
 
-            attack_time = random.uniform(4, 6) if self.current_hp_ratio < 0.6 or \
-                                                  self.current_player['championStats']['maxHealth'] < 1000 \
+            attack_time = random.uniform(4, 6) if snapshot.current_hp_ratio < 0.6 or snapshot.max_health < 1000 \
                 else random.uniform(6, 12)
+            self.act('attack')
             utils.attack_move_click(attack_position, attack_time, self)
+            snapshot = self.snapshot
+            self.act('retreat')
             utils.right_click(retreat_position, utils.LEAGUE_GAME_CLIENT_WINNAME, min(attack_time / 8, 1))
-            if self.consumables != -1 and self.current_hp_ratio < 0.75:
-                utils.press(f"{self.consumables + 1}", utils.LEAGUE_GAME_CLIENT_WINNAME)
-            self.log.debug(f"Need to buy items: {self.buying_items}. Has low hp: {self.low_hp}")
+            if snapshot.consumables != -1 and snapshot.current_hp_ratio < 0.75:
+                self.act('potion')
+                utils.press(f"{snapshot.consumables + 1}", utils.LEAGUE_GAME_CLIENT_WINNAME)
+            self.log.debug(f"Need to buy items: {self.needs_items()}. Has low hp: {snapshot.low_hp}")
 
         # Ult and back if low hp or have gold
-        if self.buying_items or self.low_hp:
+        if self.needs_items() or self.snapshot.low_hp:
             utils.press('f', utils.LEAGUE_GAME_CLIENT_WINNAME)
             # utils.attack_move_click(Game.ULT_DIRECTION)
             # utils.press('r', utils.LEAGUE_GAME_CLIENT_WINNAME, 4)
             self.back_to_base()
 
+    def is_dead(self) -> bool:
+        """Checks if the champion is dead and the bot has not already waited out this death"""
+        return self.snapshot.is_dead and self.snapshot.tick > self.respawned_tick
+
+    def attack_interrupted(self, since_tick: int) -> Callable[[GameSnapshot], bool]:
+        """Condition that ends an attack: the champion died, lost hp after since_tick, can buy items, or the mid
+        turret fell while pushing it"""
+        lost_hp = hp_dropped(since_tick)
+        pushing_mid = not self.snapshot.mid_turret_destroyed
+
+        def condition(snapshot: GameSnapshot) -> bool:
+            return (died(snapshot) and snapshot.tick > self.respawned_tick) or lost_hp(snapshot) \
+                or (gold_ready(snapshot) and snapshot.tick > self.bought_tick) or (pushing_mid and mid_turret_down(snapshot))
+        return condition
+
+    def needs_items(self) -> bool:
+        """Checks if the champion has gold to spend that was not there at the last shop visit"""
+        return self.snapshot.buying_items and self.snapshot.tick > self.bought_tick
+
+    @traced(cat='game')
     def dead_activities(self):
         """Activities while waiting for respawn"""
-        self.log.debug(f"Dead, waiting for {self.respawn_in} seconds")
+        snapshot = self.snapshot
+        self.log.debug(f"Dead, waiting for {snapshot.respawn_in} seconds")
+        self.act('dead')
         self.buy_item()
         self.upgrade_abilities()
-        if self.respawn_in > 1:
-            sleep(self.respawn_in)
-        self.respawn_in = 0
+        if snapshot.respawn_in > 1:
+            self.channel.wait(respawned, snapshot.respawn_in + 5)
+        self.respawned_tick = self.snapshot.tick
         self.in_lane = False
 
+    @traced(cat='game')
     def back_to_base(self):
-        self.log.debug(f"Going back with {self.current_player['currentGold']} gold and low hp: {self.low_hp}")
-        utils.right_click(Game.MINI_MAP_UNDER_TURRET, utils.LEAGUE_GAME_CLIENT_WINNAME, 5)
+        self.log.debug(f"Going back with {self.snapshot.current_gold} gold and low hp: {self.snapshot.low_hp}")
+        self.act('back')
+        utils.right_click(self.MINI_MAP_UNDER_TURRET, utils.LEAGUE_GAME_CLIENT_WINNAME, 5)
         utils.press('b', utils.LEAGUE_GAME_CLIENT_WINNAME, 9)
         self.in_lane = False
         self.buy_item()
         self.upgrade_abilities()
 
+    @traced(cat='game')
     def buy_item(self) -> None:
         """Opens the shop and attempts to purchase items via default shop hotkeys"""
         self.log.debug("Attempting to purchase an item from build order")
-        utils.press('p', utils.LEAGUE_GAME_CLIENT_WINNAME, 1)
-        utils.click(random.choice(Game.SHOP_ITEM_BUTTONS), utils.LEAGUE_GAME_CLIENT_WINNAME, 1)
-        utils.click(Game.SHOP_PURCHASE_ITEM_BUTTON, utils.LEAGUE_GAME_CLIENT_WINNAME, 1)
-        utils.press('esc', utils.LEAGUE_GAME_CLIENT_WINNAME, 1)
-        utils.click(Game.SYSTEM_MENU_X_BUTTON, utils.LEAGUE_GAME_CLIENT_WINNAME, 1)
-        self.buying_items = False
+        self.act('buy')
+        utils.press('p', utils.LEAGUE_GAME_CLIENT_WINNAME, Game.SHOP_OPEN_WAIT)
+        utils.click(random.choice(Game.SHOP_ITEM_BUTTONS), utils.LEAGUE_GAME_CLIENT_WINNAME, Game.UI_WAIT)
+        utils.click(Game.SHOP_PURCHASE_ITEM_BUTTON, utils.LEAGUE_GAME_CLIENT_WINNAME, Game.UI_WAIT)
+        utils.press('esc', utils.LEAGUE_GAME_CLIENT_WINNAME, Game.UI_WAIT)
+        utils.click(Game.SYSTEM_MENU_X_BUTTON, utils.LEAGUE_GAME_CLIENT_WINNAME, Game.UI_WAIT)
+        self.bought_tick = self.snapshot.tick
 
     def lock_screen(self) -> None:
         """Locks screen on champion"""
@@ -216,84 +395,110 @@ class Game:
             utils.press('y', utils.LEAGUE_GAME_CLIENT_WINNAME)
             self.screen_locked = True
 
+    @traced(cat='game')
     def upgrade_abilities(self) -> None:
         """Upgrades abilities and then rotates which ability will be upgraded first next time"""
         self.log.debug(f"Upgrading abilities. Second Ability: {self.ability_upgrades[1]}")
+        self.act('abilities')
         for upgrade in self.ability_upgrades:
-            utils.press(upgrade, utils.LEAGUE_GAME_CLIENT_WINNAME)
+            utils.press(upgrade, utils.LEAGUE_GAME_CLIENT_WINNAME, Game.KEY_WAIT)
         self.ability_upgrades = ([self.ability_upgrades[0]] + [self.ability_upgrades[-1]] + self.ability_upgrades[1:-1])  # r is always first
 
-    def update_state(self, postpone_update: int or float = 1.0) -> bool:
+    @traced(cat='game')
+    def update_state(self) -> bool:
         """Gets game data from local game server and updates game state"""
-        self.log.debug(f"Updating state. Caller: {inspect.stack()[1][3]}")
-        sleep(postpone_update)
         try:
-            response = requests.get('https://127.0.0.1:2999/liveclientdata/allgamedata', timeout=10, verify=False)
-        except:
-            self.log.debug("Connection error. Could not get game data")
-            self.connection_errors += 1
+            updated = self.live_client.update(timeout=10, events=not self.snapshot.mid_turret_destroyed)
+            snapshot = self.next_snapshot(self.snapshot) if updated else None
+        except api.CircuitOpenError:
             if not utils.exists(utils.LEAGUE_GAME_CLIENT_WINNAME):
                 raise utils.WindowNotFound
-            if self.connection_errors == 15:
-                raise GameError("Connection Error. Could not connect to game")
-            return False
-        if response.status_code != 200:
-            self.log.debug(f"Connection error. Response status code: {response.status_code}")
-            self.connection_errors += 1
+            raise GameError("Connection Error. Could not connect to game")
+        except requests.exceptions.RequestException:
+            self.log.debug("Connection error. Could not get game data")  # counted by the live client circuit breaker
             if not utils.exists(utils.LEAGUE_GAME_CLIENT_WINNAME):
                 raise utils.WindowNotFound
-            if self.connection_errors == 15:
-                raise GameError("Bad Response. Could not connect to game")
             return False
-
-        self.game_data = response.json()
-        self.current_player = self.game_data['activePlayer']
-
-        self.game_time = int(self.game_data['gameData']['gameTime'])
-        self.formatted_game_time = utils.seconds_to_min_sec(self.game_time)
-
-        for player in self.game_data['allPlayers']:
-            if player['summonerName'] == self.game_data['activePlayer']['summonerName'].split('#')[0]:
-                self.is_dead = player['isDead']
-                self.respawn_in = player['respawnTimer']
-                self.buying_items = self.current_player['currentGold'] > 3000 and len(player['items']) < 7
-
-                for item in player['items']:
-                    if item['consumable'] and item['slot'] < 6:
-                        self.consumables = item['slot']
-                        break
-                    elif item['slot'] == 6:
-                        self.consumables = -1
-
-        self.current_hp_ratio = self.current_player['championStats']['currentHealth'] / self.current_player['championStats']['maxHealth']
-        self.low_hp = 0.01 < self.current_hp_ratio < 0.3
-
-        if not self.mid_turret_destroyed:
-            for event in self.game_data["events"]["Events"]:
-                if 'TurretKilled' in event.keys() and event['TurretKilled'] == 'Turret_T2_C_05_A':
-                    self.mid_turret_destroyed = True
-
-        if self.game_time < 3:
-            self.game_state = GameState.LOADING_SCREEN
-        elif self.game_time < 80:
-            self.game_state = GameState.PRE_MINIONS
-        elif not self.mid_turret_destroyed:
-            if self.game_state != GameState.EARLY_GAME:
-                self.log.info(f"Early Game. Pushing center mid. Game Time: {self.formatted_game_time}")
-                self.game_state = GameState.EARLY_GAME
-        elif self.game_time < Game.MAX_GAME_TIME or self.mid_turret_destroyed:
-            if self.game_state != GameState.LATE_GAME:
-                self.log.info(f"Mid Game. Pushing enemy nexus. Game Time: {self.formatted_game_time}")
-                self.game_state = GameState.LATE_GAME
-        else:
-            raise GameError("Game has exceeded the max time limit")
-
+        except GameError:
+            raise
+        except Exception as e:
+            self.log.debug(f"Bad response. Could not read game data: {e!r}")
+            return self.bad_response("Bad Response. Could not read game data")
+        if not updated:
+            self.log.debug(f"Connection error. Response status code: {self.live_client.status_code}")
+            return self.bad_response("Bad Response. Could not connect to game")
+
+        self.channel.publish(snapshot)
+        if self.timeline is not None:
+            self.timeline.tick(snapshot)
         self.connection_errors = 0
-        self.log.debug(f"State Updated. Game Time: {self.game_time}, Game State: {self.game_state}, IsDead: {self.is_dead}, Gold: {self.current_player['currentGold']}")
+        self.log.debug(f"State Updated. Game Time: {self.snapshot.game_time}, Game State: {self.snapshot.game_state}, IsDead: {self.snapshot.is_dead}, Gold: {self.snapshot.current_gold}")
         return True
 
-    def update_state_loop(self, postpone_update: int or float = 2.0):
-        while True:
-            prev = self.current_hp_ratio
-            self.update_state(postpone_update)
-            self.hp_change = prev - self.current_hp_ratio
+    def bad_response(self, message: str) -> bool:
+        """Counts a response that was received but unusable, the game is given up after MAX_BAD_RESPONSES in a row"""
+        self.connection_errors += 1
+        if not utils.exists(utils.LEAGUE_GAME_CLIENT_WINNAME):
+            raise utils.WindowNotFound
+        if self.connection_errors >= Game.MAX_BAD_RESPONSES:
+            raise GameError(message)
+        return False
+
+    def next_snapshot(self, previous: GameSnapshot) -> GameSnapshot:
+        """Builds the snapshot following previous from the latest live client data"""
+        current_player = self.live_client.current_player
+        stats = current_player['championStats']
+        hp_ratio = stats['currentHealth'] / stats['maxHealth']
+        game_time = int(self.live_client.game_time)
+        snapshot = replace(previous, tick=previous.tick + 1, game_time=game_time, current_gold=current_player['currentGold'],
+                           max_health=stats['maxHealth'], current_hp_ratio=hp_ratio, hp_change=previous.current_hp_ratio - hp_ratio,
+                           low_hp=0.01 < hp_ratio < Game.LOW_HP)
+
+        player = self.live_client.player
+        if player is not None:
+            consumables = snapshot.consumables
+            for item in player['items']:
+                if item['consumable'] and item['slot'] < 6:
+                    consumables = item['slot']
+                    break
+                elif item['slot'] == 6:
+                    consumables = -1
+            snapshot = replace(snapshot, is_dead=player['isDead'], respawn_in=player['respawnTimer'], consumables=consumables,
+                               buying_items=snapshot.current_gold > 3000 and len(player['items']) < 7)
+
+        for event in self.live_client.new_events:  # each event is seen once, events stop being polled after the turret falls
+            if event.get('TurretKilled') == Game.MID_TURRET:
+                snapshot = replace(snapshot, mid_turret_destroyed=True)
+
+        if game_time < 3:
+            game_state = GameState.LOADING_SCREEN
+        elif game_time < 80:
+            game_state = GameState.PRE_MINIONS
+        elif not snapshot.mid_turret_destroyed:
+            game_state = GameState.EARLY_GAME
+            if previous.game_state != GameState.EARLY_GAME:
+                self.log.info(f"Early Game. Pushing center mid. Game Time: {snapshot.formatted_game_time}")
+        elif game_time < Game.MAX_GAME_TIME or snapshot.mid_turret_destroyed:
+            game_state = GameState.LATE_GAME
+            if previous.game_state != GameState.LATE_GAME:
+                self.log.info(f"Mid Game. Pushing enemy nexus. Game Time: {snapshot.formatted_game_time}")
+        else:
+            raise GameError("Game has exceeded the max time limit")
+        return replace(snapshot, game_state=game_state)
+
+    @property
+    def snapshot(self) -> GameSnapshot:
+        return self.channel.snapshot
+
+    def poll_interval(self) -> float:
+        """Seconds until the next poll: slow while loading or dead, fast while taking damage or at low hp"""
+        snapshot = self.snapshot
+        if snapshot.game_state in (None, GameState.LOADING_SCREEN):
+            return Game.POLL_LOADING
+        if snapshot.is_dead:
+            return min(max(snapshot.respawn_in / 2, Game.POLL_COMBAT), Game.POLL_DEAD_MAX)
+        if snapshot.low_hp:
+            return Game.POLL_LOW_HP
+        if snapshot.hp_change > 0.02 or snapshot.current_hp_ratio < 0.6:
+            return Game.POLL_COMBAT
+        return Game.POLL_DEFAULT
@@ -4,12 +4,12 @@ Handles Riot Client and login to launch the League Client
 
 import logging
 import subprocess
-from time import sleep
 from pathlib import Path
 
 from lolbot.common import api
 from lolbot.common import utils
 from lolbot.common.config import ConfigRW
+from lolbot.common.tracing import sleep, traced
 
 
 class LauncherError(Exception):
@@ -38,6 +38,7 @@ class Launcher:
         self.password = password
         self.launch_loop()
 
+    @traced(cat='launcher')
     def launch_loop(self) -> None:
         """Handles tasks necessary to open the League of Legends client"""
         logged_in = False
@@ -106,12 +107,12 @@ class Launcher:
         elif r.json()['error'] == 'auth_failure':
             raise LauncherError("Invalid username or password")
 
+    @traced(cat='launcher')
     def verify_account(self) -> bool:
         """Checks if account credentials match the account on the League Client"""
         self.log.info("Verifying logged-in account credentials")
-        connection = api.Connection()
-        connection.connect_lcu(verbose=False)
-        r = connection.request('get', '/lol-login/v1/session')
+        self.connection.connect_lcu(verbose=False)
+        r = self.connection.request('get', '/lol-login/v1/session')
         if r.json()['username'] != self.username:
             self.log.warning("Accounts do not match! Proceeding anyways")
             return False
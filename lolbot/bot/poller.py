@@ -0,0 +1,81 @@
+"""
+Runs a state update on a background thread at an interval that adapts after every tick
+"""
+
+import logging
+import threading
+from time import monotonic
+from typing import Callable
+
+from lolbot.common.clock import deadline
+
+
+class StatePoller:
+    """Calls update on its own thread until stopped or update raises. After each tick interval() picks the delay to
+    the next tick. Ticks are scheduled at a fixed rate, a tick that starts after the next one was due counts as a missed
+    deadline and the schedule restarts from the current time"""
+
+    def __init__(self, update: Callable[[], object], interval: Callable[[], float],
+                 on_error: Callable[[Exception], None], name: str = 'StatePoller') -> None:
+        self.log = logging.getLogger(__name__)
+        self.update = update
+        self.interval = interval
+        self.on_error = on_error
+        self.name = name
+        self.stopped = threading.Event()
+        self.thread = None
+        self.ticks = 0
+        self.missed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def start(self) -> None:
+        """Starts ticking immediately"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 15) -> None:
+        """Stops ticking and waits for a tick in progress to finish"""
+        self.stopped.set()
+        if self.thread is None:
+            return
+        if self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+        self.thread = None
+        self.log.debug(f"{self.name} stopped")
+
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def stats(self) -> dict:
+        return {'ticks': self.ticks, 'missed': self.missed, 'latency_max': self.latency_max,
+                'latency_avg': self.latency_total / self.ticks if self.ticks else 0.0}
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"Ticks: {stats['ticks']}, missed deadlines: {stats['missed']}, "
+                f"latency avg: {stats['latency_avg'] * 1000:.0f} ms, max: {stats['latency_max'] * 1000:.0f} ms")
+
+    def _run(self) -> None:
+        due = monotonic()
+        while not self.stopped.is_set():
+            start = monotonic()
+            try:
+                self.update()
+            except Exception as e:
+                if not self.stopped.is_set():
+                    self.on_error(e)
+                return
+            latency = monotonic() - start
+            self.ticks += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            due += deadline(self.interval()) - monotonic()  # interval in real seconds
+            now = monotonic()
+            if due < now:
+                self.missed += 1
+                due = now
+            self.stopped.wait(due - now)
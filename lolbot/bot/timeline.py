@@ -0,0 +1,134 @@
+"""
+Records game state ticks and bot actions of a game as compressed typed columns
+"""
+
+import json
+import os
+import sys
+import zlib
+from array import array
+from enum import Enum
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+FORMAT_VERSION = 1
+
+# Snapshot fields stored per tick, with array typecodes
+TICK_COLUMNS = (
+    ('tick', 'I'),
+    ('game_time', 'I'),
+    ('game_state', 'b'),  # GameState value, -1 before the first state
+    ('is_dead', 'B'),
+    ('respawn_in', 'f'),
+    ('current_gold', 'f'),
+    ('max_health', 'f'),
+    ('current_hp_ratio', 'f'),
+    ('hp_change', 'f'),
+    ('low_hp', 'B'),
+    ('buying_items', 'B'),
+    ('consumables', 'b'),
+    ('mid_turret_destroyed', 'B'),
+)
+
+# Actions are stored as (tick of the snapshot they were decided on, index into ACTIONS)
+ACTION_COLUMNS = (
+    ('action_tick', 'I'),
+    ('action', 'B'),
+)
+ACTIONS = ('lane', 'attack', 'retreat', 'potion', 'back', 'buy', 'abilities', 'dead', 'afk')
+
+
+class Timeline:
+    """Typed columns of one game"""
+
+    def __init__(self, meta: dict = None) -> None:
+        self.meta = meta or {}
+        self.columns = {name: array(code) for name, code in TICK_COLUMNS + ACTION_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.columns['tick'])
+
+    def add_tick(self, snapshot) -> None:
+        """Appends the fields of a GameSnapshot"""
+        for name, code in TICK_COLUMNS:
+            value = getattr(snapshot, name)
+            if isinstance(value, Enum):
+                value = value.value
+            elif value is None:
+                value = -1
+            self.columns[name].append(value)
+
+    def add_action(self, tick: int, action: str) -> None:
+        self.columns['action_tick'].append(tick)
+        self.columns['action'].append(ACTIONS.index(action))
+
+    def rows(self) -> list:
+        """Ticks as dicts of column values"""
+        names = [name for name, _ in TICK_COLUMNS]
+        return [dict(zip(names, values)) for values in zip(*(self.columns[name] for name in names))]
+
+    def actions(self) -> list:
+        """Actions as (tick, action name) tuples"""
+        return [(tick, ACTIONS[code]) for tick, code in zip(self.columns['action_tick'], self.columns['action'])]
+
+    def to_numpy(self) -> dict:
+        """Columns as numpy arrays sharing memory with the stored columns. Requires numpy"""
+        if numpy is None:
+            raise ImportError("numpy is required for to_numpy")
+        return {name: numpy.frombuffer(column, dtype=column.typecode) if len(column) else numpy.array([], dtype=column.typecode)
+                for name, column in self.columns.items()}
+
+    def save(self, path: str) -> None:
+        """Writes the timeline as a JSON header followed by the raw columns, compressed with zlib"""
+        header = {'version': FORMAT_VERSION, 'byteorder': sys.byteorder, 'meta': self.meta, 'actions': ACTIONS,
+                  'columns': [[name, column.typecode, column.itemsize, len(column)] for name, column in self.columns.items()]}
+        body = b''.join(column.tobytes() for column in self.columns.values())
+        with open(path, 'wb') as f:
+            f.write(zlib.compress(json.dumps(header).encode() + b'\n' + body, 9))
+
+    @staticmethod
+    def load(path: str) -> 'Timeline':
+        with open(path, 'rb') as f:
+            data = zlib.decompress(f.read())
+        head, _, body = data.partition(b'\n')
+        header = json.loads(head)
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported timeline version {header['version']}")
+        timeline = Timeline(header['meta'])
+        offset = 0
+        for name, code, itemsize, count in header['columns']:
+            column = array(code)
+            if column.itemsize != itemsize:
+                raise ValueError(f"Column {name} was written with {itemsize} byte items, this platform uses {column.itemsize}")
+            column.frombytes(body[offset:offset + itemsize * count])
+            if header['byteorder'] != sys.byteorder:
+                column.byteswap()
+            offset += itemsize * count
+            timeline.columns[name] = column
+        return timeline
+
+
+class TimelineRecorder:
+    """Collects the timeline of the current game and saves it to a folder when the game ends"""
+
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+        self.timeline = Timeline()
+
+    def tick(self, snapshot) -> None:
+        self.timeline.add_tick(snapshot)
+
+    def action(self, snapshot, action: str) -> None:
+        self.timeline.add_action(snapshot.tick, action)
+
+    def save(self, name: str, **meta) -> str:
+        """Saves the timeline as name.timeline in the folder and returns the path"""
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        self.timeline.meta.update(meta)
+        path = os.path.join(self.folder, f'{name}.timeline')
+        self.timeline.save(path)
+        return path
@@ -1,10 +1,14 @@
 """
-Handles accounts for the bot, persists to a JSON file
+Handles accounts for the bot, persists to a SQLite database or a JSON file
 """
 
 import os
 import json
+import logging
+import sqlite3
+import threading
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 
 from lolbot.common.config import Constants
@@ -75,9 +79,25 @@ class AccountManager(AccountGenerator):
         if asdict(account) in data['accounts']:
             return
         data['accounts'].append(asdict(account))
-        with open(Constants.ACCOUNT_PATH, 'r+') as outfile:
+        with open(Constants.ACCOUNT_PATH, 'w') as outfile:
             json.dump(data, outfile, indent=4)
 
+    def add_accounts(self, accounts: list) -> int:
+        """Writes accounts to JSON in one rewrite, skips usernames that already exist. Returns the number added"""
+        with open(Constants.ACCOUNT_PATH, 'r') as f:
+            data = json.load(f)
+        usernames = {account['username'] for account in data['accounts']}
+        added = 0
+        for account in accounts:
+            if account.username not in usernames:
+                usernames.add(account.username)
+                data['accounts'].append(asdict(account))
+                added += 1
+        if added:
+            with open(Constants.ACCOUNT_PATH, 'w') as outfile:
+                json.dump(data, outfile, indent=4)
+        return added
+
     def edit_account(self, og_uname: str, account: Account) -> None:
         """Edit an account"""
         with open(Constants.ACCOUNT_PATH, 'r') as f:
@@ -117,3 +137,175 @@ class AccountManager(AccountGenerator):
                 with open(Constants.ACCOUNT_PATH, 'w') as outfile:
                     json.dump(data, outfile, indent=4)
                 return
+
+
+class SQLiteAccountManager(AccountGenerator):
+    """Class that handles account persistence in SQLite. Accounts keep insertion order and usernames are unique.
+    Accounts from accounts.json are imported once when the database is created"""
+
+    SCHEMA_VERSION = 1
+    SORT_COLUMNS = {'order': ('id',), 'level': ('level', 'id'), 'username': ('username',)}
+
+    def __init__(self, path: str = None) -> None:
+        self.log = logging.getLogger(__name__)
+        self.path = path or Constants.ACCOUNT_DB_PATH
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)  # autocommit
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.transaction():
+            version = self.db.execute("PRAGMA user_version").fetchone()[0]
+            if version < self.SCHEMA_VERSION:
+                self.create_schema()
+                self.migrate_json()
+                self.db.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+
+    @contextmanager
+    def transaction(self):
+        """Runs the statements of the block atomically, holding the write lock from the start"""
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    def create_schema(self) -> None:
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL UNIQUE,
+                password TEXT NOT NULL,
+                level INTEGER NOT NULL DEFAULT 0
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS accounts_level ON accounts (level, id)")
+
+    def migrate_json(self) -> None:
+        """Imports accounts from accounts.json, the file is left in place as a backup"""
+        try:
+            with open(Constants.ACCOUNT_PATH, 'r') as f:
+                accounts = json.load(f)['accounts']
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        if not isinstance(accounts, list):
+            self.log.warning(f"Accounts in {Constants.ACCOUNT_PATH} are not a list, nothing imported")
+            return
+        rows = []
+        for i, a in enumerate(accounts):
+            try:
+                rows.append((str(a['username']), str(a['password']), int(a.get('level', 0))))
+            except (KeyError, TypeError, ValueError, AttributeError):
+                self.log.warning(f"Skipped malformed account {i} in {Constants.ACCOUNT_PATH}")
+        self.db.executemany("INSERT OR IGNORE INTO accounts (username, password, level) VALUES (?, ?, ?)", rows)
+        if rows:
+            self.log.info(f"Imported {len(rows)} accounts from {Constants.ACCOUNT_PATH}")
+
+    def get_account(self, max_level: int) -> Account:
+        """Gets the first added account where level is < max_level"""
+        with self.lock:
+            row = self.db.execute("SELECT username, password, level FROM accounts WHERE level < ? ORDER BY id LIMIT 1",
+                                  (max_level,)).fetchone()
+        if row is None:
+            return Account('', '', 0)
+        return Account(row['username'], row['password'], row['level'])
+
+    def add_account(self, account: Account) -> None:
+        """Adds an account, will not add a username twice"""
+        with self.lock:
+            self.db.execute("INSERT OR IGNORE INTO accounts (username, password, level) VALUES (?, ?, ?)",
+                            (account.username, account.password, account.level))
+
+    def add_accounts(self, accounts: list) -> int:
+        """Adds a batch of accounts in one transaction, skips usernames that already exist. Returns the number added"""
+        with self.transaction():
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO accounts (username, password, level) VALUES (?, ?, ?)",
+                                [(a.username, a.password, a.level) for a in accounts])
+            return self.db.total_changes - before
+
+    def iter_accounts(self, batch_size: int = 1000):
+        """Yields all accounts in insertion order, reading batch_size rows at a time"""
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute("SELECT id, username, password, level FROM accounts WHERE id > ? ORDER BY id LIMIT ?",
+                                       (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield Account(row['username'], row['password'], row['level'])
+            last_id = rows[-1]['id']
+
+    def count_accounts(self, search: str = '', below_level: int = None) -> int:
+        """Number of accounts matching the filters of query_accounts"""
+        where, params = self._filters(search, below_level)
+        with self.lock:
+            return self.db.execute(f"SELECT COUNT(*) FROM accounts {where}", params).fetchone()[0]
+
+    def query_accounts(self, search: str = '', below_level: int = None, sort: str = 'order', descending: bool = False,
+                       offset: int = 0, limit: int = 50) -> list:
+        """One page of accounts as dictionaries. search is a username prefix, below_level keeps accounts with a lower
+        level. Both filters and every sort are served by an index"""
+        where, params = self._filters(search, below_level)
+        direction = ' DESC' if descending else ''
+        order = ', '.join(column + direction for column in self.SORT_COLUMNS.get(sort, ('id',)))
+        with self.lock:
+            rows = self.db.execute(f"SELECT username, password, level FROM accounts {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                                   (*params, limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _filters(search: str, below_level: int or None) -> tuple:
+        clauses, params = [], []
+        if search:
+            clauses.append("username >= ? AND username < ?")  # prefix range on the username index
+            params += [search, search + '\U0010ffff']
+        if below_level is not None:
+            clauses.append("level < ?")
+            params.append(below_level)
+        return ('WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def edit_account(self, og_uname: str, account: Account) -> None:
+        """Edit an account. Raises ValueError if the new username belongs to another account"""
+        with self.lock:
+            try:
+                self.db.execute("UPDATE accounts SET username = ?, password = ?, level = ? WHERE username = ?",
+                                (account.username, account.password, account.level, og_uname))
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Account {account.username} already exists") from None
+
+    def delete_account(self, account: Account) -> None:
+        """Deletes account"""
+        with self.lock:
+            self.db.execute("DELETE FROM accounts WHERE username = ?", (account.username,))
+
+    def get_all_accounts(self) -> list:
+        """Returns all accounts as dictionary"""
+        with self.lock:
+            rows = self.db.execute("SELECT username, password, level FROM accounts ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def set_account_as_leveled(self, account: Account, max_level: int) -> None:
+        """Sets account level to user configured max level"""
+        with self.lock:
+            self.db.execute("UPDATE accounts SET level = ? WHERE username = ?", (max_level, account.username))
+
+    def data_version(self) -> int:
+        """Number that changes whenever another connection modified the database"""
+        with self.lock:
+            return self.db.execute("PRAGMA data_version").fetchone()[0]
+
+    def backup(self, path: str) -> None:
+        """Writes a consistent copy of the database to path"""
+        target = sqlite3.connect(path)
+        try:
+            with self.lock:
+                self.db.backup(target)
+        finally:
+            target.close()
+
+    def close(self) -> None:
+        self.db.close()
@@ -0,0 +1,158 @@
+"""
+Streams accounts between CSV/JSONL files and the account store
+
+Usage: python -m lolbot.common.account_io import accounts.csv
+       python -m lolbot.common.account_io export accounts.jsonl
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from dataclasses import dataclass
+
+from lolbot.common.account import Account
+
+BATCH_SIZE = 5000
+FIELDS = ('username', 'password', 'level')
+
+
+@dataclass
+class Progress:
+    """Counts of an import or export, passed to the progress callback after every batch"""
+    read: int = 0
+    added: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    bytes_read: int = 0
+    total_bytes: int = 0
+
+    @property
+    def fraction(self) -> float:
+        return self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+
+    def __str__(self) -> str:
+        return (f"{self.read} read, {self.added} added, {self.duplicates} duplicates, {self.invalid} invalid "
+                f"({self.fraction:.0%})")
+
+
+def file_format(path: str) -> str:
+    """'jsonl' for .jsonl files, 'csv' otherwise"""
+    return 'jsonl' if os.path.splitext(path)[1].lower() == '.jsonl' else 'csv'
+
+
+def parse_csv_row(row: list) -> Account or None:
+    """username,password[,level] row as an Account, None for a malformed row"""
+    if len(row) < 2 or not row[0].strip():
+        return None
+    try:
+        level = int(row[2]) if len(row) > 2 and row[2].strip() else 0
+    except ValueError:
+        return None
+    return Account(row[0].strip(), row[1], level)
+
+
+def parse_json_line(line: str) -> Account or None:
+    try:
+        data = json.loads(line)
+        return Account(str(data['username']), str(data['password']), int(data.get('level', 0)))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def read_accounts(f, fmt: str):
+    """Yields an Account or None for every record of an open text file"""
+    if fmt == 'jsonl':
+        for line in f:
+            if line.strip():
+                yield parse_json_line(line)
+    else:
+        for i, row in enumerate(csv.reader(f)):
+            if i == 0 and row and row[0].strip().lower() == 'username':
+                continue  # header
+            if row and any(field.strip() for field in row):
+                yield parse_csv_row(row)
+
+
+def import_accounts(path: str, manager, batch_size: int = BATCH_SIZE, progress=None) -> Progress:
+    """Adds the accounts of a CSV or JSONL file to the store in batched transactions. The file is streamed, only the
+    current batch and the set of usernames seen so far are kept in memory"""
+    result = Progress(total_bytes=os.path.getsize(path))
+    seen = set()
+    batch = []
+
+    def flush() -> None:
+        added = manager.add_accounts(batch)
+        result.added += added
+        result.duplicates += len(batch) - added
+        batch.clear()
+        if progress:
+            progress(result)
+
+    with open(path, 'rb') as raw:
+        with io.TextIOWrapper(raw, encoding='utf-8-sig', newline='') as f:
+            for account in read_accounts(f, file_format(path)):
+                result.read += 1
+                if account is None:
+                    result.invalid += 1
+                    continue
+                if account.username in seen:
+                    result.duplicates += 1
+                    continue
+                seen.add(account.username)
+                batch.append(account)
+                if len(batch) >= batch_size:
+                    result.bytes_read = raw.tell()
+                    flush()
+        result.bytes_read = result.total_bytes
+        flush()
+    return result
+
+
+def export_accounts(path: str, manager, progress=None) -> Progress:
+    """Writes all accounts to a CSV or JSONL file in insertion order without loading them all at once"""
+    result = Progress()
+    fmt = file_format(path)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        if fmt == 'csv':
+            writer.writerow(FIELDS)
+        for account in manager.iter_accounts():
+            if fmt == 'jsonl':
+                f.write(json.dumps({'username': account.username, 'password': account.password, 'level': account.level}) + '\n')
+            else:
+                writer.writerow((account.username, account.password, account.level))
+            result.read += 1
+            if progress and result.read % BATCH_SIZE == 0:
+                progress(result)
+    if progress:
+        progress(result)
+    return result
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk import or export accounts as CSV (username,password,level) or JSONL")
+    parser.add_argument('action', choices=('import', 'export'))
+    parser.add_argument('path', help="a .csv or .jsonl file")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="accounts per write transaction")
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> int:
+    args = parse_args(argv)
+    from lolbot.common.account import SQLiteAccountManager
+    from lolbot.common.config import Constants
+    Constants.create_dirs()
+    manager = SQLiteAccountManager()
+    if args.action == 'import':
+        import_accounts(args.path, manager, args.batch_size, lambda p: print(f"\r{p}", end='', flush=True))
+    else:
+        export_accounts(args.path, manager, lambda p: print(f"\r{p.read} accounts exported", end='', flush=True))
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
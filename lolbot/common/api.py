@@ -2,14 +2,257 @@
 Handles HTTP Requests for Riot Client and League Client
 """
 
+import asyncio
+import functools
 import logging
+import random
+import threading
 from base64 import b64encode
-from time import sleep
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Callable
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
 
 import lolbot.common.config as config
+from lolbot.common import cassette, lockfile
+from lolbot.common.tracing import sleep, tracer
+
+# Connection pool shared by every Connection in the process
+POOL_CONNECTIONS = 4  # distinct hosts: Riot Client, League Client, Live Client
+POOL_MAXSIZE = 16  # keep-alive sockets per host
+ASYNC_WORKERS = 8
+
+_session = None
+_executor = None
+_pool_lock = threading.Lock()
+
+log = logging.getLogger(__name__)
+
+# Counters for retries and circuit breaker activity, e.g. metrics['retry.gameflow-phase']
+metrics = Counter()
+
+
+def get_session() -> requests.Session:
+    """Returns the process wide session, creating the connection pool on first use"""
+    global _session
+    with _pool_lock:
+        if _session is None:
+            _session = requests.session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+            _session.verify = False
+        return _session
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Returns the process wide executor that runs async requests on the pooled session"""
+    global _executor
+    with _pool_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix='lolbot-http')
+        return _executor
+
+
+def close_pool(protocol: str, host: str, port: str) -> None:
+    """Closes pooled keep-alive sockets to a client address that is no longer in use"""
+    pools = get_session().get_adapter(f'{protocol}://').poolmanager.pools
+    for key in list(pools.keys()):
+        if key.key_scheme == protocol and key.key_host == host and key.key_port == int(port):
+            del pools[key]
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without sending a request while a client's circuit breaker is open"""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Declarative retry policy with exponential backoff and jitter"""
+    name: str
+    attempts: int = 1
+    base_delay: float = 0.25
+    max_delay: float = 4.0
+    jitter: float = 0.25  # +/- fraction of each delay
+    deadline: float = None  # seconds, no retry is started after it passes
+    use_breaker: bool = True  # False keeps trying while a breaker is open, e.g. when waiting for a client to start
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after a failed attempt (0 based)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run(self, func: Callable[[], Any], accept: Callable[[Any], bool] = None) -> Any:
+        """Calls func until accept(result) is True or attempts run out. Returns the last result, re-raises the last error
+        if the final attempt failed. An open circuit breaker is never retried"""
+        start = monotonic()
+        for attempt in range(self.attempts):
+            error = None
+            try:
+                result = func()
+                try:
+                    if accept is None or accept(result):
+                        return result
+                except Exception:
+                    pass  # unexpected response body, treat as not accepted
+            except CircuitOpenError:
+                raise
+            except requests.exceptions.RequestException as e:
+                error = e
+            if attempt == self.attempts - 1:
+                break
+            delay = self.delay(attempt)
+            if self.deadline is not None and monotonic() - start + delay > self.deadline:
+                break
+            metrics[f'retry.{self.name}'] += 1
+            log.debug(f"Retrying {self.name} in {delay:.2f}s. Attempt {attempt + 1}/{self.attempts}. Error: {error or 'response not accepted'}")
+            sleep(delay)
+        if self.attempts > 1:
+            metrics[f'exhausted.{self.name}'] += 1
+        if error is not None:
+            raise error
+        return result
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures so callers fail fast while a client is down, lets one trial
+    request through after reset_timeout. Other callers are rejected until the trial succeeds or fails"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 10.0) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = None  # monotonic start of the trial request while half-open
+        self.lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError if requests should not be sent"""
+        with self.lock:
+            now = monotonic()
+            if self.state == CircuitBreaker.OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    metrics[f'breaker.rejected.{self.name}'] += 1
+                    raise CircuitOpenError(f"Circuit open for {self.name}")
+                self.state = CircuitBreaker.HALF_OPEN
+                self.trial_started = now
+            elif self.state == CircuitBreaker.HALF_OPEN:
+                # a trial that never reported back, e.g. its thread died, is replaced after reset_timeout
+                if self.trial_started is not None and now - self.trial_started < self.reset_timeout:
+                    metrics[f'breaker.rejected.{self.name}'] += 1
+                    raise CircuitOpenError(f"Circuit half-open for {self.name}, trial request in flight")
+                self.trial_started = now
+
+    def record_success(self) -> None:
+        with self.lock:
+            if self.state != CircuitBreaker.CLOSED:
+                log.debug(f"Circuit closed for {self.name}")
+            self.state = CircuitBreaker.CLOSED
+            self.failures = 0
+            self.trial_started = None
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == CircuitBreaker.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != CircuitBreaker.OPEN:
+                    log.warning(f"Circuit opened for {self.name} after {self.failures} failures")
+                    metrics[f'breaker.open.{self.name}'] += 1
+                self.state = CircuitBreaker.OPEN
+                self.opened_at = monotonic()
+                self.trial_started = None
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, failure_threshold: int = 5) -> CircuitBreaker:
+    """Returns the process wide circuit breaker for a client address"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, failure_threshold)
+        return _breakers[name]
+
+
+# Retry policies, requests to endpoints without one are sent once
+NO_RETRY = RetryPolicy('default')
+PHASE_POLICY = RetryPolicy('gameflow-phase', attempts=10, base_delay=0.25, max_delay=2.0, deadline=15)
+LOGIN_POLICY = RetryPolicy('login-session', attempts=30, base_delay=0.5, max_delay=2.0, deadline=30, use_breaker=False)
+RECONNECT_POLICY = RetryPolicy('reconnect', attempts=3, base_delay=1.0, max_delay=4.0)
+HONOR_POLICY = RetryPolicy('honor-ballot', attempts=3, base_delay=1.0, max_delay=4.0)
+PLAY_AGAIN_POLICY = RetryPolicy('play-again', attempts=15, base_delay=0.5, max_delay=2.0, deadline=30)
+GAME_CONNECT_POLICY = RetryPolicy('game-connect', attempts=120, base_delay=0.5, max_delay=2.0, deadline=180, use_breaker=False)
+
+ENDPOINT_POLICIES = {
+    '/lol-gameflow/v1/gameflow-phase': PHASE_POLICY,
+    '/lol-gameflow/v1/reconnect': RECONNECT_POLICY,
+    '/lol-honor-v2/v1/ballot': HONOR_POLICY,
+}
+
+# Seconds a GET response of a read-mostly endpoint is served from cache
+CACHE_TTLS = {
+    '/lol-summoner/v1/current-summoner': 30,
+    '/lol-chat/v1/me': 30,
+    '/lol-lobby-team-builder/champ-select/v1/pickable-champion-ids': 30,
+    '/lol-chat/v1/conversations': 5,
+    '/patcher/v1/products/league_of_legends/state': 2,
+}
+
+
+@dataclass
+class CacheEntry:
+    response: requests.models.Response
+    expires: float
+
+    def is_fresh(self) -> bool:
+        return monotonic() < self.expires
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating the entry"""
+        headers = {}
+        if 'ETag' in self.response.headers:
+            headers['If-None-Match'] = self.response.headers['ETag']
+        if 'Last-Modified' in self.response.headers:
+            headers['If-Modified-Since'] = self.response.headers['Last-Modified']
+        return headers
+
+
+class ResponseCache:
+    """Process wide cache of GET responses, keyed by client address, path and query"""
+
+    def __init__(self) -> None:
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple) -> CacheEntry or None:
+        with self.lock:
+            return self.entries.get(key)
+
+    def put(self, key: tuple, response: requests.models.Response, ttl: float) -> None:
+        with self.lock:
+            self.entries[key] = CacheEntry(response, monotonic() + ttl)
+
+    def invalidate(self, path: str = '') -> None:
+        """Drops entries related to path, or every entry if path is empty"""
+        with self.lock:
+            for key in list(self.entries):
+                if path.startswith(key[2]) or key[2].startswith(path):
+                    del self.entries[key]
+
+
+response_cache = ResponseCache()
 
 
 class Connection:
@@ -19,6 +262,12 @@ class Connection:
     RCU_HOST = '127.0.0.1'
     LCU_USERNAME = 'riot'
     RCU_USERNAME = 'riot'
+    GAME_HOST = '127.0.0.1'
+    GAME_PORT = '2999'
+    GAME_PROTOCOL = 'https'
+    TIMEOUT = (3.05, 10)  # (connect, read) seconds, used when a request does not set its own
+    BREAKER_THRESHOLD = 5  # consecutive failures before requests to a client fail fast
+    GAME_BREAKER_THRESHOLD = 15
 
     def __init__(self) -> None:
         self.client_type = ''
@@ -30,7 +279,11 @@ class Connection:
         self.port = ''
         self.protocol = ''
         self.headers = ''
-        self.session = requests.session()
+        self.breaker_threshold = Connection.BREAKER_THRESHOLD
+        self.extra_headers = {}
+        self.lockfile = None
+        self.lockfile_data = None
+        self.session = get_session()
         self.config = config.ConfigRW()
         self.log = logging.getLogger(__name__)
         logging.getLogger('urllib3').setLevel(logging.INFO)
@@ -39,34 +292,65 @@ class Connection:
     def set_rc_headers(self) -> None:
         """Sets header info for Riot Client"""
         self.log.debug("Initializing Riot Client session")
+        self.client_type = 'rc'
         self.host = Connection.RCU_HOST
         self.client_username = Connection.RCU_USERNAME
-
-        # lockfile
-        with open(config.Constants.RIOT_LOCKFILE, 'r') as lockfile:
-            data = lockfile.read().split(':')
-            self.log.debug(data)
-        self.procname, self.pid, self.port, self.client_password, self.protocol = data
-
-        # headers
-        userpass = b64encode(bytes(f'{self.client_username}:{self.client_password}', 'utf-8')).decode('ascii')
-        self.headers = {'Authorization': f'Basic {userpass}', "Content-Type": "application/json"}
-        self.log.debug(self.headers['Authorization'])
+        self.use_lockfile(config.Constants.RIOT_LOCKFILE, {"Content-Type": "application/json"})
 
     def set_lcu_headers(self, verbose: bool = True) -> None:
         """Sets header info for League Client"""
+        self.client_type = 'lcu'
         self.host = Connection.LCU_HOST
         self.client_username = Connection.LCU_USERNAME
+        self.use_lockfile(self.config.get_data('league_lockfile'))
+
+    def set_game_headers(self) -> None:
+        """Sets connection info for the in-game Live Client Data API"""
+        self.client_type = 'game'
+        self.lockfile = None
+        self.lockfile_data = None
+        self.host = Connection.GAME_HOST
+        self.port = Connection.GAME_PORT
+        self.protocol = Connection.GAME_PROTOCOL
+        self.headers = {}
+        self.breaker_threshold = Connection.GAME_BREAKER_THRESHOLD
 
-        # lockfile
-        with open(self.config.get_data('league_lockfile'), 'r') as lockfile:
-            data = lockfile.read().split(':')
-            self.log.debug(data)
-        self.procname, self.pid, self.port, self.client_password, self.protocol = data
+    def use_lockfile(self, path: str, extra_headers: dict = None) -> None:
+        """Targets the client described by a lockfile. Raises FileNotFoundError if it is not running"""
+        if cassette.is_replaying():  # replayed clients have no lockfile
+            self.lockfile = None
+            self.headers = dict(extra_headers or {})
+            return
+        cache = lockfile.get(path)
+        extra_headers = extra_headers or {}
+        if cache is not self.lockfile or extra_headers != self.extra_headers:
+            self.lockfile = cache
+            self.lockfile_data = None
+            self.extra_headers = extra_headers
+        data = self.lockfile.read()
+        if data is not self.lockfile_data:
+            self._set_credentials(data)
 
-        # headers
+    def refresh(self) -> None:
+        """Retargets the connection if the lockfile changed since the last request, e.g. after a client restart"""
+        if self.lockfile is None:
+            return
+        try:
+            data = self.lockfile.read()
+        except (OSError, ValueError):
+            return  # client closed or lockfile being rewritten, keep the last known credentials
+        if data is not self.lockfile_data:
+            self._set_credentials(data)
+
+    def _set_credentials(self, data: lockfile.LockfileData) -> None:
+        """Sets port and Basic auth header from lockfile data, closing pooled sockets to a stale port"""
+        if self.lockfile_data is not None and self.port != data.port:
+            self.log.debug(f"Client port changed from {self.port} to {data.port}")
+            close_pool(self.protocol, self.host, self.port)
+        self.procname, self.pid, self.port, self.client_password, self.protocol = data.procname, data.pid, data.port, data.password, data.protocol
         userpass = b64encode(bytes(f'{self.client_username}:{self.client_password}', 'utf-8')).decode('ascii')
-        self.headers = {'Authorization': f'Basic {userpass}'}
+        self.headers = {'Authorization': f'Basic {userpass}', **self.extra_headers}
+        self.lockfile_data = data
         self.log.debug(self.headers['Authorization'])
 
     def connect_lcu(self, verbose: bool = True) -> None:
@@ -75,47 +359,104 @@ class Connection:
             self.log.info("Connecting to LCU API")
         else:
             self.log.debug("Connecting to LCU API")
-        self.host = Connection.LCU_HOST
-        self.client_username = Connection.LCU_USERNAME
+        self.set_lcu_headers()
 
-        # lockfile
-        with open(self.config.get_data('league_lockfile'), 'r') as lockfile:
-            data = lockfile.read().split(':')
-            self.log.debug(data)
-        self.procname, self.pid, self.port, self.client_password, self.protocol = data
+        # connect
+        try:
+            r = self.request('get', '/lol-login/v1/session', policy=LOGIN_POLICY,
+                             accept=lambda r: r.json()['state'] == 'SUCCEEDED')
+            succeeded = r.json()['state'] == 'SUCCEEDED'
+        except (requests.exceptions.RequestException, ValueError, KeyError):
+            succeeded = False
+        if not succeeded:
+            raise Exception("Could not connect to League Client")
+        if verbose:
+            self.log.info("Connection Successful")
+        else:
+            self.log.debug("Connection Successful")
+        self.request('post', '/lol-login/v1/delete-rso-on-close')  # ensures self.logout after close
+        sleep(2)
 
-        # headers
-        userpass = b64encode(bytes(f'{self.client_username}:{self.client_password}', 'utf-8')).decode('ascii')
-        self.headers = {'Authorization': f'Basic {userpass}'}
-        self.log.debug(self.headers['Authorization'])
+    def request(self, method: str, path: str, query: str = '', data: dict = None, timeout: float or tuple = None,
+                policy: RetryPolicy = None, accept: Callable[[requests.models.Response], bool] = None, cache: bool = True) -> requests.models.Response:
+        """Handles HTTP requests to Riot Client or League Client server. Requests are retried according to policy
+        (defaults to the endpoint's policy) until accept(response) is True, by default until the status is not 5xx.
+        GET requests to endpoints in CACHE_TTLS are served from the response cache unless cache is False"""
+        policy = policy or ENDPOINT_POLICIES.get(path, NO_RETRY)
+        accept = accept or (lambda r: r.status_code < 500)
+        ttl = CACHE_TTLS.get(path) if cache and method.lower() == 'get' else None
+        if ttl is None:
+            if method.lower() != 'get':
+                response_cache.invalidate(path)
+            return policy.run(lambda: self._send(method, path, query, data, timeout, policy.use_breaker), accept)
 
-        # connect
-        for i in range(30):
-            sleep(1)
-            try:
-                r = self.request('get', '/lol-login/v1/session')
-            except:
-                continue
-            if r.json()['state'] == 'SUCCEEDED':
-                if verbose:
-                    self.log.info("Connection Successful")
-                else:
-                    self.log.debug("Connection Successful")
-                self.request('post', '/lol-login/v1/delete-rso-on-close')  # ensures self.logout after close
-                sleep(2)
-                return
-        raise Exception("Could not connect to League Client")
-
-    def request(self, method: str, path: str, query: str = '', data: dict = None) -> requests.models.Response:
-        """Handles HTTP requests to Riot Client or League Client server"""
+        self.refresh()
+        key = (self.host, self.port, path, query)
+        entry = response_cache.get(key)
+        if entry is not None and entry.is_fresh():
+            metrics['cache.hit'] += 1
+            return entry.response
+        headers = entry.validators() if entry is not None else {}
+        r = policy.run(lambda: self._send(method, path, query, data, timeout, policy.use_breaker, headers), accept)
+        if r.status_code == 304 and entry is not None:
+            metrics['cache.revalidated'] += 1
+            response_cache.put(key, entry.response, ttl)
+            return entry.response
+        metrics['cache.miss'] += 1
+        if r.status_code == 200:
+            response_cache.put(key, r, ttl)
+        return r
+
+    def _send(self, method: str, path: str, query: str, data: dict, timeout: float or tuple, use_breaker: bool,
+              headers: dict = None) -> requests.models.Response:
+        """Sends a single request through the client's circuit breaker"""
+        self.refresh()
         url = f"{self.protocol}://{self.host}:{self.port}{path}{'?'+query if query else ''}"
-        if query:
-            url += '?' + query
+        timeout = Connection.TIMEOUT if timeout is None else timeout
+        headers = {**self.headers, **headers} if headers else self.headers
+        breaker = get_breaker(f"{self.host}:{self.port}", self.breaker_threshold)
+        if use_breaker:
+            breaker.before_call()
 
-        if data:
-            self.log.debug(f"{method.upper()} {url}")
-            r = getattr(self.session, method)(url, verify=False, headers=self.headers, json=data)
+        with tracer.span(f"{method.upper()} {path}", 'http') as span:
+            try:
+                r = self._transmit(method, path, query, url, data, headers, timeout)
+            except requests.exceptions.RequestException:
+                breaker.record_failure()
+                raise
+            span.set(status=r.status_code)
+        if r.status_code >= 500:
+            breaker.record_failure()
         else:
-            self.log.debug(f"{method.upper()} {url} {data}")
-            r = getattr(self.session, method)(url, verify=False, headers=self.headers)
+            breaker.record_success()
+        return r
+
+    def _transmit(self, method: str, path: str, query: str, url: str, data: dict, headers: dict,
+                  timeout: float or tuple) -> requests.models.Response:
+        """Sends a request over the network, or serves it from the active cassette. Records it if a cassette is recording"""
+        if cassette.is_replaying():
+            return cassette.current.play(self.client_type, method, path, query)
+        recorder = cassette.current
+        start = recorder.now() if recorder is not None else 0
+        try:
+            if data:
+                self.log.debug(f"{method.upper()} {url} {data}")
+                r = self.session.request(method.upper(), url, verify=False, headers=headers, json=data, timeout=timeout)
+            else:
+                self.log.debug(f"{method.upper()} {url}")
+                r = self.session.request(method.upper(), url, verify=False, headers=headers, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            if recorder is not None:
+                recorder.record(self.client_type, method, path, query, data, start, error=e)
+            raise
+        if recorder is not None:
+            recorder.record(self.client_type, method, path, query, data, start, response=r)
         return r
+
+    async def request_async(self, method: str, path: str, query: str = '', data: dict = None, timeout: float or tuple = None,
+                            policy: RetryPolicy = None, accept: Callable[[requests.models.Response], bool] = None,
+                            cache: bool = True) -> requests.models.Response:
+        """Awaitable version of request, runs on the shared connection pool so several calls can be in flight at once"""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self.request, method, path, query, data, timeout, policy, accept, cache)
+        return await loop.run_in_executor(get_executor(), call)
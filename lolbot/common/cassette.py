@@ -0,0 +1,243 @@
+"""
+Records HTTP traffic of the bot to cassette files and serves it back for deterministic replays
+"""
+
+import gzip
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+import requests
+
+FORMAT_VERSION = 1
+REDACTED_FIELDS = ('password',)  # request body fields never written to disk
+REPEAT_LIMIT = 100  # times the last response of a request is repeated in fast replay before the cassette counts as exhausted
+
+log = logging.getLogger(__name__)
+
+
+class CassetteExhausted(requests.exceptions.ConnectionError):
+    """Raised in replay once every recorded interaction has been served"""
+
+
+def interaction_key(target: str, method: str, path: str, query: str) -> str:
+    return f"{target} {method.upper()} {path}{'?' + query if query else ''}"
+
+
+class Recorder:
+    """Appends every request and its response to a gzipped JSON lines cassette. Responses identical to the previous
+    response of the same request are stored as a reference to keep polling loops small"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+        self.origin = time.perf_counter()
+        self.last_bodies = {}
+        self.count = 0
+        self.lock = threading.Lock()
+        self._write({'version': FORMAT_VERSION, 'created': time.time()})
+
+    def now(self) -> float:
+        return time.perf_counter() - self.origin
+
+    def record(self, target: str, method: str, path: str, query: str, data: dict or None, start: float,
+               response: requests.models.Response = None, error: Exception = None) -> None:
+        """Stores one interaction. start is the value of now() when the request was sent"""
+        entry = {'t': round(start, 4), 'latency': round(self.now() - start, 4), 'target': target,
+                 'method': method.upper(), 'path': path}
+        if query:
+            entry['query'] = query
+        if data:
+            entry['body'] = {k: '***' if k in REDACTED_FIELDS else v for k, v in data.items()} if isinstance(data, dict) else data
+        if error is not None:
+            entry['error'] = type(error).__name__
+        else:
+            entry['status'] = response.status_code
+            entry['type'] = response.headers.get('Content-Type', '')
+            key = interaction_key(target, method, path, query)
+            text = response.text
+            with self.lock:
+                if self.last_bodies.get(key) == text:
+                    entry['same'] = True
+                else:
+                    self.last_bodies[key] = text
+                    entry['response'] = text
+        with self.lock:
+            self._write(entry)
+            self.count += 1
+
+    def record_event(self, uri: str, event_type: str, data) -> None:
+        """Stores a League Client WebSocket event, replayed as the response of a GET to uri"""
+        entry = {'t': round(self.now(), 4), 'target': 'event', 'method': 'GET', 'path': uri, 'event': event_type,
+                 'response': json.dumps(data)}
+        with self.lock:
+            self._write(entry)
+            self.count += 1
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+    def _write(self, entry: dict) -> None:
+        self.file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+
+class Player:
+    """Serves recorded responses. In fast mode each request gets the next recorded response for the same request,
+    repeating the last one if the bot polls more often than it did while recording. In realtime mode each request
+    gets the latest response recorded at or before the same offset from the start, after the recorded latency"""
+
+    def __init__(self, path: str, realtime: bool = False, speed: float = 1.0) -> None:
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        self.interactions = {}
+        self.positions = Counter()
+        self.repeats = Counter()
+        self.exhausted = False
+        self.misses = Counter()
+        self.last_served = {}
+        self.served = 0
+        self.last_index = -1
+        self.duration = 0.0
+        self.lock = threading.Lock()
+        self._load(path)
+        self.origin = time.perf_counter()
+
+    def _load(self, path: str) -> None:
+        last_bodies = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported cassette version {header.get('version')}")
+            for index, line in enumerate(f):
+                entry = json.loads(line)
+                if entry['target'] == 'event':
+                    entry.update(target='lcu', latency=0, type='application/json',
+                                 status=404 if entry.pop('event') == 'Delete' else 200)
+                key = interaction_key(entry['target'], entry['method'], entry['path'], entry.get('query', ''))
+                if entry.pop('same', False):
+                    entry['response'] = last_bodies.get(key, '')
+                elif 'response' in entry:
+                    last_bodies[key] = entry['response']
+                entry['index'] = index
+                self.interactions.setdefault(key, []).append(entry)
+                self.last_index = index
+                self.duration = max(self.duration, entry['t'])
+
+    def elapsed(self) -> float:
+        """Recording time the replay has reached"""
+        return (time.perf_counter() - self.origin) * self.speed
+
+    def play(self, target: str, method: str, path: str, query: str = '') -> requests.models.Response:
+        """Returns the recorded response of a request, raises the recorded error if the request failed"""
+        key = interaction_key(target, method, path, query)
+        with self.lock:
+            entries = self.interactions.get(key)
+            if not entries:
+                self.misses[key] += 1
+                log.debug(f"Cassette has no response for {key}")
+                return self._response(key, {'status': 404, 'type': 'application/json', 'latency': 0,
+                                             'response': json.dumps({'message': 'Not in cassette'})})
+            entry = self._realtime_entry(entries) if self.realtime else self._next_entry(key, entries)
+            self.served += 1
+            self.last_served[key] = entry
+        if self.realtime:
+            time.sleep(entry['latency'] / self.speed)
+        if 'error' in entry:
+            raise requests.exceptions.ConnectionError(f"Recorded {entry['error']} for {key}")
+        return self._response(key, entry)
+
+    def last_response(self, key: str) -> str or None:
+        """Body of the response last served for key"""
+        with self.lock:
+            entry = self.last_served.get(key)
+            return entry.get('response') if entry is not None else None
+
+    def ran_out(self, key: str) -> bool:
+        """Checks if the replay went past the recorded responses of key, i.e. the recording ended for it"""
+        with self.lock:
+            if self.realtime:
+                return self.exhausted or self.elapsed() > self.duration
+            return self.exhausted or self.repeats[key] > 0
+
+    def has_pending(self, key: str, status: int = 200) -> bool:
+        """Checks if responses with status are still to be served for key"""
+        with self.lock:
+            entries = self.interactions.get(key, [])
+            if self.realtime:
+                elapsed = self.elapsed()
+                return any(e['t'] >= elapsed and e.get('status') == status for e in entries)
+            return any(e.get('status') == status for e in entries[self.positions[key]:])
+
+    def _next_entry(self, key: str, entries: list) -> dict:
+        position = self.positions[key]
+        if position >= len(entries):
+            self.repeats[key] += 1
+            if self.repeats[key] > REPEAT_LIMIT:
+                self.exhausted = True
+                raise CassetteExhausted(f"Cassette {self.path} exhausted at {key}")
+            return entries[-1]
+        self.positions[key] += 1
+        return entries[position]
+
+    def _realtime_entry(self, entries: list) -> dict:
+        elapsed = self.elapsed()
+        if elapsed > self.duration + 1:
+            self.exhausted = True
+            raise CassetteExhausted(f"Cassette {self.path} exhausted")
+        chosen = entries[0]
+        for entry in entries:
+            if entry['t'] > elapsed:
+                break
+            chosen = entry
+        return chosen
+
+    @staticmethod
+    def _response(key: str, entry: dict) -> requests.models.Response:
+        r = requests.models.Response()
+        r.status_code = entry['status']
+        r._content = entry.get('response', '').encode('utf-8')
+        r.encoding = 'utf-8'
+        r.headers['Content-Type'] = entry.get('type', '')
+        r.url = key.split(' ', 2)[2]
+        r.elapsed = timedelta(seconds=entry['latency'])
+        return r
+
+    def close(self) -> None:
+        if self.misses:
+            log.info(f"Cassette misses: {dict(self.misses)}")
+
+
+current = None  # active Recorder or Player
+
+
+def record(path: str) -> Recorder:
+    """Starts recording every request to path"""
+    global current
+    eject()
+    current = Recorder(path)
+    return current
+
+
+def replay(path: str, realtime: bool = False, speed: float = 1.0) -> Player:
+    """Serves every request from the cassette at path instead of the network"""
+    global current
+    eject()
+    current = Player(path, realtime, speed)
+    return current
+
+
+def eject() -> None:
+    """Stops recording or replaying"""
+    global current
+    if current is not None:
+        current.close()
+    current = None
+
+
+def is_replaying() -> bool:
+    return isinstance(current, Player)
@@ -0,0 +1,41 @@
+"""
+Time source for the bot's sleeps and timeouts. Simulators speed it up with set_scale to run sessions faster than real time
+"""
+
+import time
+
+_scale = 1.0  # simulated seconds per real second
+_sleep = None  # replaces real sleeps, e.g. in a replay that moves time forward by itself
+
+
+def set_scale(scale: float) -> None:
+    """Makes sleeps and timeouts scale times shorter, 1.0 runs in real time"""
+    global _scale
+    _scale = scale
+
+
+def set_sleep(function) -> None:
+    """Routes sleep() to function(seconds), None restores real sleeps"""
+    global _sleep
+    _sleep = function
+
+
+def scale() -> float:
+    return _scale
+
+
+def monotonic() -> float:
+    return time.monotonic()
+
+
+def sleep(seconds: float) -> None:
+    """Sleeps for seconds of bot time"""
+    if _sleep is not None:
+        _sleep(seconds)
+    else:
+        time.sleep(seconds / _scale)
+
+
+def deadline(timeout: float) -> float:
+    """monotonic() value timeout seconds of bot time from now"""
+    return time.monotonic() + timeout / _scale
@@ -2,10 +2,19 @@
 Handles creating/writing configurations to json file
 """
 
-import os
+import atexit
+import copy
 import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from types import MappingProxyType
 from typing import Any
 
+MISSING = object()
+
 
 class Constants:
     """Constant settings"""
@@ -14,8 +23,13 @@ class Constants:
     CONFIG_DIR = os.path.join(os.getenv('LOCALAPPDATA'), 'LoLBot')
     BAK_DIR = os.path.join(CONFIG_DIR, 'bak')
     LOG_DIR = os.path.join(CONFIG_DIR, 'logs')
+    TRACE_DIR = os.path.join(CONFIG_DIR, 'traces')
+    CASSETTE_DIR = os.path.join(CONFIG_DIR, 'cassettes')
+    TIMELINE_DIR = os.path.join(CONFIG_DIR, 'timelines')
     CONFIG_PATH = os.path.join(CONFIG_DIR, 'configs.json')
     ACCOUNT_PATH = os.path.join(CONFIG_DIR, 'accounts.json')
+    ACCOUNT_DB_PATH = os.path.join(CONFIG_DIR, 'accounts.db')
+    PATCH_CACHE_PATH = os.path.join(CONFIG_DIR, 'patch.json')
 
     # Pyinstaller dependant paths
     GAME_CFG = 'lolbot/resources/game.cfg'
@@ -43,69 +57,258 @@ class DefaultSettings:
     LEAGUE_DIR = 'C:/Riot Games/League of Legends'
     LOBBY = 880
     MAX_LEVEL = 30
+    ACCOUNT_POLICY = 'in_order'
+    ACCOUNT_COOLDOWN = 0  # minutes before a played account is picked again
+    COORDINATOR = ''  # url of an account coordinator, empty to use the local account store
+    COORDINATOR_KEY = ''
     PATCH = '13.21.1'
     CHAMPS = [21, 18, 22, 67]
     DIALOG = ["mid ples", "plannin on goin mid team", "mid por favor", "bienvenidos, mid", "howdy, mid", "goin mid", "mid"]
     ALLY_MID_TURRET = [0.8760, 0.8846]
     ATTACK_MID_TURRET = [0.8981, 0.8674]
     ATTACK_NEXUS = [0.9628, 0.7852]
+    TRACE = False
+    RECORD = False
+    TIMELINE = False
+
+
+class ConfigStore:
+    """Process wide settings snapshot. Settings are loaded once and served from memory. Writes update the snapshot
+    right away and are persisted after DEBOUNCE seconds, so a burst of changes costs one write. The file is replaced
+    atomically, and keys changed by another process since the last load are kept. Subscribers of on_change are called
+    with the changed keys when another process edits the file"""
+
+    DEBOUNCE = 0.5
+    POLL = 1.0
+    REPLACE_RETRIES = 5
+
+    def __init__(self, path: str = None) -> None:
+        self.log = logging.getLogger(__name__)
+        self.path = path or Constants.CONFIG_PATH
+        self.lock = threading.RLock()
+        self.settings = MappingProxyType({})
+        self.dirty = set()
+        self.stat = None
+        self.timer = None
+        self.watcher = None
+        self.callbacks = []
+        self.load()
+        atexit.register(self.flush)
+
+    def load(self) -> None:
+        """Reads the file into the snapshot, setting defaults if it is empty or invalid"""
+        with self.lock:
+            settings = self._read()
+            if settings is None:
+                self.settings = MappingProxyType({})
+                self.update(default_settings())
+            else:
+                self.settings = MappingProxyType(settings)
+
+    def get(self, key: str) -> Any:
+        """Value of a setting, the default value if it is not set"""
+        value = self.settings.get(key, MISSING)
+        if value is MISSING:
+            value = getattr(DefaultSettings, key.upper(), None)
+        return copy.copy(value) if isinstance(value, list) else value
+
+    def update(self, values: dict) -> None:
+        """Sets several settings at once and schedules a write"""
+        values = {key: coerce(key, value) for key, value in values.items()}
+        with self.lock:
+            settings = dict(self.settings)
+            settings.update(values)
+            self.settings = MappingProxyType(settings)
+            self.dirty.update(values)
+            if self.timer is None:
+                self.timer = threading.Timer(self.DEBOUNCE, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self) -> None:
+        """Writes pending changes now"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty:
+                return
+            settings = dict(self.settings)
+            if self._changed():
+                on_disk = self._read() or {}
+                on_disk.update({key: settings[key] for key in self.dirty})
+                settings = on_disk
+                self.settings = MappingProxyType(settings)
+            try:
+                self._write(settings)
+                self.dirty.clear()
+            except OSError as e:
+                self.log.warning(f"Could not save settings: {e}")
+
+    def on_change(self, callback) -> None:
+        """Calls callback(keys) whenever another process changes settings. Starts watching the file"""
+        with self.lock:
+            self.callbacks.append(callback)
+            if self.watcher is None:
+                self.watcher = threading.Thread(target=self._watch, name='ConfigWatcher', daemon=True)
+                self.watcher.start()
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.POLL)
+            try:
+                self.reload()
+            except Exception as e:
+                self.log.warning(f"Could not reload settings: {e}")
+
+    def reload(self) -> set:
+        """Picks up changes made by another process, returns the changed keys"""
+        with self.lock:
+            if not self._changed():
+                return set()
+            settings = self._read()
+            if settings is None:
+                return set()  # caught mid write or emptied by hand, keep the current snapshot
+            settings.update({key: self.settings[key] for key in self.dirty})
+            changed = {key for key in settings.keys() | self.settings.keys()
+                       if settings.get(key, MISSING) != self.settings.get(key, MISSING)}
+            self.settings = MappingProxyType(settings)
+            callbacks = list(self.callbacks)
+        if changed:
+            self.log.debug(f"Settings changed: {', '.join(sorted(changed))}")
+            for callback in callbacks:
+                try:
+                    callback(changed)
+                except Exception as e:
+                    self.log.warning(f"Settings callback failed: {e}")
+        return changed
+
+    def _stat(self) -> tuple or None:
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _changed(self) -> bool:
+        return self._stat() != self.stat
+
+    def _read(self) -> dict or None:
+        """Settings in the file, None if the file is missing, empty or not valid JSON"""
+        self.stat = self._stat()
+        try:
+            with open(self.path, 'r') as f:
+                settings = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(settings, dict):
+            return None
+        return {key: coerce(key, value) for key, value in settings.items()}
+
+    def _write(self, settings: dict) -> None:
+        """Writes to a temporary file and renames it over the settings file, readers never see a partial file"""
+        directory = os.path.dirname(self.path) or '.'
+        fd, temp = tempfile.mkstemp(prefix='configs.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(settings, f, indent=4)
+            for attempt in range(self.REPLACE_RETRIES):
+                try:
+                    os.replace(temp, self.path)
+                    break
+                except PermissionError:
+                    # Windows refuses to replace a file another process has open, it is only open for a moment
+                    if attempt == self.REPLACE_RETRIES - 1:
+                        raise
+                    time.sleep(0.05)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        self.stat = self._stat()
+
+
+def coerce(key: str, value: Any) -> Any:
+    """Converts a value to the type of its default setting, e.g. '30' to 30 for max_level"""
+    default = getattr(DefaultSettings, key.upper(), None)
+    if default is None or value is None or isinstance(value, type(default)):
+        return value
+    try:
+        if isinstance(default, bool):
+            return value.lower() in ('1', 'true', 'yes') if isinstance(value, str) else bool(value)
+        if isinstance(default, list):
+            return list(value)
+        return type(default)(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def league_paths(league_dir: str) -> dict:
+    """All league paths, they depend on one directory"""
+    return {
+        'league_dir': league_dir,
+        'league_path': os.path.join(league_dir, 'LeagueClient'),
+        'league_config': os.path.join(league_dir, 'Config/game.cfg'),
+        'league_lockfile': os.path.join(league_dir, 'lockfile'),
+    }
+
+
+def default_settings() -> dict:
+    settings = league_paths(DefaultSettings.LEAGUE_DIR)
+    settings['lobby'] = DefaultSettings.LOBBY
+    settings['max_level'] = DefaultSettings.MAX_LEVEL
+    settings['patch'] = DefaultSettings.PATCH
+    settings['champs'] = DefaultSettings.CHAMPS
+    settings['dialog'] = DefaultSettings.DIALOG
+    settings['ally_mid_turret'] = DefaultSettings.ALLY_MID_TURRET
+    settings['attack_mid_turret'] = DefaultSettings.ATTACK_MID_TURRET
+    settings['attack_nexus'] = DefaultSettings.ATTACK_NEXUS
+    return settings
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store() -> ConfigStore:
+    """The settings store shared by every ConfigRW of this process"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ConfigStore()
+    return _store
 
 
 class ConfigRW:
     """Reads/Writes configurations required by bot"""
 
     def __init__(self):
-        self.file = open(Constants.CONFIG_PATH, 'r+')
-        self.settings = {}
-        self.load_or_default()
-        self._json_update()
-
-    def _json_update(self):
-        """Persists settings"""
-        self.file.seek(0)
-        json.dump(self.settings, self.file, indent=4)
-        self.file.truncate()
-
-    def load_or_default(self):
-        """Attempts to load settings, if it fails, sets to default"""
-        try:
-            self.settings = json.load(self.file)
-        except json.decoder.JSONDecodeError:
-            self.set_defaults()
+        self.store = store()
+
+    @property
+    def settings(self) -> MappingProxyType:
+        return self.store.settings
 
     def set_defaults(self):
         """Set and persist the default settings"""
-        self.set_league_dir(DefaultSettings.LEAGUE_DIR)
-        self.settings['lobby'] = DefaultSettings.LOBBY
-        self.settings['max_level'] = DefaultSettings.MAX_LEVEL
-        self.settings['patch'] = DefaultSettings.PATCH
-        self.settings['champs'] = DefaultSettings.CHAMPS
-        self.settings['dialog'] = DefaultSettings.DIALOG
-        self.settings['ally_mid_turret'] = DefaultSettings.ALLY_MID_TURRET
-        self.settings['attack_mid_turret'] = DefaultSettings.ATTACK_MID_TURRET
-        self.settings['attack_nexus'] = DefaultSettings.ATTACK_NEXUS
-        self._json_update()
+        self.store.update(default_settings())
 
     def set_league_dir(self, league_dir: str):
         """Sets all league paths since they depend on one directory"""
-        self.settings['league_dir'] = league_dir
-        self.settings['league_path'] = os.path.join(league_dir, 'LeagueClient')
-        self.settings['league_config'] = os.path.join(league_dir, 'Config/game.cfg')
-        self.settings['league_lockfile'] = os.path.join(league_dir, 'lockfile')
-        self._json_update()
+        self.store.update(league_paths(league_dir))
 
     def set_data(self, key: str, value: Any):
-        """Persists data to JSON"""
-        self.settings[key] = value
-        self._json_update()
+        """Sets a setting, it is persisted shortly after"""
+        self.store.update({key: value})
 
     def get_data(self, key: str):
-        """Retrieves data from JSON. If no value found, adds it from default values"""
-        if key in self.settings.keys():
-            return self.settings[key]
-        else:
-            value = getattr(DefaultSettings, key.upper(), None)
-            self.settings[key] = getattr(DefaultSettings, key.upper(), None)
-            self._json_update()
-            return value
+        """Retrieves a setting. If no value found, returns the default value"""
+        return self.store.get(key)
+
+    def on_change(self, callback) -> None:
+        """Calls callback(keys) when settings are changed by another process"""
+        self.store.on_change(callback)
 
+    def flush(self) -> None:
+        self.store.flush()
@@ -0,0 +1,378 @@
+"""
+Shares one account store between many bot hosts by handing out time-limited account leases over HTTP
+
+Usage: python -m lolbot.common.coordinator --host 0.0.0.0 --port 8420 --key <shared key>
+"""
+
+import argparse
+import ipaddress
+import json
+import logging
+import re
+import secrets
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import unquote
+
+import requests
+
+from lolbot.common.account import Account, AccountGenerator
+
+DEFAULT_PORT = 8420
+LEASE_SECONDS = 300
+KEY_HEADER = 'X-Coordinator-Key'
+
+
+@dataclass
+class Lease:
+    token: str
+    worker: str
+    username: str
+    expires: float
+
+
+class Coordinator:
+    """Owns the account store. A worker leases an account below max level that no other worker holds, keeps the lease
+    alive with heartbeats, and reports the account leveled or releases it. Leases that miss their heartbeats expire and
+    the account becomes available again. Passwords are only sent in lease responses. Listening on a non-loopback
+    address requires a key"""
+
+    PAGE = 100
+
+    def __init__(self, store, host: str = '127.0.0.1', port: int = DEFAULT_PORT, lease_seconds: float = LEASE_SECONDS,
+                 key: str = '') -> None:
+        self.log = logging.getLogger(__name__)
+        if not key and not is_loopback(host):
+            raise ValueError(f"A key is required to serve accounts on {host}")
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.key = key
+        self.lock = threading.Lock()
+        self.leases = {}
+        self.leased = {}
+        self.stopped = threading.Event()
+        self.server = ThreadingHTTPServer((host, port), _handler(self))
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.threads = [threading.Thread(target=self.server.serve_forever, name='Coordinator', daemon=True),
+                        threading.Thread(target=self._reap_loop, name='CoordinatorReaper', daemon=True)]
+
+    def start(self) -> None:
+        for thread in self.threads:
+            thread.start()
+        self.log.info(f"Account coordinator listening on port {self.port}, leases last {self.lease_seconds}s")
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    # Leases
+
+    def acquire(self, worker: str, max_level: int) -> tuple:
+        """Leases the first account below max_level that is not leased. Returns the lease and the account as a
+        dictionary, or (None, None) if every such account is leased"""
+        with self.lock:
+            self.reap()
+            offset = 0
+            while True:
+                page = self.store.query_accounts(below_level=max_level, offset=offset, limit=self.PAGE)
+                for account in page:
+                    if account['username'] not in self.leased:
+                        lease = Lease(secrets.token_urlsafe(16), worker, account['username'], time.monotonic() + self.lease_seconds)
+                        self.leases[lease.token] = lease
+                        self.leased[lease.username] = lease.token
+                        self.log.info(f"Leased {lease.username} to {worker}")
+                        return lease, account
+                if len(page) < self.PAGE:
+                    return None, None
+                offset += self.PAGE
+
+    def heartbeat(self, token: str) -> Lease or None:
+        with self.lock:
+            lease = self.leases.get(token)
+            if lease is None or lease.expires < time.monotonic():
+                return None
+            lease.expires = time.monotonic() + self.lease_seconds
+            return lease
+
+    def release(self, token: str) -> bool:
+        with self.lock:
+            return self._drop(token) is not None
+
+    def leveled(self, token: str, level: int) -> bool:
+        """Sets the level of a leased account and ends the lease, in one step under the coordinator lock"""
+        with self.lock:
+            lease = self.leases.get(token)
+            if lease is None:
+                return False
+            self.store.set_account_as_leveled(Account(lease.username, '', 0), level)
+            self._drop(token)
+            return True
+
+    def reap(self) -> None:
+        """Drops expired leases, the lock must be held"""
+        now = time.monotonic()
+        for lease in [lease for lease in self.leases.values() if lease.expires < now]:
+            self.log.warning(f"Lease of {lease.username} held by {lease.worker} expired")
+            self._drop(lease.token)
+
+    def _drop(self, token: str) -> Lease or None:
+        lease = self.leases.pop(token, None)
+        if lease is not None:
+            self.leased.pop(lease.username, None)
+        return lease
+
+    def _reap_loop(self) -> None:
+        while not self.stopped.wait(self.lease_seconds / 4):
+            with self.lock:
+                self.reap()
+
+    # HTTP
+
+    def routes(self) -> list:
+        return [
+            ('POST', r'/leases', self._post_lease),
+            ('POST', r'/leases/([^/]+)/heartbeat', self._post_heartbeat),
+            ('POST', r'/leases/([^/]+)/leveled', self._post_leveled),
+            ('DELETE', r'/leases/([^/]+)', self._delete_lease),
+            ('GET', r'/leases', self._get_leases),
+            ('GET', r'/accounts', self._get_accounts),
+            ('POST', r'/accounts', self._post_account),
+            ('PUT', r'/accounts/([^/]+)', self._put_account),
+            ('DELETE', r'/accounts/([^/]+)', self._delete_account),
+        ]
+
+    def route(self, method: str, path: str, body: Any) -> tuple:
+        """Dispatches a request to a route handler, returns (status, json value)"""
+        for route_method, pattern, handler in self.routes():
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                return handler(match, body)
+        return 404, {'message': f'No route for {method} {path}'}
+
+    def _lease_json(self, lease: Lease, account: dict = None) -> dict:
+        data = {'token': lease.token, 'username': lease.username, 'expires_in': round(lease.expires - time.monotonic(), 1)}
+        if account is not None:
+            data['account'] = account
+        return data
+
+    def _post_lease(self, m, body: dict) -> tuple:
+        lease, account = self.acquire(str(body.get('worker', '')), int(body['max_level']))
+        if lease is None:
+            return 204, None
+        return 200, self._lease_json(lease, account)
+
+    def _post_heartbeat(self, m, body) -> tuple:
+        lease = self.heartbeat(m[1])
+        return (200, self._lease_json(lease)) if lease else (404, {'message': 'Lease expired'})
+
+    def _post_leveled(self, m, body: dict) -> tuple:
+        return (204, None) if self.leveled(m[1], int(body['level'])) else (404, {'message': 'Lease expired'})
+
+    def _delete_lease(self, m, body) -> tuple:
+        return (204, None) if self.release(m[1]) else (404, {'message': 'Lease expired'})
+
+    def _get_leases(self, m, body) -> tuple:
+        with self.lock:
+            return 200, [{'worker': lease.worker, **self._lease_json(lease)} for lease in self.leases.values()]
+
+    def _get_accounts(self, m, body) -> tuple:
+        return 200, [{'username': a['username'], 'level': a['level']} for a in self.store.get_all_accounts()]
+
+    def _post_account(self, m, body: dict) -> tuple:
+        self.store.add_account(Account(body['username'], body['password'], int(body['level'])))
+        return 204, None
+
+    def _put_account(self, m, body: dict) -> tuple:
+        self.store.edit_account(unquote(m[1]), Account(body['username'], body['password'], int(body['level'])))
+        return 204, None
+
+    def _delete_account(self, m, body) -> tuple:
+        self.store.delete_account(Account(unquote(m[1]), '', 0))
+        return 204, None
+
+
+def is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # a host name, assume it is reachable from other hosts
+
+
+def _handler(coordinator: Coordinator) -> type:
+    """Builds a request handler class bound to a coordinator"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def _dispatch(self, method: str) -> None:
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length)) if length else {}
+                if coordinator.key and not secrets.compare_digest(self.headers.get(KEY_HEADER, ''), coordinator.key):
+                    status, value = 401, {'message': 'Invalid coordinator key'}
+                else:
+                    status, value = coordinator.route(method, self.path.partition('?')[0], body)
+            except (ValueError, KeyError, TypeError) as e:
+                status, value = 400, {'message': f'Bad request: {e}'}
+            data = b'' if value is None else json.dumps(value).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            self._dispatch('GET')
+
+        def do_POST(self) -> None:
+            self._dispatch('POST')
+
+        def do_PUT(self) -> None:
+            self._dispatch('PUT')
+
+        def do_DELETE(self) -> None:
+            self._dispatch('DELETE')
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return Handler
+
+
+class RemoteAccountManager(AccountGenerator):
+    """Account store of a bot host that gets its accounts from a Coordinator. The leased account is kept alive by a
+    heartbeat thread until it is leveled or released"""
+
+    TIMEOUT = 10
+
+    def __init__(self, url: str, worker: str, key: str = '') -> None:
+        self.log = logging.getLogger(__name__)
+        self.url = url.rstrip('/')
+        self.worker = worker
+        self.session = requests.Session()
+        if key:
+            self.session.headers[KEY_HEADER] = key
+        self.lock = threading.Lock()
+        self.lease = None
+        self.account = None
+        self.heartbeat_thread = None
+        self.stopped = threading.Event()
+
+    def request(self, method: str, path: str, data: dict = None) -> requests.Response:
+        r = self.session.request(method, self.url + path, json=data, timeout=self.TIMEOUT)
+        if r.status_code >= 400 and r.status_code != 404:
+            r.raise_for_status()
+        return r
+
+    def get_account(self, max_level: int) -> Account:
+        """Keeps the current lease if it is still held, leases a new account otherwise"""
+        with self.lock:
+            if self.lease is not None and self.account.level < max_level:
+                if self.request('post', f"/leases/{self.lease}/heartbeat").status_code == 200:
+                    return self.account
+                self.log.warning(f"Lease of {self.account.username} expired, leasing a new account")
+            self._forget()
+            r = self.request('post', '/leases', {'worker': self.worker, 'max_level': max_level})
+            if r.status_code != 200:
+                return Account('', '', 0)
+            data = r.json()
+            self.lease = data['token']
+            self.account = Account(**data['account'])
+            self._start_heartbeat(data['expires_in'])
+            return self.account
+
+    def set_account_as_leveled(self, account: Account, max_level: int) -> None:
+        """Reports the leased account leveled, which also ends the lease"""
+        with self.lock:
+            if self.lease is None or account.username != self.account.username:
+                self.log.warning(f"Cannot set {account.username} as leveled, it is not leased")
+                return
+            r = self.request('post', f"/leases/{self.lease}/leveled", {'level': max_level})
+            self._forget()
+            if r.status_code == 404:
+                self.log.warning(f"Lease of {account.username} expired before it was leveled, level not saved")
+
+    def release(self) -> None:
+        """Returns the leased account to the pool"""
+        with self.lock:
+            if self.lease is not None:
+                try:
+                    self.request('delete', f"/leases/{self.lease}")
+                except requests.exceptions.RequestException as e:
+                    self.log.warning(f"Could not release lease: {e}")
+            self._forget()
+
+    def get_all_accounts(self) -> list:
+        """Usernames and levels of all accounts, the coordinator does not list passwords"""
+        return self.request('get', '/accounts').json()
+
+    def add_account(self, account: Account) -> None:
+        self.request('post', '/accounts', {'username': account.username, 'password': account.password, 'level': account.level})
+
+    def edit_account(self, og_uname: str, account: Account) -> None:
+        self.request('put', f"/accounts/{requests.utils.quote(og_uname, safe='')}",
+                     {'username': account.username, 'password': account.password, 'level': account.level})
+
+    def delete_account(self, account: Account) -> None:
+        self.request('delete', f"/accounts/{requests.utils.quote(account.username, safe='')}")
+
+    def _start_heartbeat(self, expires_in: float) -> None:
+        self.stopped = threading.Event()
+        self.heartbeat_thread = threading.Thread(target=self._heartbeat_loop, args=(self.lease, self.stopped, expires_in / 3),
+                                                 name='LeaseHeartbeat', daemon=True)
+        self.heartbeat_thread.start()
+
+    def _heartbeat_loop(self, token: str, stopped: threading.Event, interval: float) -> None:
+        while not stopped.wait(interval):
+            try:
+                if self.request('post', f"/leases/{token}/heartbeat").status_code != 200:
+                    self.log.warning("Account lease expired")
+                    return
+            except requests.exceptions.RequestException as e:
+                self.log.warning(f"Lease heartbeat failed: {e}")
+
+    def _forget(self) -> None:
+        self.stopped.set()
+        self.lease = None
+        self.account = None
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serves the local account store to bots on other hosts")
+    parser.add_argument('--host', default='127.0.0.1', help="interface to listen on, 0.0.0.0 for all")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--lease', type=float, default=LEASE_SECONDS, help="seconds a lease lasts without heartbeats")
+    parser.add_argument('--key', default='', help="shared key workers must send, required unless --host is a loopback address")
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> int:
+    args = parse_args(argv)
+    from lolbot.common.account import SQLiteAccountManager
+    from lolbot.common.config import Constants
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)-7s] %(message)s')
+    Constants.create_dirs()
+    try:
+        coordinator = Coordinator(SQLiteAccountManager(), args.host, args.port, args.lease, args.key)
+    except ValueError as e:
+        logging.error(e)
+        return 2
+    coordinator.start()
+    try:
+        coordinator.stopped.wait()
+    except KeyboardInterrupt:
+        coordinator.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
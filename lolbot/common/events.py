@@ -0,0 +1,208 @@
+"""
+Subscribes to League Client WebSocket events so the bot can react to changes instead of polling
+"""
+
+import json
+import logging
+import queue
+import ssl
+import threading
+from time import monotonic
+from typing import Any, Callable
+
+import websocket
+
+from lolbot.common import api, cassette
+
+
+class EventStream:
+    """Keeps the latest value of League Client endpoints up to date from the LCU WebSocket"""
+
+    GAMEFLOW_PHASE = '/lol-gameflow/v1/gameflow-phase'
+    READY_CHECK = '/lol-matchmaking/v1/ready-check'
+    CHAMP_SELECT = '/lol-champ-select/v1/session'
+    MATCHMAKING_SEARCH = '/lol-matchmaking/v1/search'
+    DEFAULT_URIS = (GAMEFLOW_PHASE, READY_CHECK, CHAMP_SELECT, MATCHMAKING_SEARCH)
+
+    CONNECT_TIMEOUT = 5
+    RECONNECT_DELAY = 2
+
+    # WAMP 1.0 message types used by the League Client
+    SUBSCRIBE = 5
+    EVENT = 8
+
+    def __init__(self, connection: api.Connection, uris: tuple = DEFAULT_URIS, url: str = None) -> None:
+        self.log = logging.getLogger(__name__)
+        self.connection = connection
+        self.uris = uris
+        self.url = url  # overrides the url built from the connection, e.g. a local stand-in server
+        self.values = {}
+        self.versions = {}
+        self.callbacks = {}
+        self.dispatch = queue.SimpleQueue()
+        self.dispatcher = None
+        self.condition = threading.Condition()
+        self.connected = threading.Event()
+        self.stopped = threading.Event()
+        self.ws = None
+        self.open_ws = None  # socket that is open, seeding only marks the stream connected while it still is
+        self.thread = None
+
+    def start(self, timeout: float = CONNECT_TIMEOUT) -> bool:
+        """Starts listening in a background thread. Returns True if the socket connected within timeout"""
+        if cassette.is_replaying():
+            return False  # recorded events are served as responses to polling
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        if not self.connected.wait(timeout):
+            self.log.warning("Could not connect to LCU WebSocket. Falling back to polling")
+            return False
+        return True
+
+    def stop(self) -> None:
+        """Closes the socket and stops the background thread"""
+        self.stopped.set()
+        if self.ws is not None:
+            self.ws.close()
+        if self.thread is not None:
+            self.thread.join(timeout=self.CONNECT_TIMEOUT)
+        self.thread = None
+
+    def is_connected(self) -> bool:
+        """Checks if values are currently being pushed by the League Client"""
+        return self.connected.is_set()
+
+    def subscribe(self, uri: str, callback: Callable[[str, Any], None]) -> None:
+        """Registers a callback that is called with (uri, data) every time the uri changes. Callbacks run one at a
+        time on a dispatcher thread, in the order the changes arrived"""
+        with self.condition:
+            self.callbacks.setdefault(uri, []).append(callback)
+            if self.dispatcher is None:
+                self.dispatcher = threading.Thread(target=self._dispatch, name='EventDispatcher', daemon=True)
+                self.dispatcher.start()
+
+    def get(self, uri: str, default: Any = None) -> Any:
+        """Returns the latest known value of a uri"""
+        with self.condition:
+            return self.values.get(uri, default)
+
+    def wait_for_change(self, uri: str, value: Any, timeout: float) -> Any:
+        """Blocks until the value of uri differs from value, the socket disconnects or timeout passes. Returns the latest value"""
+        deadline = monotonic() + timeout
+        with self.condition:
+            while self.connected.is_set() and self.values.get(uri) == value:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return self.values.get(uri)
+
+    def _run(self) -> None:
+        """Connects and reconnects to the WebSocket until stopped"""
+        while not self.stopped.is_set():
+            try:
+                self.connection.refresh()
+                self.ws = websocket.WebSocketApp(self._url(), header=self.connection.headers or {},
+                                                 on_open=self._on_open, on_message=self._on_message,
+                                                 on_close=self._on_close, on_error=self._on_error)
+                if self.stopped.is_set():
+                    break
+                self.ws.run_forever(sslopt={'cert_reqs': ssl.CERT_NONE, 'check_hostname': False})
+            except Exception as e:
+                self.log.debug(f"LCU WebSocket failure: {e}")
+            self._set_disconnected()
+            self.stopped.wait(self.RECONNECT_DELAY)
+
+    def _url(self) -> str:
+        if self.url is not None:
+            return self.url
+        scheme = 'wss' if self.connection.protocol == 'https' else 'ws'
+        return f"{scheme}://{self.connection.host}:{self.connection.port}/"
+
+    def _on_open(self, ws: websocket.WebSocketApp) -> None:
+        """Subscribes to every uri and seeds their current values on another thread, so events keep being delivered
+        while the seed requests run"""
+        for uri in self.uris:
+            ws.send(json.dumps([self.SUBSCRIBE, self.event_name(uri)]))
+        with self.condition:
+            self.open_ws = ws
+        threading.Thread(target=self._seed, args=(ws,), name='EventSeed', daemon=True).start()
+
+    def _seed(self, ws: websocket.WebSocketApp) -> None:
+        """Requests current values so waiters have a baseline before the first event arrives, then marks the stream
+        connected"""
+        for uri in self.uris:
+            with self.condition:
+                version = self.versions.get(uri, 0)
+            try:
+                r = self.connection.request('get', uri)
+                data = r.json() if r.status_code == 200 else None
+            except Exception as e:
+                self.log.debug(f"Could not seed {uri}: {e}")
+                continue
+            with self.condition:
+                if self.versions.get(uri, 0) == version:  # an event may have arrived during the request
+                    self._publish(uri, data)
+        with self.condition:
+            if self.open_ws is not ws:
+                return  # closed while seeding
+            self.log.debug("Connected to LCU WebSocket")
+            self.connected.set()
+            self.condition.notify_all()
+
+    def _on_message(self, ws: websocket.WebSocketApp, message: str) -> None:
+        try:
+            msg = json.loads(message)
+        except ValueError:
+            return
+        if not isinstance(msg, list) or len(msg) < 3 or msg[0] != self.EVENT:
+            return
+        payload = msg[2]
+        uri = payload.get('uri')
+        if uri not in self.uris:
+            return
+        data = None if payload.get('eventType') == 'Delete' else payload.get('data')
+        if isinstance(cassette.current, cassette.Recorder):
+            cassette.current.record_event(uri, payload.get('eventType'), data)
+        with self.condition:
+            self._publish(uri, data)
+
+    def _publish(self, uri: str, data: Any) -> None:
+        """Stores a new value and wakes waiters. Caller must hold the condition"""
+        changed = self.values.get(uri) != data
+        self.values[uri] = data
+        self.versions[uri] = self.versions.get(uri, 0) + 1
+        self.condition.notify_all()
+        if changed:
+            for callback in self.callbacks.get(uri, []):
+                self.dispatch.put((callback, uri, data))
+
+    def _dispatch(self) -> None:
+        """Runs queued callbacks one after another"""
+        while True:
+            callback, uri, data = self.dispatch.get()
+            try:
+                callback(uri, data)
+            except Exception as e:
+                self.log.warning(f"Event callback for {uri} failed: {e}")
+
+    def _on_close(self, ws: websocket.WebSocketApp, status: int, msg: str) -> None:
+        self._set_disconnected()
+
+    def _on_error(self, ws: websocket.WebSocketApp, error: Exception) -> None:
+        self.log.debug(f"LCU WebSocket error: {error}")
+
+    def _set_disconnected(self) -> None:
+        if self.connected.is_set():
+            self.log.debug("Disconnected from LCU WebSocket")
+        self.connected.clear()
+        with self.condition:
+            self.open_ws = None
+            self.condition.notify_all()
+
+    @staticmethod
+    def event_name(uri: str) -> str:
+        """Converts an endpoint to its WebSocket event name"""
+        return 'OnJsonApiEvent' + uri.replace('/', '_')
@@ -0,0 +1,248 @@
+"""
+Sequences mouse and keyboard input through a pluggable backend
+"""
+
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+from lolbot.common.tracing import sleep, tracer
+
+
+@dataclass(frozen=True, slots=True)
+class Action:
+    """A single input event: move (x, y), click (button), key_down, key_up, press (key) or write (text)"""
+    kind: str
+    arg: Any = None
+
+
+class InputAborted(Exception):
+    """The user took over the mouse, e.g. by moving it into a screen corner to trigger the pyautogui failsafe"""
+
+
+class InputBackend(ABC):
+
+    @abstractmethod
+    def move(self, x: int, y: int) -> None:
+        pass
+
+    @abstractmethod
+    def position(self) -> tuple:
+        pass
+
+    @abstractmethod
+    def click(self, button: str) -> None:
+        pass
+
+    @abstractmethod
+    def key_down(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def key_up(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def press(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def write(self, text: str) -> None:
+        pass
+
+
+class DirectInputBackend(InputBackend):
+    """Sends input to the desktop. Clicks and keys go through the mouse and keyboard modules since pyautogui clicks do
+    not work with league/directx"""
+
+    def __init__(self) -> None:
+        import keyboard
+        import mouse
+        import pyautogui
+        pyautogui.PAUSE = 0  # gaps between events are handled by the executor
+        self.keyboard = keyboard
+        self.mouse = mouse
+        self.pyautogui = pyautogui
+
+    def move(self, x: int, y: int) -> None:
+        try:
+            self.pyautogui.moveTo(x, y)
+        except self.pyautogui.FailSafeException as e:
+            raise InputAborted(str(e)) from e
+
+    def position(self) -> tuple:
+        return tuple(self.pyautogui.position())
+
+    def click(self, button: str) -> None:
+        if button == 'right':
+            self.mouse.right_click()
+        else:
+            self.mouse.click()
+
+    def key_down(self, key: str) -> None:
+        self.keyboard.press(key)
+
+    def key_up(self, key: str) -> None:
+        self.keyboard.release(key)
+
+    def press(self, key: str) -> None:
+        self.keyboard.press_and_release(key)
+
+    def write(self, text: str) -> None:
+        try:
+            self.pyautogui.typewrite(text)
+        except self.pyautogui.FailSafeException as e:
+            raise InputAborted(str(e)) from e
+
+
+class RecordingBackend(InputBackend):
+    """Records input instead of sending it"""
+
+    def __init__(self) -> None:
+        self.events = []
+        self.cursor = (0, 0)
+
+    def move(self, x: int, y: int) -> None:
+        self.cursor = (x, y)
+        self.events.append((time.monotonic(), 'move', (x, y)))
+
+    def position(self) -> tuple:
+        return self.cursor
+
+    def click(self, button: str) -> None:
+        self.events.append((time.monotonic(), 'click', button))
+
+    def key_down(self, key: str) -> None:
+        self.events.append((time.monotonic(), 'key_down', key))
+
+    def key_up(self, key: str) -> None:
+        self.events.append((time.monotonic(), 'key_up', key))
+
+    def press(self, key: str) -> None:
+        self.events.append((time.monotonic(), 'press', key))
+
+    def write(self, text: str) -> None:
+        self.events.append((time.monotonic(), 'write', text))
+
+
+class Pending:
+    """Completion of a submitted action sequence"""
+
+    def __init__(self, actions: list) -> None:
+        self.actions = actions
+        self.done = threading.Event()
+        self.error = None
+
+    def wait(self, timeout: float = None) -> None:
+        """Blocks until the actions ran, raises the error of a failed action or TimeoutError after timeout seconds"""
+        if not self.done.wait(timeout):
+            raise TimeoutError(f"Input did not complete within {timeout}s")
+        if self.error is not None:
+            raise self.error
+
+
+class InputExecutor:
+    """Runs action sequences in order on one worker thread. Moves that are followed by another move or that target the
+    current cursor position are dropped, and only the short gaps input needs to register are waited between events"""
+
+    MOVE_SETTLE = 0.05  # seconds after a move before the next event, verified against the cursor position
+    MOVE_VERIFY_TIMEOUT = 0.1
+    KEY_GAP = 0.03  # seconds between key and click events of one sequence
+    RUN_TIMEOUT = 10  # seconds run() waits for a sequence before giving up
+
+    def __init__(self, backend: InputBackend = None) -> None:
+        self.log = logging.getLogger(__name__)
+        self.backend = backend
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.seconds = Counter()
+
+    def run(self, *actions: Action) -> None:
+        """Runs actions and returns once they are done"""
+        self.submit(*actions).wait(self.RUN_TIMEOUT)
+
+    def submit(self, *actions: Action) -> Pending:
+        """Queues actions behind the ones already submitted and returns without waiting. The desktop backend is
+        created on the first call, so a missing input module raises here instead of in the worker thread"""
+        pending = Pending(self.coalesce(list(actions)))
+        with self.lock:
+            if self.backend is None:
+                self.backend = DirectInputBackend()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._work, name='InputExecutor', daemon=True)
+                self.thread.start()
+        self.queue.put(pending)
+        return pending
+
+    @staticmethod
+    def coalesce(actions: list) -> list:
+        """Drops moves that are immediately followed by another move"""
+        return [a for i, a in enumerate(actions)
+                if not (a.kind == 'move' and i + 1 < len(actions) and actions[i + 1].kind == 'move')]
+
+    def click(self, x: int, y: int, button: str = 'left') -> None:
+        self.run(Action('move', (round(x), round(y))), Action('click', button))
+
+    def press(self, key: str) -> None:
+        self.run(Action('press', key))
+
+    def write(self, text: str) -> None:
+        self.run(Action('write', text))
+
+    def attack_move(self, x: int, y: int, key: str = 'a') -> None:
+        """Holds the attack move key while clicking a position twice"""
+        self.run(Action('move', (round(x), round(y))), Action('key_down', key), Action('click', 'left'), Action('click', 'left'),
+                 Action('key_up', key))
+
+    def stats(self) -> dict:
+        """Count and total seconds of each action kind"""
+        return {kind: (self.counts[kind], self.seconds[kind]) for kind in self.counts}
+
+    def _work(self) -> None:
+        while True:
+            pending = self.queue.get()
+            try:
+                for i, action in enumerate(pending.actions):
+                    if i and pending.actions[i - 1].kind != 'move':  # moves wait for themselves to settle
+                        sleep(self.KEY_GAP)
+                    self._execute(action)
+            except Exception as e:
+                pending.error = e
+            pending.done.set()
+
+    def _execute(self, action: Action) -> None:
+        if action.kind == 'move' and self.backend.position() == action.arg:
+            self.counts['move.skipped'] += 1
+            return
+        start = time.perf_counter()
+        with tracer.span(action.kind, 'input', arg=action.arg):
+            if action.kind == 'move':
+                self._move(*action.arg)
+            else:
+                getattr(self.backend, action.kind)(action.arg)
+        self.counts[action.kind] += 1
+        self.seconds[action.kind] += time.perf_counter() - start
+
+    def _move(self, x: int, y: int) -> None:
+        """Moves the cursor and waits until it is reported at the target, at least MOVE_SETTLE seconds"""
+        self.backend.move(x, y)
+        sleep(self.MOVE_SETTLE)
+        deadline = time.monotonic() + self.MOVE_VERIFY_TIMEOUT
+        while self.backend.position() != (x, y) and time.monotonic() < deadline:
+            sleep(0.01)
+
+
+executor = InputExecutor()
+
+
+def set_backend(backend: InputBackend) -> None:
+    """Replaces the backend of the shared executor, e.g. with a RecordingBackend"""
+    global executor
+    executor = InputExecutor(backend)
@@ -0,0 +1,92 @@
+"""
+Incremental reads of the in-game Live Client Data API
+"""
+
+import json
+
+from lolbot.common import api
+
+
+class Section:
+    """One Live Client Data route. Keeps the last payload and only parses a new one when its bytes change"""
+
+    def __init__(self, connection: api.Connection, path: str) -> None:
+        self.connection = connection
+        self.path = path
+        self.raw = None
+        self.value = None
+        self.status_code = None
+
+    def fetch(self, query: str = '', timeout: float or tuple = None) -> bool:
+        """Requests the route. Returns True if the payload changed, raises requests exceptions on connection errors"""
+        r = self.connection.request('get', self.path, query, timeout=timeout)
+        self.status_code = r.status_code
+        if r.status_code != 200:
+            return False
+        if r.content == self.raw:
+            api.metrics['liveclient.unchanged'] += 1
+            return False
+        self.raw = r.content
+        self.value = json.loads(r.content)
+        return True
+
+
+class LiveClient:
+    """Polls the narrow live client routes instead of allgamedata: game stats, the active player, the bot's team in the
+    player list and game events after the last seen EventID, so each event is handled once"""
+
+    def __init__(self, connection: api.Connection) -> None:
+        self.game_stats = Section(connection, '/liveclientdata/gamestats')
+        self.active_player = Section(connection, '/liveclientdata/activeplayer')
+        self.player_list = Section(connection, '/liveclientdata/playerlist')
+        self.event_data = Section(connection, '/liveclientdata/eventdata')
+        self.team = None
+        self.player = None
+        self.event_cursor = 0
+        self.new_events = []
+        self.status_code = None
+
+    @property
+    def game_time(self) -> float:
+        return self.game_stats.value['gameTime']
+
+    @property
+    def current_player(self) -> dict:
+        return self.active_player.value
+
+    def update(self, timeout: float or tuple = None, events: bool = True) -> bool:
+        """Refreshes every section, stopping at the first bad response. Returns False if a response was not 200.
+        Events are only requested if events is True"""
+        self.new_events = []
+        self.game_stats.fetch(timeout=timeout)
+        if not self._ok(self.game_stats):
+            return False
+        self.active_player.fetch(timeout=timeout)
+        if not self._ok(self.active_player):
+            return False
+        if self.player_list.fetch(f'teamID={self.team}' if self.team else '', timeout):
+            self.player = self._find_player(self.player_list.value)
+            if self.player is not None:
+                self.team = self.player.get('team')
+        if not self._ok(self.player_list):
+            return False
+        if events:
+            if self.event_data.fetch(f'eventID={self.event_cursor}', timeout):
+                self.new_events = [e for e in self.event_data.value.get('Events', []) if e['EventID'] >= self.event_cursor]
+                if self.new_events:
+                    self.event_cursor = max(e['EventID'] for e in self.new_events) + 1
+            if not self._ok(self.event_data):
+                return False
+        self.status_code = 200
+        return True
+
+    def _ok(self, section: Section) -> bool:
+        self.status_code = section.status_code
+        return section.status_code == 200
+
+    def _find_player(self, players: list) -> dict or None:
+        name = self.active_player.value['summonerName'].split('#')[0]
+        for player in players:
+            if player['summonerName'] == name:
+                return player
+        return None
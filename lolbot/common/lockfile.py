@@ -0,0 +1,54 @@
+"""
+Reads Riot Client and League Client lockfiles and caches their credentials
+"""
+
+import os
+import threading
+from dataclasses import dataclass, fields
+
+
+@dataclass(frozen=True)
+class LockfileData:
+    """Contents of a client lockfile"""
+    procname: str
+    pid: str
+    port: str
+    password: str
+    protocol: str
+
+
+class Lockfile:
+    """Caches a parsed lockfile and only re-reads it when the file's mtime, inode or size changes"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.data = None
+        self.stamp = None
+        self.lock = threading.Lock()
+
+    def read(self) -> LockfileData:
+        """Returns the lockfile contents. Raises FileNotFoundError if the client is not running and ValueError if the
+        lockfile is empty or only partly written"""
+        st = os.stat(self.path)
+        stamp = (st.st_mtime_ns, st.st_ino, st.st_size)
+        with self.lock:
+            if stamp != self.stamp:
+                with open(self.path, 'r') as f:
+                    parts = f.read().split(':')
+                if len(parts) != len(fields(LockfileData)):
+                    raise ValueError(f"Incomplete lockfile {self.path}")  # stamp is not updated, the next read retries
+                self.data = LockfileData(*parts)
+                self.stamp = stamp
+            return self.data
+
+
+_lockfiles = {}
+_lockfiles_lock = threading.Lock()
+
+
+def get(path: str) -> Lockfile:
+    """Returns the process wide cache for a lockfile path"""
+    with _lockfiles_lock:
+        if path not in _lockfiles:
+            _lockfiles[path] = Lockfile(path)
+        return _lockfiles[path]
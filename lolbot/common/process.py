@@ -0,0 +1,340 @@
+"""
+Snapshots the process list once per tick so process checks do not each spawn TASKLIST
+"""
+
+import csv
+import io
+import logging
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+
+from lolbot.common.clock import deadline
+from lolbot.common.tracing import sleep
+
+CREATE_NO_WINDOW = 0x08000000
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessInfo:
+    pid: int
+    name: str
+
+
+class ProcessProvider(ABC):
+
+    @abstractmethod
+    def processes(self) -> list:
+        """All running processes as ProcessInfo"""
+
+    def start_time(self, pid: int) -> float or None:
+        """Process creation time as a unix timestamp, None if unknown"""
+        return None
+
+    def close(self, pids: list) -> None:
+        """Asks processes to exit"""
+        taskkill(pids, force=False)
+
+    def kill(self, pids: list) -> None:
+        """Ends processes immediately"""
+        taskkill(pids, force=True)
+
+
+def taskkill(pids: list, force: bool) -> None:
+    """Signals all pids with a single TASKKILL call"""
+    args = ['TASKKILL', '/F'] if force else ['TASKKILL']
+    for pid in pids:
+        args += ['/PID', str(pid)]
+    subprocess.run(args, capture_output=True, creationflags=CREATE_NO_WINDOW)
+
+
+class Toolhelp32Provider(ProcessProvider):
+    """Enumerates processes natively with CreateToolhelp32Snapshot"""
+
+    TH32CS_SNAPPROCESS = 0x2
+    PROCESS_TERMINATE = 0x1
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    FILETIME_EPOCH_OFFSET = 11644473600  # seconds between 1601-01-01 and 1970-01-01
+
+    def __init__(self) -> None:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESSENTRY32W(ctypes.Structure):
+            _fields_ = [('dwSize', wintypes.DWORD), ('cntUsage', wintypes.DWORD),
+                        ('th32ProcessID', wintypes.DWORD), ('th32DefaultHeapID', ctypes.c_size_t),
+                        ('th32ModuleID', wintypes.DWORD), ('cntThreads', wintypes.DWORD),
+                        ('th32ParentProcessID', wintypes.DWORD), ('pcPriClassBase', ctypes.c_long),
+                        ('dwFlags', wintypes.DWORD), ('szExeFile', ctypes.c_wchar * 260)]
+
+        self.ctypes = ctypes
+        self.wintypes = wintypes
+        self.entry_type = PROCESSENTRY32W
+        self.invalid_handle = wintypes.HANDLE(-1).value
+        self.kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        # Full prototypes, without them ctypes truncates 64-bit handles to a C int
+        prototypes = {
+            'CreateToolhelp32Snapshot': ((wintypes.DWORD, wintypes.DWORD), wintypes.HANDLE),
+            'Process32FirstW': ((wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)), wintypes.BOOL),
+            'Process32NextW': ((wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)), wintypes.BOOL),
+            'OpenProcess': ((wintypes.DWORD, wintypes.BOOL, wintypes.DWORD), wintypes.HANDLE),
+            'GetProcessTimes': ((wintypes.HANDLE,) + (ctypes.POINTER(wintypes.FILETIME),) * 4, wintypes.BOOL),
+            'TerminateProcess': ((wintypes.HANDLE, wintypes.UINT), wintypes.BOOL),
+            'CloseHandle': ((wintypes.HANDLE,), wintypes.BOOL),
+        }
+        for name, (argtypes, restype) in prototypes.items():
+            function = getattr(self.kernel32, name)
+            function.argtypes = argtypes
+            function.restype = restype
+
+    def processes(self) -> list:
+        snapshot = self.kernel32.CreateToolhelp32Snapshot(self.TH32CS_SNAPPROCESS, 0)
+        if snapshot is None or snapshot == self.invalid_handle:
+            raise OSError(self.ctypes.get_last_error(), 'CreateToolhelp32Snapshot failed')
+        try:
+            entry = self.entry_type()
+            entry.dwSize = self.ctypes.sizeof(entry)
+            result = []
+            found = self.kernel32.Process32FirstW(snapshot, self.ctypes.byref(entry))
+            while found:
+                result.append(ProcessInfo(entry.th32ProcessID, entry.szExeFile))
+                found = self.kernel32.Process32NextW(snapshot, self.ctypes.byref(entry))
+            return result
+        finally:
+            self.kernel32.CloseHandle(snapshot)
+
+    def start_time(self, pid: int) -> float or None:
+        handle = self.kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None
+        try:
+            times = [self.wintypes.FILETIME() for _ in range(4)]
+            if not self.kernel32.GetProcessTimes(handle, *(self.ctypes.byref(t) for t in times)):
+                return None
+            created = (times[0].dwHighDateTime << 32) | times[0].dwLowDateTime
+            return created / 10_000_000 - self.FILETIME_EPOCH_OFFSET
+        finally:
+            self.kernel32.CloseHandle(handle)
+
+    def kill(self, pids: list) -> None:
+        for pid in pids:
+            handle = self.kernel32.OpenProcess(self.PROCESS_TERMINATE, False, pid)
+            if not handle:
+                continue  # already gone or access denied, the caller sees it in the next snapshot
+            try:
+                self.kernel32.TerminateProcess(handle, 1)
+            finally:
+                self.kernel32.CloseHandle(handle)
+
+
+class TasklistProvider(ProcessProvider):
+    """Parses one TASKLIST call per snapshot. Fallback where ctypes cannot reach kernel32"""
+
+    def processes(self) -> list:
+        output = subprocess.check_output(['TASKLIST', '/FO', 'CSV', '/NH'], creationflags=CREATE_NO_WINDOW)
+        rows = csv.reader(io.StringIO(output.decode(errors='replace')))
+        return [ProcessInfo(int(row[1]), row[0]) for row in rows if len(row) > 1 and row[1].isdigit()]
+
+
+class StaticProvider(ProcessProvider):
+    """Serves a process list that is edited by hand, e.g. by a simulator"""
+
+    def __init__(self, processes: list = None) -> None:
+        self.lock = threading.Lock()
+        self.running = {p.pid: p for p in processes or []}
+        self.started = {}
+        self.next_pid = 1000
+
+    def processes(self) -> list:
+        with self.lock:
+            return list(self.running.values())
+
+    def start_time(self, pid: int) -> float or None:
+        return self.started.get(pid)
+
+    def start(self, name: str) -> int:
+        with self.lock:
+            self.next_pid += 4
+            self.running[self.next_pid] = ProcessInfo(self.next_pid, name)
+            self.started[self.next_pid] = time.time()
+            return self.next_pid
+
+    def close(self, pids: list) -> None:
+        self.kill(pids)
+
+    def kill(self, pids: list) -> None:
+        with self.lock:
+            for pid in pids:
+                self.running.pop(pid, None)
+
+
+class ProcessTable:
+    """Serves process checks from one snapshot of the process list that is at most ttl seconds old. Callbacks
+    registered with on_exit are called with the ProcessInfo of every process that disappeared between snapshots"""
+
+    TTL = 1.0
+
+    def __init__(self, provider: ProcessProvider = None, ttl: float = TTL) -> None:
+        self.log = logging.getLogger(__name__)
+        self.provider = provider
+        self.ttl = ttl
+        self.lock = threading.RLock()
+        self.by_pid = {}
+        self.by_name = {}
+        self.expires = 0.0
+        self.start_times = {}
+        self.exit_callbacks = []
+        self.stats = Counter()
+
+    def refresh(self) -> None:
+        """Takes a new snapshot now"""
+        with self.lock:
+            self._refresh()
+
+    def invalidate(self) -> None:
+        """Makes the next check take a new snapshot, e.g. after starting or killing processes"""
+        self.expires = 0.0
+
+    def running(self, *names: str) -> bool:
+        """Whether a process with any of these executable names is running"""
+        return any(self.pids(name) for name in names)
+
+    def pids(self, name: str) -> list:
+        """PIDs of the running processes with this executable name"""
+        self._current()
+        return list(self.by_name.get(name.lower(), ()))
+
+    def processes(self) -> list:
+        self._current()
+        return list(self.by_pid.values())
+
+    def started(self, pid: int) -> float or None:
+        """Creation time of a running process as a unix timestamp"""
+        self._current()
+        if pid not in self.by_pid:
+            return None
+        if pid not in self.start_times:
+            self.start_times[pid] = self.provider.start_time(pid)
+        return self.start_times[pid]
+
+    def on_exit(self, callback) -> None:
+        self.exit_callbacks.append(callback)
+
+    def _current(self) -> None:
+        if time.monotonic() < self.expires:
+            self.stats['hit'] += 1
+            return
+        with self.lock:
+            if time.monotonic() >= self.expires:
+                self._refresh()
+
+    def _refresh(self) -> None:
+        if self.provider is None:
+            self.provider = default_provider()
+        start = time.perf_counter()
+        processes = self.provider.processes()
+        self.stats['snapshot'] += 1
+        self.stats['snapshot_ms'] += (time.perf_counter() - start) * 1000
+        previous = self.by_pid
+        self.by_pid = {p.pid: p for p in processes}
+        by_name = {}
+        for p in processes:
+            by_name.setdefault(p.name.lower(), []).append(p.pid)
+        self.by_name = by_name
+        self.expires = deadline(self.ttl)
+        exited = [p for pid, p in previous.items() if self.by_pid.get(pid) != p]
+        for p in exited:
+            self.start_times.pop(p.pid, None)
+            for callback in self.exit_callbacks:
+                try:
+                    callback(p)
+                except Exception as e:
+                    self.log.warning(f"Process exit callback failed: {e}")
+
+
+@dataclass(slots=True)
+class Teardown:
+    """Outcome of ProcessTerminator.terminate"""
+    requested: list
+    forced: list
+    remaining: list
+    seconds: float
+
+    def __str__(self) -> str:
+        text = f"Closed {len(self.requested) - len(self.remaining)}/{len(self.requested)} processes in {self.seconds:.1f}s"
+        if self.forced:
+            text += f", forced: {', '.join(p.name for p in self.forced)}"
+        if self.remaining:
+            text += f", still running: {', '.join(p.name for p in self.remaining)}"
+        return text
+
+
+class ProcessTerminator:
+    """Signals all matching processes at once and waits for them to actually exit. Processes that ignore the close
+    request for grace seconds are killed, and the wait ends as soon as the last one is gone"""
+
+    POLL = 0.1
+    TIMEOUT = 10
+
+    def __init__(self, processes: ProcessTable = None) -> None:
+        self.processes = processes
+
+    @property
+    def table(self) -> ProcessTable:
+        return self.processes or table
+
+    def terminate(self, names: list, grace: float = 0, timeout: float = TIMEOUT) -> Teardown:
+        """Closes every process with one of these executable names. With grace 0 processes are killed right away"""
+        start = time.monotonic()
+        wanted = {name.lower() for name in names}
+        self.table.refresh()
+        targets = [p for p in self.table.processes() if p.name.lower() in wanted]
+        if not targets:
+            return Teardown([], [], [], 0)
+        remaining = targets
+        if grace > 0:
+            self.table.provider.close([p.pid for p in targets])
+            remaining = self.wait(targets, grace)
+        forced = remaining
+        if forced:
+            self.table.provider.kill([p.pid for p in forced])
+            remaining = self.wait(forced, timeout)
+        teardown = Teardown(targets, forced, remaining, time.monotonic() - start)
+        if remaining:
+            log.warning(str(teardown))
+        else:
+            log.info(str(teardown))
+        return teardown
+
+    def wait(self, targets: list, timeout: float) -> list:
+        """Waits until the target processes exited, returns the ones still running after timeout seconds"""
+        end = deadline(timeout)
+        while True:
+            self.table.refresh()
+            remaining = [p for p in targets if self.table.by_pid.get(p.pid) == p]
+            if not remaining or time.monotonic() >= end:
+                return remaining
+            sleep(self.POLL)
+
+
+def default_provider() -> ProcessProvider:
+    """Toolhelp32 snapshots on Windows, TASKLIST parsing if ctypes cannot load kernel32"""
+    try:
+        return Toolhelp32Provider()
+    except (ImportError, OSError, AttributeError):
+        return TasklistProvider()
+
+
+table = ProcessTable()
+terminator = ProcessTerminator()
+
+
+def set_provider(provider: ProcessProvider) -> None:
+    """Replaces the provider of the shared table, e.g. with a StaticProvider"""
+    global table
+    table = ProcessTable(provider)
@@ -0,0 +1,178 @@
+"""
+Picks the account the bot levels next according to a configurable policy
+"""
+
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+
+from lolbot.common.account import Account, AccountGenerator
+
+# in_order: first added account first, like the account file
+# closest: account closest to max level first
+# round_robin: rotates through the accounts on every pick
+# lru: least recently played account first
+# weighted: stride scheduling, accounts get picks in proportion to their level + 1
+POLICIES = ('in_order', 'closest', 'round_robin', 'lru', 'weighted')
+
+
+@dataclass(slots=True)
+class Entry:
+    account: Account
+    order: int
+    last_played: float = 0.0
+    last_pick: int = -1
+    pass_value: float = 0.0
+    version: int = 0
+
+
+class AccountScheduler(AccountGenerator):
+    """Serves get_account from a heap of the accounts below max level, O(log n) per pick. Changes made through the
+    scheduler update the heap incrementally. Changes made to the store by another process, like the accounts tab,
+    are picked up by rebuilding the heap on the next pick. Picked accounts cool down for cooldown seconds and are only
+    picked again during their cooldown if no other account is left"""
+
+    def __init__(self, store: AccountGenerator, policy: str = 'in_order', cooldown: float = 0) -> None:
+        self.log = logging.getLogger(__name__)
+        if policy not in POLICIES:
+            self.log.warning(f"Unknown account policy {policy}, using in_order")
+            policy = 'in_order'
+        self.store = store
+        self.policy = policy
+        self.cooldown = cooldown
+        self.entries = {}
+        self.ready = []
+        self.cooling = []
+        self.max_level = None
+        self.store_version = None
+        self.picks = itertools.count()
+        self.orders = itertools.count()
+        self.virtual_time = 0.0
+
+    def get_account(self, max_level: int) -> Account:
+        """Gets the next account where level is < max_level"""
+        if max_level != self.max_level or self._store_changed():
+            self.rebuild(max_level)
+        now = time.time()
+        while self.cooling and self.cooling[0][0] <= now:
+            _, version, username = heapq.heappop(self.cooling)
+            if self._valid(version, username):
+                self._push(self.entries[username])
+        entry = self._pop(self.ready)
+        if entry is None:
+            entry = self._pop(self.cooling)
+            if entry is None:
+                return Account('', '', 0)
+            self.log.debug(f"All accounts are cooling down, picking {entry.account.username}")
+        self._played(entry, now)
+        return Account(entry.account.username, entry.account.password, entry.account.level)
+
+    def rebuild(self, max_level: int) -> None:
+        """Reloads all accounts from the store, keeping the play history of known accounts"""
+        self.max_level = max_level
+        self.store_version = self._store_version()
+        previous = self.entries
+        self.entries = {}
+        for data in self.store.get_all_accounts():
+            account = Account(data['username'], data['password'], data['level'])
+            entry = previous.get(account.username) or Entry(account, next(self.orders))
+            entry.account = account
+            entry.version += 1
+            self.entries[account.username] = entry
+        self.ready = []
+        self.cooling = []
+        now = time.time()
+        for entry in self.entries.values():
+            if entry.account.level >= max_level:
+                continue
+            if entry.last_played + self.cooldown > now:
+                self.cooling.append((entry.last_played + self.cooldown, entry.version, entry.account.username))
+            else:
+                self.ready.append((self._key(entry), entry.version, entry.account.username))
+        heapq.heapify(self.ready)
+        heapq.heapify(self.cooling)
+
+    def get_all_accounts(self) -> list:
+        return self.store.get_all_accounts()
+
+    def add_account(self, account: Account) -> None:
+        self.store.add_account(account)
+        if account.username not in self.entries:
+            entry = Entry(Account(account.username, account.password, account.level), next(self.orders))
+            entry.pass_value = self.virtual_time
+            self.entries[account.username] = entry
+            self._push(entry)
+
+    def edit_account(self, og_uname: str, account: Account) -> None:
+        self.store.edit_account(og_uname, account)
+        entry = self.entries.pop(og_uname, None)
+        if entry is None:
+            return
+        entry.account = Account(account.username, account.password, account.level)
+        entry.version += 1
+        self.entries[account.username] = entry
+        self._push(entry)
+
+    def delete_account(self, account: Account) -> None:
+        self.store.delete_account(account)
+        self.entries.pop(account.username, None)
+
+    def set_account_as_leveled(self, account: Account, max_level: int) -> None:
+        self.store.set_account_as_leveled(account, max_level)
+        entry = self.entries.get(account.username)
+        if entry is not None:
+            entry.account.level = max_level
+            entry.version += 1
+
+    def _key(self, entry: Entry) -> tuple:
+        match self.policy:
+            case 'closest':
+                return self.max_level - entry.account.level, entry.order
+            case 'round_robin':
+                return entry.last_pick, entry.order
+            case 'lru':
+                return entry.last_played, entry.order
+            case 'weighted':
+                return entry.pass_value, entry.order
+            case _:
+                return entry.order,
+
+    def _push(self, entry: Entry) -> None:
+        """Queues an account that is below max level, in the cooling heap while its cooldown runs"""
+        if self.max_level is None or entry.account.level >= self.max_level:
+            return
+        ready_at = entry.last_played + self.cooldown
+        if self.cooldown and ready_at > time.time():
+            heapq.heappush(self.cooling, (ready_at, entry.version, entry.account.username))
+        else:
+            heapq.heappush(self.ready, (self._key(entry), entry.version, entry.account.username))
+
+    def _pop(self, heap: list) -> Entry or None:
+        """Pops the first entry of a heap that is still current, discarding outdated ones"""
+        while heap:
+            _, version, username = heapq.heappop(heap)
+            if self._valid(version, username):
+                return self.entries[username]
+        return None
+
+    def _valid(self, version: int, username: str) -> bool:
+        entry = self.entries.get(username)
+        return entry is not None and entry.version == version and entry.account.level < self.max_level
+
+    def _played(self, entry: Entry, now: float) -> None:
+        entry.last_played = now
+        entry.last_pick = next(self.picks)
+        entry.pass_value += 1 / (max(entry.account.level, 0) + 1)
+        self.virtual_time = entry.pass_value
+        entry.version += 1
+        self._push(entry)
+
+    def _store_version(self) -> int or None:
+        data_version = getattr(self.store, 'data_version', None)
+        return data_version() if data_version else None
+
+    def _store_changed(self) -> bool:
+        version = self._store_version()
+        return version is not None and version != self.store_version
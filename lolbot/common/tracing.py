@@ -0,0 +1,157 @@
+"""
+Opt-in tracing of bot activity, written in Chrome trace event format for Perfetto or chrome://tracing
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable
+
+from lolbot.common import clock
+
+FLUSH_EVENTS = 256  # buffered events before they are appended to the trace file
+
+
+class Span:
+    """A timed section of work, recorded as a complete ('X') trace event when it exits"""
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: dict) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0
+
+    def set(self, **args) -> None:
+        """Adds arguments shown with the span in the trace viewer"""
+        self.args.update(args)
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.add(self.name, self.cat, self.start, time.perf_counter_ns(), self.args)
+
+
+class NullSpan:
+    """Span used while tracing is disabled"""
+
+    def set(self, **args) -> None:
+        pass
+
+    def __enter__(self) -> 'NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """Collects spans from every thread and appends them to a JSON array trace file. The closing bracket is optional
+    in the trace event format, so the file stays loadable if the bot process is terminated"""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.path = None
+        self.file = None
+        self.buffer = []
+        self.written = 0
+        self.threads = set()
+        self.pid = os.getpid()
+        self.origin = time.perf_counter_ns()
+        self.lock = threading.Lock()
+
+    def start(self, path: str) -> None:
+        """Starts recording spans to path"""
+        with self.lock:
+            self.path = path
+            self.file = open(path, 'w')
+            self.file.write('[\n')
+            self.buffer = []
+            self.written = 0
+            self.threads = set()
+            self.pid = os.getpid()
+            self.enabled = True
+
+    def stop(self) -> None:
+        """Writes remaining spans and closes the trace file"""
+        with self.lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+            self._flush()
+            self.file.write('\n]\n')
+            self.file.close()
+            self.file = None
+
+    def flush(self) -> None:
+        """Appends buffered spans to the trace file"""
+        with self.lock:
+            if self.enabled:
+                self._flush()
+
+    def span(self, name: str, cat: str = 'bot', **args) -> Span or NullSpan:
+        """Returns a context manager that records the time spent inside it"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, cat, args)
+
+    def add(self, name: str, cat: str, start_ns: int, end_ns: int, args: dict) -> None:
+        """Records a finished span"""
+        thread = threading.current_thread()
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'pid': self.pid, 'tid': thread.ident,
+                 'ts': (start_ns - self.origin) / 1000, 'dur': (end_ns - start_ns) / 1000}
+        if args:
+            event['args'] = {k: v if isinstance(v, (int, float, bool)) or v is None else str(v) for k, v in args.items()}
+        with self.lock:
+            if not self.enabled:
+                return
+            if thread.ident not in self.threads:
+                self.threads.add(thread.ident)
+                self.buffer.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': thread.ident, 'args': {'name': thread.name}})
+            self.buffer.append(event)
+            if len(self.buffer) >= FLUSH_EVENTS:
+                self._flush()
+
+    def _flush(self) -> None:
+        """Appends buffered events, caller must hold the lock"""
+        for event in self.buffer:
+            self.file.write((',\n' if self.written else '') + json.dumps(event))
+            self.written += 1
+        self.buffer = []
+        self.file.flush()
+
+
+tracer = Tracer()
+
+
+def traced(name: str = None, cat: str = 'bot') -> Callable:
+    """Decorator that records each call of a function as a span"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def sleep(seconds: float) -> None:
+    """clock.sleep that shows up as a 'sleep' span when tracing is enabled"""
+    if not tracer.enabled:
+        clock.sleep(seconds)
+        return
+    with tracer.span('sleep', 'sleep', seconds=seconds):
+        clock.sleep(seconds)
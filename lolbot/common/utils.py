@@ -3,17 +3,15 @@ Utility functions that interact with game windows and processes
 """
 
 import logging
-import subprocess
 import os
 import sys
-from time import sleep
+from typing import TYPE_CHECKING
 
-import keyboard
-import mouse
-import pyautogui
-from win32gui import FindWindow, GetWindowRect
+from lolbot.common import inputs, process, window
+from lolbot.common.tracing import sleep, traced
 
-from lolbot.bot.game import Game
+if TYPE_CHECKING:
+    from lolbot.bot.game import Game
 
 log = logging.getLogger(__name__)
 
@@ -25,14 +23,11 @@ LEAGUE_GAME_CLIENT_WINNAME = "League of Legends (TM) Client"
 LEAGUE_PROCESS_NAMES = ["LeagueClient.exe", "League of Legends.exe"]
 RIOT_CLIENT_PROCESS_NAMES = ["RiotClientUx.exe", "RiotClientServices.exe", "Riot Client.exe"]
 
-# COMMANDS
-KILL_CRASH_HANDLER = 'TASKKILL /F /IM LeagueCrashHandler64.exe'
-KILL_LEAGUE_CLIENT = 'TASKKILL /F /IM LeagueClient.exe'
-KILL_LEAGUE = 'TASKKILL /F /IM "League of Legends.exe"'
-KILL_RIOT_CLIENT = 'TASKKILL /F /IM RiotClientUx.exe'
-KILL_HANDLER_WMIC = 'wmic process where "name=\'LeagueCrashHandler64.exe\'" delete'
-KILL_LEAGUE_WMIC = 'wmic process where "name=\'LeagueClient.exe\'" delete'
-Kill_RIOT_CLIENT_SERVICES = 'TASKKILL /F /IM RiotClientServices.exe'
+CRASH_HANDLER_PROCESS_NAME = "LeagueCrashHandler64.exe"
+GAME_PROCESS_NAME = "League of Legends.exe"
+
+# Seconds the riot client gets to close before it is killed
+RIOT_CLIENT_CLOSE_GRACE = 2
 
 
 class WindowNotFound(Exception):
@@ -41,51 +36,31 @@ class WindowNotFound(Exception):
 
 def is_league_running() -> bool:
     """Checks if league processes exists"""
-    res = subprocess.check_output(["TASKLIST"], creationflags=0x08000000)
-    output = str(res)
-    for name in LEAGUE_PROCESS_NAMES:
-        if name in output:
-            return True
-    return False
+    return process.table.running(*LEAGUE_PROCESS_NAMES)
 
 
 def is_rc_running() -> bool:
     """Checks if riot client process exists"""
-    res = subprocess.check_output(["TASKLIST"], creationflags=0x08000000)
-    output = str(res)
-    for name in RIOT_CLIENT_PROCESS_NAMES:
-        if name in output:
-            return True
-    return False
+    return process.table.running(*RIOT_CLIENT_PROCESS_NAMES)
 
 
 def is_game_running() -> bool:
     """Checks if game process exists"""
-    res = subprocess.check_output(["TASKLIST"], creationflags=0x08000000)
-    output = str(res)
-    if "League of Legends.exe" in output:
-        return True
-    return False
+    return process.table.running(GAME_PROCESS_NAME)
 
 
 def close_all_processes() -> None:
     """Closes all league related processes"""
     log.info("Terminating league related processes")
-    os.system(KILL_CRASH_HANDLER)
-    os.system(KILL_LEAGUE)
-    os.system(KILL_LEAGUE_CLIENT)
-    os.system(KILL_RIOT_CLIENT)
-    os.system(Kill_RIOT_CLIENT_SERVICES)
-    os.system(KILL_HANDLER_WMIC)
-    os.system(KILL_LEAGUE_WMIC)
-    sleep(5)
+    process.terminator.terminate([CRASH_HANDLER_PROCESS_NAME] + LEAGUE_PROCESS_NAMES + RIOT_CLIENT_PROCESS_NAMES)
+    window.registry.invalidate()
 
 
 def close_game() -> None:
     """Closes the League of Legends game process"""
     log.info("Terminating game instance")
-    os.system(KILL_LEAGUE)
-    sleep(15)
+    process.terminator.terminate([GAME_PROCESS_NAME])
+    window.registry.invalidate(LEAGUE_GAME_CLIENT_WINNAME)
 
 
 def resource_path(relative_path: str) -> str:
@@ -96,130 +71,101 @@ def resource_path(relative_path: str) -> str:
 
 
 def close_riot_client() -> None:
-    """Closes the League of Legends game process"""
+    """Closes the riot client"""
     log.info("Closing riot client")
     try:
-        os.system(KILL_RIOT_CLIENT)
-    except:
-        log.warning("Could not kill riot client")
-    sleep(2)
+        process.terminator.terminate(["RiotClientUx.exe"], grace=RIOT_CLIENT_CLOSE_GRACE)
+    except Exception as e:
+        log.warning(f"Could not kill riot client: {e}")
 
 
 def size(window_title: str = LEAGUE_CLIENT_WINNAME) -> tuple:
     """Gets the size of an open window"""
-    window_handle = FindWindow(None, window_title)
-    if window_handle == 0:
+    win = window.registry.get(window_title)
+    if not win.open:
         raise WindowNotFound
-    window_rect = GetWindowRect(window_handle)
-    return window_rect[0], window_rect[1], window_rect[2], window_rect[3]
+    return win.rect
 
 
 def exists(window_title: str) -> bool:
     """Checks if a window exists"""
-    if FindWindow(None, window_title) == 0:
-        return False
-    return True
-
-
+    return window.registry.exists(window_title)
+
+
+def find_window(ratio: tuple, expected_window_name: str) -> window.Window or None:
+    """Gets the window to click in, defaulting to the game and then the league client"""
+    if expected_window_name != '':
+        win = window.registry.get(expected_window_name)
+        if not win.open:
+            log.debug(f"Cannot click on {ratio}, {expected_window_name} does not exist")
+            raise WindowNotFound
+        return win
+    for name in (LEAGUE_GAME_CLIENT_WINNAME, LEAGUE_CLIENT_WINNAME):
+        win = window.registry.get(name)
+        if win.open:
+            return win
+    log.debug(f"Cannot click on {ratio}, no available window")
+    return None
+
+
+@traced(cat='input')
 def click(ratio: tuple, expected_window_name: str = '', wait: int or float = 1) -> None:
     """Makes a click in an open window"""
-    if expected_window_name != '' and not exists(expected_window_name):
-        log.debug(f"Cannot click on {ratio}, {expected_window_name} does not exist")
-        raise WindowNotFound
-    elif expected_window_name != '':
-        window_name = expected_window_name
-    else:  # check if game is running and default to game otherwise set window to league client
-        if exists(LEAGUE_GAME_CLIENT_WINNAME):
-            window_name = LEAGUE_GAME_CLIENT_WINNAME
-        elif exists(LEAGUE_CLIENT_WINNAME):
-            window_name = LEAGUE_CLIENT_WINNAME
-        else:
-            log.debug(f"Cannot click on {ratio}, no available window")
-            return
+    win = find_window(ratio, expected_window_name)
+    if win is None:
+        return
     log.debug(f"Clicking on ratio {ratio}: {ratio[0]}, {ratio[1]}. Waiting: {wait}")
-    x, y, l, h = size(window_name)
-    updated_x = ((l - x) * ratio[0]) + x
-    updated_y = ((h - y) * ratio[1]) + y
-    pyautogui.moveTo(updated_x, updated_y)
-    sleep(.5)
-    mouse.click()  # pyautogui clicks do not work with league/directx
+    inputs.executor.click(*win.to_pixels(ratio))
     sleep(wait)
 
 
+@traced(cat='input')
 def right_click(ratio: tuple, expected_window: str = '', wait: int or float = 1) -> None:
     """Makes a right click in an open window"""
-    if expected_window != '' and not exists(expected_window):
-        log.debug(f"Cannot click on {ratio}, {expected_window} does not exist")
-        raise WindowNotFound
-    elif expected_window != '':
-        window_name = expected_window
-    else:  # check if game is running and default to game otherwise set window to league client
-        if exists(LEAGUE_GAME_CLIENT_WINNAME):
-            window_name = LEAGUE_GAME_CLIENT_WINNAME
-        elif exists(LEAGUE_CLIENT_WINNAME):
-            window_name = LEAGUE_CLIENT_WINNAME
-        else:
-            log.debug(f"Cannot click on {ratio}, no available window")
-            return
+    win = find_window(ratio, expected_window)
+    if win is None:
+        return
     log.debug(f"Clicking on ratio {ratio}: {ratio[0]}, {ratio[1]}. Waiting: {wait}")
-    x, y, l, h = size(window_name)
-    updated_x = ((l - x) * ratio[0]) + x
-    updated_y = ((h - y) * ratio[1]) + y
-    pyautogui.moveTo(updated_x, updated_y)
-    sleep(.5)
-    mouse.right_click()  # pyautogui clicks do not work with league/directx
+    inputs.executor.click(*win.to_pixels(ratio), 'right')
     sleep(wait)
 
 
-def attack_move_click(ratio: tuple, wait: int or float = 1, obj: Game = None) -> None:
+@traced(cat='input')
+def attack_move_click(ratio: tuple, wait: int or float = 1, obj: 'Game' = None) -> None:
     """Attack move clicks in an open League of Legends game window"""
-    if not exists(LEAGUE_GAME_CLIENT_WINNAME):
+    win = window.registry.get(LEAGUE_GAME_CLIENT_WINNAME)
+    if not win.open:
         log.debug("Cannot attack move when game is not running")
         raise WindowNotFound
     log.debug(f"Attack Moving on ratio {ratio}: {ratio[0]}, {ratio[1]}. Waiting: {wait}")
-    x, y, l, h = size(LEAGUE_GAME_CLIENT_WINNAME)
-    updated_x = ((l - x) * ratio[0]) + x
-    updated_y = ((h - y) * ratio[1]) + y
-    pyautogui.moveTo(updated_x, updated_y)
-    sleep(.5)
-    keyboard.press('a')
-    sleep(.1)
-    mouse.click()
-    sleep(.1)
-    mouse.click()
-    keyboard.release('a')
+    inputs.executor.attack_move(*win.to_pixels(ratio))
     if obj:
-        while wait >= 0.1:
-            if obj.is_dead:
-                return
-            sleep(.1)
-            wait -= .1
-            if obj.hp_change > 0.1 or obj.current_hp_ratio < 0.3:
-                log.debug(f"Interrupted attack, lost {obj.hp_change}%HP Skipped: {wait} seconds")
-                obj.hp_change = 0
-                return
-        sleep(wait)
+        snapshot = obj.channel.wait(obj.attack_interrupted(obj.snapshot.tick), wait)
+        if snapshot is not None and not snapshot.is_dead:
+            log.debug(f"Interrupted attack, lost {snapshot.hp_change}%HP")
     else:
         sleep(wait)
 
 
+@traced(cat='input')
 def press(key: str, expected_window: str = '', wait: int or float = 1) -> None:
     """Sends a keypress to a window"""
     if expected_window != '' and not exists(expected_window):
         log.debug(f"Cannot press {key}, {expected_window} does not exist")
         raise WindowNotFound
     log.debug(f"Pressing key: {key}. Waiting: {wait}")
-    keyboard.press_and_release(key)
+    inputs.executor.press(key)
     sleep(wait)
 
 
+@traced(cat='input')
 def write(keys: str, expected_window: str = '', wait: int or float = 1) -> None:
     """Sends a string of key presses to a window"""
     if expected_window != '' and not exists(expected_window):
         log.debug(f"Cannot type {keys}, {expected_window} does not exist")
         raise WindowNotFound
     log.debug(f"Typewriting {keys}. Waiting: {wait}")
-    pyautogui.typewrite(keys)
+    inputs.executor.write(keys)
     sleep(wait)
 
 
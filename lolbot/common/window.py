@@ -0,0 +1,120 @@
+"""
+Caches window handles and geometry so input helpers do not look windows up on every call
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+
+from lolbot.common.clock import deadline
+
+
+class WindowBackend(ABC):
+
+    @abstractmethod
+    def find(self, title: str) -> int:
+        """Handle of the top level window with this title, 0 if there is none"""
+
+    @abstractmethod
+    def rect(self, handle: int) -> tuple:
+        """Screen rectangle (left, top, right, bottom) of a window"""
+
+    @abstractmethod
+    def is_valid(self, handle: int) -> bool:
+        """Whether a handle still identifies an existing window"""
+
+
+class Win32WindowBackend(WindowBackend):
+    """Looks windows up with win32gui"""
+
+    def __init__(self) -> None:
+        import win32gui
+        self.win32gui = win32gui
+
+    def find(self, title: str) -> int:
+        return self.win32gui.FindWindow(None, title)
+
+    def rect(self, handle: int) -> tuple:
+        return tuple(self.win32gui.GetWindowRect(handle))
+
+    def is_valid(self, handle: int) -> bool:
+        return bool(self.win32gui.IsWindow(handle))
+
+
+@dataclass(frozen=True, slots=True)
+class Window:
+    """A window handle with its rectangle and the transform from window ratios to screen pixels"""
+    title: str
+    handle: int
+    rect: tuple
+    expires: float
+
+    @property
+    def open(self) -> bool:
+        return self.handle != 0
+
+    def to_pixels(self, ratio: tuple) -> tuple:
+        """Screen coordinates of a (x, y) position given as fractions of the window size"""
+        left, top, right, bottom = self.rect
+        return (right - left) * ratio[0] + left, (bottom - top) * ratio[1] + top
+
+
+class WindowRegistry:
+    """Remembers window handles and rectangles for ttl seconds. An expired entry is refreshed with one rectangle
+    lookup while its handle is still valid, which also picks up moves and resizes. A full search by title happens only
+    once the window was destroyed or invalidate() is called"""
+
+    TTL = 0.5
+
+    def __init__(self, backend: WindowBackend = None, ttl: float = TTL) -> None:
+        self.log = logging.getLogger(__name__)
+        self.backend = backend
+        self.ttl = ttl
+        self.windows = {}
+        self.lock = threading.Lock()
+        self.lookups = Counter()
+
+    def get(self, title: str) -> Window:
+        """Cached window with this title. The returned window has handle 0 if it is not open"""
+        window = self.windows.get(title)
+        if window is not None and time.monotonic() < window.expires:
+            self.lookups['hit'] += 1
+            return window
+        with self.lock:
+            window = self._refresh(title, window)
+            self.windows[title] = window
+        return window
+
+    def exists(self, title: str) -> bool:
+        return self.get(title).open
+
+    def invalidate(self, title: str = None) -> None:
+        """Forgets one window or all windows, e.g. after a window was closed on purpose"""
+        with self.lock:
+            if title is None:
+                self.windows.clear()
+            else:
+                self.windows.pop(title, None)
+
+    def _refresh(self, title: str, window: Window or None) -> Window:
+        if self.backend is None:
+            self.backend = Win32WindowBackend()
+        if window is not None and window.open and self.backend.is_valid(window.handle):
+            self.lookups['rect'] += 1
+            return Window(title, window.handle, self.backend.rect(window.handle), deadline(self.ttl))
+        self.lookups['find'] += 1
+        handle = self.backend.find(title)
+        rect = self.backend.rect(handle) if handle else (0, 0, 0, 0)
+        return Window(title, handle, rect, deadline(self.ttl))
+
+
+registry = WindowRegistry()
+
+
+def set_backend(backend: WindowBackend) -> None:
+    """Replaces the backend of the shared registry, e.g. with a simulated desktop"""
+    global registry
+    registry = WindowRegistry(backend)
@@ -0,0 +1,194 @@
+"""
+Drives the real Client through simulated games and reports loop overhead
+
+Usage: python -m lolbot.sim.benchmark --games 3 --speed 30
+"""
+
+import argparse
+import glob
+import json
+import os
+import queue
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from lolbot.sim.desktop import SimulatedDesktop
+from lolbot.sim.simulator import LeagueSimulator, Timeline
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+START_LEVEL = 1
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark against a simulated League Client")
+    parser.add_argument('--games', type=int, default=3, help="games to play before the account counts as leveled")
+    parser.add_argument('--speed', type=float, default=30.0, help="simulated seconds per real second")
+    parser.add_argument('--queue', type=float, default=Timeline.queue, help="seconds in matchmaking")
+    parser.add_argument('--champ-select', type=float, default=Timeline.champ_select, help="seconds in champ select")
+    parser.add_argument('--game-length', type=float, default=Timeline.game_length, help="in-game seconds per game")
+    parser.add_argument('--mid-turret', type=float, default=Timeline.mid_turret, help="game time the mid turret falls")
+    parser.add_argument('--dir', default=None, help="working directory for configs, lockfiles and traces")
+    parser.add_argument('--record', default=None, help="also record the session to this cassette path")
+    parser.add_argument('--timelines', action='store_true', help="also record game timelines to the timelines folder")
+    parser.add_argument('--coordinator', action='store_true', help="lease the account from a local account coordinator")
+    return parser.parse_args(argv)
+
+
+def prepare_environment(work_dir: str) -> None:
+    """Points LOCALAPPDATA at work_dir, must run before lolbot.common.config is imported"""
+    os.environ['LOCALAPPDATA'] = os.path.join(work_dir, 'AppData')
+    os.makedirs(os.environ['LOCALAPPDATA'], exist_ok=True)
+    os.chdir(REPO_DIR)
+
+
+def summarize_trace(path: str) -> dict:
+    """Totals sleep, wait and http spans of a trace file, in seconds"""
+    with open(path) as f:
+        events = json.load(f)
+    totals = defaultdict(float)
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        if event['cat'] == 'sleep':
+            totals['sleep'] += event['dur'] / 1e6
+            totals['sleep_requested'] += event.get('args', {}).get('seconds', 0)
+        elif event['cat'] == 'wait':
+            totals['wait'] += event['dur'] / 1e6
+        elif event['cat'] == 'http':
+            totals['http'] += event['dur'] / 1e6
+            totals['http_calls'] += 1
+    return totals
+
+
+def configure(work_dir: str, max_level: int) -> 'ConfigRW':
+    """Creates bot configs in work_dir for a simulated League install"""
+    from lolbot.common.config import Constants, ConfigRW
+    Constants.create_dirs()
+    league_dir = os.path.join(work_dir, 'Riot Games', 'League of Legends')
+    os.makedirs(os.path.join(league_dir, 'Config'), exist_ok=True)
+    config = ConfigRW()
+    config.set_league_dir(league_dir)
+    config.set_data('max_level', max_level)
+    config.set_data('trace', True)
+    return config
+
+
+def run_client(speed: float, username: str, level: int) -> dict:
+    """Levels one account with the real Client, sleeps and waits shortened by speed. Returns wall, CPU and trace totals"""
+    from lolbot.common import clock
+    from lolbot.common.account import Account, SQLiteAccountManager
+    from lolbot.common.config import Constants
+    from lolbot.bot.client import Client
+
+    class BenchmarkClient(Client):
+        """Client that levels a single account and returns"""
+
+        def account_loop(self) -> None:
+            self.account = self.account_manager.get_account(self.max_level)
+            self.launcher.launch_league(self.account.username, self.account.password)
+            self.leveling_loop()
+            self.launcher.verify_account()
+
+    SQLiteAccountManager().add_account(Account(username, 'password', level))
+    clock.set_scale(speed)
+    wall, cpu = time.perf_counter(), time.process_time()
+    error = None
+    try:
+        BenchmarkClient(queue.SimpleQueue())
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        clock.set_scale(1.0)
+    traces = sorted(glob.glob(os.path.join(Constants.TRACE_DIR, '*.json')), key=os.path.getmtime)
+    totals = summarize_trace(traces[-1]) if traces else defaultdict(float)
+    totals.update(wall=wall, cpu=cpu, error=error)
+    return totals
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Plays args.games simulated games with the real Client and returns the measurements"""
+    work_dir = args.dir or tempfile.mkdtemp(prefix='lolbot-sim-')
+    record = os.path.abspath(args.record) if args.record else None
+    prepare_environment(work_dir)
+    timeline = Timeline(queue=args.queue, champ_select=args.champ_select, game_length=args.game_length,
+                        mid_turret=args.mid_turret, speed=args.speed)
+    config = configure(work_dir, START_LEVEL + args.games)
+    config.set_data('timeline', args.timelines)
+
+    from lolbot.common import api, cassette, process, window
+    from lolbot.common.config import Constants
+    sim = LeagueSimulator(timeline, Constants.RIOT_LOCKFILE, config.get_data('league_lockfile'), level=START_LEVEL)
+    desktop = SimulatedDesktop(sim)
+    desktop.install()
+    api.Connection.GAME_PORT = str(sim.live_port)
+    api.Connection.GAME_PROTOCOL = 'http'
+    if record:
+        cassette.record(record)
+    coordinator = None
+    if args.coordinator:
+        from lolbot.common.account import SQLiteAccountManager
+        from lolbot.common.coordinator import Coordinator
+        coordinator = Coordinator(SQLiteAccountManager(), port=0)
+        coordinator.start()
+    config.set_data('coordinator', f'http://127.0.0.1:{coordinator.port}' if coordinator else '')
+
+    sim.start()
+    try:
+        totals = run_client(args.speed, sim.username, START_LEVEL)
+    finally:
+        sim.stop()
+        if coordinator:
+            coordinator.stop()
+
+    games = max(sim.games_played, 1)
+    requests = sum(sim.requests.values())
+    return {
+        'error': totals['error'],
+        'games': sim.games_played,
+        'wall_seconds': totals['wall'],
+        'requests': requests,
+        'requests_per_game': requests / games,
+        'cpu_seconds_per_game': (totals['cpu'] - sim.cpu_seconds) / games,
+        'sleep_seconds_per_game': totals['sleep'] / games,
+        'sleep_requested_per_game': totals['sleep_requested'] / games,
+        'wait_seconds_per_game': totals['wait'] / games,
+        'http_seconds_per_game': totals['http'] / games,
+        'inputs_per_game': sum(desktop.inputs.values()) / games,
+        'window_lookups': dict(window.registry.lookups),
+        'process_checks': {k: process.table.stats[k] for k in ('snapshot', 'hit')},
+        'routes': dict(sim.requests.most_common()),
+        'work_dir': work_dir,
+    }
+
+
+def report(results: dict) -> str:
+    lines = [f"Stopped early: {results['error']}"] if results['error'] else []
+    lines += [
+        f"Games played:            {results['games']}",
+        f"Wall time:               {results['wall_seconds']:.1f}s",
+        f"Requests per game:       {results['requests_per_game']:.1f}",
+        f"Bot CPU per game:        {results['cpu_seconds_per_game']:.3f}s",
+        f"Sleep per game:          {results['sleep_seconds_per_game']:.2f}s real, "
+        f"{results['sleep_requested_per_game']:.1f}s unscaled (all threads)",
+        f"Waits per game:          {results['wait_seconds_per_game']:.2f}s real (all threads)",
+        f"HTTP I/O per game:       {results['http_seconds_per_game']:.2f}s (all threads)",
+        f"Inputs per game:         {results['inputs_per_game']:.1f}",
+        f"Window lookups:          {', '.join(f'{k} {v}' for k, v in results['window_lookups'].items())}",
+        f"Process checks:          {', '.join(f'{k} {v}' for k, v in results['process_checks'].items())}",
+        "Requests by route:",
+    ]
+    lines += [f"  {count:6d}  {route}" for route, count in results['routes'].items()]
+    return '\n'.join(lines)
+
+
+def main(argv: list = None) -> int:
+    results = run(parse_args(argv))
+    print(report(results))
+    return 0 if results['games'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Stands in for the Windows desktop so the bot can drive a simulated League install on any platform
+"""
+
+import importlib
+import sys
+import types
+from collections import Counter
+
+from lolbot.common.process import ProcessInfo, ProcessProvider
+from lolbot.common.window import WindowBackend
+from lolbot.sim.simulator import LeagueSimulator
+
+LEAGUE_CLIENT_WINNAME = "League of Legends"
+LEAGUE_GAME_CLIENT_WINNAME = "League of Legends (TM) Client"
+WINDOW_RECT = (0, 0, 1920, 1080)
+PLATFORM_MODULES = ('pyautogui', 'keyboard', 'mouse')
+
+
+class ReplayDesktopState:
+    """Desktop state for replays without a simulator: the League Client is always running, process control does
+    nothing and the game window is open while game_open is set"""
+
+    def __init__(self) -> None:
+        self.rc_running = False
+        self.league_running = True
+        self.game_open = True
+
+    def game_window_open(self) -> bool:
+        return self.game_open
+
+    def launch(self, args: list) -> None:
+        pass
+
+    def stop_riot_client(self) -> None:
+        pass
+
+    def end_game(self) -> None:
+        self.game_open = False
+
+    def shutdown_all(self) -> None:
+        self.game_open = False
+
+
+class SimulatedDesktop(WindowBackend, ProcessProvider):
+    """Windows, processes and input devices backed by a LeagueSimulator"""
+
+    def __init__(self, sim: LeagueSimulator or ReplayDesktopState) -> None:
+        self.sim = sim
+        self.recorder = None
+        self.modules = {
+            'pyautogui': self._module('pyautogui', moveTo=self.ignore, typewrite=self.ignore, position=lambda: (0, 0),
+                                      FailSafeException=type('FailSafeException', (Exception,), {}), PAUSE=0),
+            'keyboard': self._module('keyboard', press=self.ignore, release=self.ignore, press_and_release=self.ignore),
+            'mouse': self._module('mouse', click=self.ignore, right_click=self.ignore),
+        }
+
+    @staticmethod
+    def _module(name: str, **attrs) -> types.ModuleType:
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        return module
+
+    def preload(self) -> None:
+        """Registers stand-ins for platform modules that cannot be imported here. Call before importing lolbot.common.utils"""
+        for name in PLATFORM_MODULES:
+            if name in sys.modules:
+                continue
+            try:
+                importlib.import_module(name)
+            except Exception:
+                sys.modules[name] = self.modules[name]
+
+    def install(self) -> None:
+        """Points the bot's window, process and input helpers at the simulator"""
+        self.preload()
+        from lolbot.common import inputs, process, window
+        import lolbot.bot.launcher as launcher
+        self.recorder = inputs.RecordingBackend()
+        inputs.set_backend(self.recorder)
+        window.set_backend(self)
+        process.set_provider(self)
+        launcher.subprocess = self._module('subprocess', Popen=self.sim.launch)
+
+    # window.WindowBackend
+
+    def find(self, title: str) -> int:
+        if title == LEAGUE_GAME_CLIENT_WINNAME:
+            return 2 if self.sim.game_window_open() else 0
+        if title == LEAGUE_CLIENT_WINNAME:
+            return 1 if self.sim.league_running else 0
+        return 0
+
+    def rect(self, handle: int) -> tuple:
+        return WINDOW_RECT
+
+    def is_valid(self, handle: int) -> bool:
+        if handle == 2:
+            return self.sim.game_window_open()
+        return handle == 1 and self.sim.league_running
+
+    # process.ProcessProvider
+
+    def processes(self) -> list:
+        running = []
+        if self.sim.rc_running:
+            running.append(ProcessInfo(10, 'RiotClientServices.exe'))
+            running.append(ProcessInfo(11, 'RiotClientUx.exe'))
+        if self.sim.league_running:
+            running.append(ProcessInfo(20, 'LeagueClient.exe'))
+        if self.sim.game_window_open():
+            running.append(ProcessInfo(30, 'League of Legends.exe'))
+        return running
+
+    def close(self, pids: list) -> None:
+        self.kill(pids)
+
+    def kill(self, pids: list) -> None:
+        if 30 in pids:
+            self.sim.end_game()
+        if 20 in pids:
+            self.sim.shutdown_all()
+        if 10 in pids or 11 in pids:
+            self.sim.stop_riot_client()
+
+    @property
+    def inputs(self) -> Counter:
+        """Input events sent by the bot, by kind"""
+        return Counter(kind for _, kind, _ in self.recorder.events) if self.recorder else Counter()
+
+    @staticmethod
+    def ignore(*args, **kwargs) -> None:
+        pass
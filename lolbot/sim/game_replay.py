@@ -0,0 +1,173 @@
+"""
+Feeds a recorded game timeline into the Game decision logic and compares the actions it takes with the recording
+
+Usage: python -m lolbot.sim.game_replay path/to/game.timeline [--tolerance 0]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from lolbot.bot.timeline import Timeline
+from lolbot.sim.benchmark import configure, prepare_environment
+from lolbot.sim.desktop import ReplayDesktopState, SimulatedDesktop
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replays a recorded game timeline through the Game decision logic")
+    parser.add_argument('timeline', help="path to a .timeline file")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for the decision logic")
+    parser.add_argument('--tolerance', type=int, default=0, help="ticks a replayed action may be away from the recorded one")
+    parser.add_argument('--save', default=None, help="writes the replayed timeline here, to compare later replays with")
+    parser.add_argument('--dir', default=None, help="working directory for configs")
+    return parser.parse_args(argv)
+
+
+class Lockstep:
+    """Publishes recorded ticks in bot time instead of from a poller thread. Time only moves while the game loop sleeps
+    or waits, and a tick is published once time reaches its recorded game time, so a replay takes the same decisions
+    on every run no matter how threads are scheduled. The game ends when time moves past the last tick"""
+
+    def __init__(self, rows: list, publish, end) -> None:
+        self.rows = rows
+        self.publish = publish
+        self.end = end
+        self.now = 0.0
+        self.lock = threading.RLock()
+
+    def advance(self, seconds: float, done=lambda: False) -> bool:
+        """Moves time forward by seconds, publishing the ticks that become due. Stops early and returns True as soon
+        as done() is true"""
+        with self.lock:
+            until = self.now + seconds
+            while not done():
+                if not self.rows:
+                    self.end()
+                if self.rows[0]['game_time'] > until:
+                    self.now = until
+                    return False
+                self.now = max(self.now, self.rows[0]['game_time'])
+                self.publish(self.rows.pop(0))
+            return True
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    # StatePoller interface of the Game, ticks are driven by advance()
+
+    def start(self) -> None:
+        pass
+
+    def stop(self, timeout: float = 15) -> None:
+        pass
+
+    def summary(self) -> str:
+        return f"Replayed in lockstep, {len(self.rows)} ticks left"
+
+
+def run(args: argparse.Namespace) -> dict:
+    path = os.path.abspath(args.timeline)
+    prepare_environment(args.dir or tempfile.mkdtemp(prefix='lolbot-game-replay-'))
+    configure(os.environ['LOCALAPPDATA'], 30)
+    recorded = Timeline.load(path)
+    state = ReplayDesktopState()
+    desktop = SimulatedDesktop(state)
+    desktop.install()
+
+    from lolbot.common import clock, utils, window
+    from lolbot.bot.game import Game, GameSnapshot, GameState, SnapshotChannel
+    from lolbot.bot.timeline import TimelineRecorder
+
+    def end() -> None:
+        state.game_open = False
+        window.registry.invalidate()
+        raise utils.WindowNotFound
+
+    class LockstepChannel(SnapshotChannel):
+        """Channel whose waits move replay time forward until the condition holds or the timeout passed"""
+
+        def wait(self, condition, timeout: float) -> GameSnapshot or None:
+            return self.snapshot if lockstep.advance(timeout, lambda: condition(self.snapshot)) else None
+
+    class ReplayGame(Game):
+        """Game whose state comes from a recorded timeline instead of the live client"""
+
+        def __init__(self) -> None:
+            super().__init__()
+            self.timeline = TimelineRecorder(os.path.dirname(path))
+            self.timeline.timeline.meta.update(recorded.meta)
+            self.channel = LockstepChannel()
+            self.poller = lockstep
+
+        def wait_for_connection(self) -> None:
+            pass
+
+        def save_timeline(self, result: str) -> None:
+            pass
+
+        def publish(self, row: dict) -> None:
+            game_state = GameState(row['game_state']) if row['game_state'] >= 0 else None
+            snapshot = GameSnapshot(**{**row, 'game_state': game_state, 'is_dead': bool(row['is_dead']),
+                                       'low_hp': bool(row['low_hp']), 'buying_items': bool(row['buying_items']),
+                                       'mid_turret_destroyed': bool(row['mid_turret_destroyed'])})
+            self.channel.publish(snapshot)
+            self.timeline.tick(snapshot)
+
+    lockstep = Lockstep(recorded.rows(), lambda row: game.publish(row), end)
+    random.seed(args.seed)
+    clock.set_sleep(lockstep.sleep)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        game = ReplayGame()
+        completed = game.play_game()
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        clock.set_sleep(None)
+
+    expected = recorded.actions()
+    actual = game.timeline.timeline.actions()
+    divergence = next((i for i, (a, b) in enumerate(zip(expected, actual))
+                       if a[1] != b[1] or abs(a[0] - b[0]) > args.tolerance), None)
+    if divergence is None and len(expected) != len(actual):
+        divergence = min(len(expected), len(actual))
+    return {
+        'completed': completed,
+        'ticks': len(recorded),
+        'wall_seconds': wall,
+        'cpu_seconds': cpu,
+        'recorded_actions': Counter(action for _, action in expected),
+        'replayed_actions': Counter(action for _, action in actual),
+        'divergence': divergence,
+        'expected': expected,
+        'actual': actual,
+        'timeline': game.timeline.timeline,
+    }
+
+
+def main(argv: list = None) -> int:
+    args = parse_args(argv)
+    save = os.path.abspath(args.save) if args.save else None  # before run() changes the working directory
+    results = run(args)
+    if save:
+        results['timeline'].save(save)
+    print(f"Replayed {results['ticks']} ticks in {results['wall_seconds']:.1f}s, bot CPU {results['cpu_seconds']:.3f}s")
+    print(f"{'action':10} {'recorded':>9} {'replayed':>9}")
+    for action in sorted(set(results['recorded_actions']) | set(results['replayed_actions'])):
+        print(f"{action:10} {results['recorded_actions'][action]:9d} {results['replayed_actions'][action]:9d}")
+    index = results['divergence']
+    if index is None:
+        print("Actions match the recording")
+        return 0
+    expected = results['expected'][index] if index < len(results['expected']) else None
+    actual = results['actual'][index] if index < len(results['actual']) else None
+    print(f"First divergence at action {index}: recorded {expected}, replayed {actual}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
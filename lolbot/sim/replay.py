@@ -0,0 +1,88 @@
+"""
+Replays a recorded cassette through the real Client to reproduce a session without a League Client
+
+Usage: python -m lolbot.sim.replay cassette.jsonl.gz [--realtime [--speed 10]]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from lolbot.sim.benchmark import configure, prepare_environment, run_client
+from lolbot.sim.desktop import ReplayDesktopState, SimulatedDesktop
+
+MAX_LEVEL = 1000  # the cassette decides when the replay ends
+FAST_SPEED = 1000  # time scale of bot sleeps and timeouts when replaying as fast as possible
+PHASE_KEY = 'lcu GET /lol-gameflow/v1/gameflow-phase'
+GAME_KEY = 'game GET /liveclientdata/gamestats'
+
+
+class ReplayState(ReplayDesktopState):
+    """Desktop state for a cassette replay: the game window is open while the replayed phase is InProgress and
+    recorded game data is left to serve"""
+
+    def __init__(self, player) -> None:
+        super().__init__()
+        self.player = player
+
+    def game_window_open(self) -> bool:
+        return self.player.last_response(PHASE_KEY) == '"InProgress"' and self.player.has_pending(GAME_KEY)
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replays a recorded cassette through the bot")
+    parser.add_argument('cassette', help="path to a .jsonl.gz cassette")
+    parser.add_argument('--realtime', action='store_true', help="serve responses at their recorded times")
+    parser.add_argument('--speed', type=float, default=None,
+                        help="recorded seconds per real second in realtime mode, default 1. Without --realtime the "
+                             f"bot's sleeps and timeouts are shortened {FAST_SPEED}x unless a speed is given")
+    parser.add_argument('--dir', default=None, help="working directory for configs and traces")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> dict:
+    path = os.path.abspath(args.cassette)
+    work_dir = args.dir or tempfile.mkdtemp(prefix='lolbot-replay-')
+    prepare_environment(work_dir)
+    configure(work_dir, MAX_LEVEL)
+
+    speed = args.speed or (1.0 if args.realtime else FAST_SPEED)
+    from lolbot.common import cassette
+    player = cassette.replay(path, args.realtime, speed)
+    desktop = SimulatedDesktop(ReplayState(player))
+    desktop.install()
+    totals = run_client(speed, 'bot', 1)
+    ended = totals['error'] is not None and player.ran_out(PHASE_KEY)  # the bot stopped because the recording ended
+    return {
+        'outcome': 'end of cassette' if ended else totals['error'] or 'account leveled',
+        'error': None if ended else totals['error'],
+        'served': player.served,
+        'recorded': player.last_index + 1,
+        'misses': dict(player.misses),
+        'wall_seconds': totals['wall'],
+        'cpu_seconds': totals['cpu'],
+        'sleep_seconds': totals['sleep'],
+        'wait_seconds': totals['wait'],
+        'http_seconds': totals['http'],
+        'inputs': sum(desktop.inputs.values()),
+    }
+
+
+def main(argv: list = None) -> int:
+    results = run(parse_args(argv))
+    print(f"Replay ended: {results['outcome']}")
+    print(f"Served {results['served']} responses from {results['recorded']} recorded interactions")
+    print(f"Wall time:   {results['wall_seconds']:.1f}s")
+    print(f"Bot CPU:     {results['cpu_seconds']:.3f}s")
+    print(f"Sleep:       {results['sleep_seconds']:.2f}s (all threads)")
+    print(f"Waits:       {results['wait_seconds']:.2f}s (all threads)")
+    print(f"HTTP I/O:    {results['http_seconds']:.2f}s (all threads)")
+    print(f"Inputs:      {results['inputs']}")
+    for key, count in results['misses'].items():
+        print(f"  missing {count:5d}  {key}")
+    return 1 if results['error'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
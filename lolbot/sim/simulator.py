@@ -0,0 +1,537 @@
+"""
+Simulates the Riot Client, League Client and in-game Live Client Data API for running the bot without Windows
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import socket
+import struct
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs
+
+PHASE_URI = '/lol-gameflow/v1/gameflow-phase'
+READY_CHECK_URI = '/lol-matchmaking/v1/ready-check'
+CHAMP_SELECT_URI = '/lol-champ-select/v1/session'
+SEARCH_URI = '/lol-matchmaking/v1/search'
+EVENT_URIS = (PHASE_URI, READY_CHECK_URI, CHAMP_SELECT_URI, SEARCH_URI)
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+MID_TURRET = 'Turret_T2_C_05_A'
+
+
+@dataclass
+class Timeline:
+    """Durations of each gameflow step in simulated seconds. speed is simulated seconds per real second"""
+    queue: float = 5.0
+    champ_select: float = 10.0
+    game_length: float = 900.0  # in-game seconds until the nexus falls
+    mid_turret: float = 600.0
+    deaths: tuple = (300.0, 700.0)
+    respawn: float = 20.0
+    waiting_for_stats: float = 5.0
+    pre_end_of_game: float = 10.0
+    speed: float = 1.0
+
+
+class LeagueSimulator:
+    """Scripted gameflow state machine from lobby to end of game, served over the same routes the bot uses"""
+
+    TICK = 0.02  # real seconds between automatic transitions
+
+    def __init__(self, timeline: Timeline, riot_lockfile: str, league_lockfile: str, username: str = 'bot',
+                 level: int = 1) -> None:
+        self.timeline = timeline
+        self.riot_lockfile = riot_lockfile
+        self.league_lockfile = league_lockfile
+        self.username = username
+        self.level = level
+        self.lock = threading.RLock()
+        self.origin = time.monotonic()
+        self.rc_running = False
+        self.league_running = False
+        self.logged_in = False
+        self.phase = 'None'
+        self.phase_started = 0.0
+        self.queue_id = 0
+        self.session = None
+        self.ready_check = None
+        self.search = None
+        self.game_started = None
+        self.honored = False
+        self.games_played = 0
+        self.requests = Counter()
+        self.cpu_seconds = 0.0
+        self.sockets = []
+        self.servers = []
+        self.stopped = threading.Event()
+        self.rc_server = self._server()
+        self.lcu_server = self._server()
+        self.live_server = self._server()
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """Starts the HTTP servers and the transition ticker"""
+        for server in self.servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._tick_loop, daemon=True).start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.shutdown_all()
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    @property
+    def rc_port(self) -> int:
+        return self.rc_server.server_port
+
+    @property
+    def lcu_port(self) -> int:
+        return self.lcu_server.server_port
+
+    @property
+    def live_port(self) -> int:
+        return self.live_server.server_port
+
+    def now(self) -> float:
+        """Simulated seconds since start"""
+        return (time.monotonic() - self.origin) * self.timeline.speed
+
+    # Desktop processes and windows
+
+    def launch(self, args: list) -> None:
+        """Handles RiotClientServices being started, launches League if already logged in"""
+        with self.lock:
+            if not self.rc_running:
+                self.rc_running = True
+                self._write_lockfile(self.riot_lockfile, 'Riot Client', self.rc_port)
+            elif self.logged_in and not self.league_running:
+                self.league_running = True
+                self._set_phase('None')
+                self._write_lockfile(self.league_lockfile, 'LeagueClient', self.lcu_port)
+
+    def stop_riot_client(self) -> None:
+        with self.lock:
+            self.rc_running = False
+            self._remove(self.riot_lockfile)
+
+    def end_game(self) -> None:
+        """Kills the game process, the League Client moves on to stats"""
+        with self.lock:
+            if self.phase == 'InProgress':
+                self._set_phase('WaitingForStats')
+
+    def shutdown_all(self) -> None:
+        with self.lock:
+            self.stop_riot_client()
+            self.league_running = False
+            self.logged_in = False
+            self._remove(self.league_lockfile)
+            self._set_phase('None')
+
+    def game_time(self) -> float or None:
+        """In-game seconds, None while no game is running"""
+        with self.lock:
+            if self.phase != 'InProgress' or self.game_started is None:
+                return None
+            return self.now() - self.game_started
+
+    def game_window_open(self) -> bool:
+        game_time = self.game_time()
+        return game_time is not None and game_time < self.timeline.game_length
+
+    # State machine
+
+    def _tick_loop(self) -> None:
+        while not self.stopped.wait(self.TICK):
+            start = time.thread_time()
+            self.tick()
+            with self.lock:
+                self.cpu_seconds += time.thread_time() - start
+
+    def tick(self) -> None:
+        """Applies transitions that happen without any bot action"""
+        t = self.timeline
+        with self.lock:
+            elapsed = self.now() - self.phase_started
+            if self.phase == 'Matchmaking' and elapsed >= t.queue:
+                self.ready_check = {'state': 'InProgress', 'playerResponse': 'None', 'timer': 0}
+                self._set_phase('ReadyCheck')
+            elif self.phase == 'ChampSelect' and elapsed >= t.champ_select:
+                self.session = None
+                self.game_started = self.now()
+                self._set_phase('InProgress')
+            elif self.phase == 'InProgress' and self.game_time() >= t.game_length:
+                self._set_phase('WaitingForStats')
+            elif self.phase == 'WaitingForStats' and elapsed >= t.waiting_for_stats:
+                self.honored = False
+                self._set_phase('PreEndOfGame')
+            elif self.phase == 'PreEndOfGame' and (self.honored or elapsed >= t.pre_end_of_game):
+                self.level += 1
+                self.games_played += 1
+                self._set_phase('EndOfGame')
+            elif self.phase == 'ChampSelect' and self.session is not None:
+                self.session['timer']['adjustedTimeLeftInPhase'] = max(0, int((t.champ_select - elapsed) * 1000))
+
+    def _set_phase(self, phase: str) -> None:
+        if phase == self.phase:
+            return
+        self.phase = phase
+        self.phase_started = self.now()
+        if phase not in ('Lobby', 'Matchmaking'):
+            self.search = None
+        if phase != 'ReadyCheck':
+            self.ready_check = None
+        for uri in EVENT_URIS:
+            self._notify(uri)
+
+    # League Client routes
+
+    def lcu_routes(self) -> list:
+        return [
+            ('GET', r'/lol-login/v1/session', lambda m, b, q: (200, {'state': 'SUCCEEDED', 'username': self.username})),
+            ('POST', r'/lol-login/v1/delete-rso-on-close', lambda m, b, q: (204, None)),
+            ('GET', PHASE_URI, lambda m, b, q: (200, self.phase)),
+            ('POST', r'/lol-gameflow/v1/reconnect', lambda m, b, q: (204, None)),
+            ('GET', r'/patcher/v1/products/league_of_legends/state', lambda m, b, q: (200, {'isUpToDate': True, 'percentPatched': 100})),
+            ('GET', r'/lol-chat/v1/me', lambda m, b, q: (200, {'lol': {'level': str(self.level)}})),
+            ('GET', r'/lol-summoner/v1/current-summoner', self._current_summoner),
+            ('POST', r'/lol-lobby/v2/lobby', self._create_lobby),
+            ('GET', r'/lol-lobby/v2/lobby', self._get_lobby),
+            ('POST', r'/lol-lobby/v2/lobby/matchmaking/search', self._start_search),
+            ('DELETE', r'/lol-lobby/v2/lobby/matchmaking/search', self._stop_search),
+            ('GET', SEARCH_URI, lambda m, b, q: self._value(self.search)),
+            ('GET', READY_CHECK_URI, lambda m, b, q: self._value(self.ready_check)),
+            ('POST', r'/lol-matchmaking/v1/ready-check/accept', self._accept),
+            ('GET', CHAMP_SELECT_URI, lambda m, b, q: self._value(self.session)),
+            ('PATCH', r'/lol-champ-select/v1/session/actions/(\d+)', self._hover),
+            ('POST', r'/lol-champ-select/v1/session/actions/(\d+)/complete', self._lock_in),
+            ('GET', r'/lol-lobby-team-builder/champ-select/v1/pickable-champion-ids', lambda m, b, q: (200, list(range(1, 40)))),
+            ('GET', r'/lol-chat/v1/conversations', self._conversations),
+            ('POST', r'/lol-chat/v1/conversations/([^/]+)/messages', lambda m, b, q: (200, {'body': (b or {}).get('body')})),
+            ('GET', r'/lol-honor-v2/v1/ballot', self._ballot),
+            ('POST', r'/lol-honor-v2/v1/honor-player', self._honor),
+            ('POST', r'/lol-lobby/v2/play-again', self._play_again),
+            ('POST', r'/riotclient/kill-and-restart-ux', lambda m, b, q: (204, None)),
+        ]
+
+    def _current_summoner(self, m, b, q) -> tuple:
+        return 200, {'displayName': self.username, 'summonerLevel': self.level, 'percentCompleteForNextLevel': 0}
+
+    def _create_lobby(self, m, b, q) -> tuple:
+        self.queue_id = (b or {}).get('queueId', 0)
+        self._set_phase('Lobby')
+        return 200, {'gameConfig': {'queueId': self.queue_id}}
+
+    def _get_lobby(self, m, b, q) -> tuple:
+        if self.phase not in ('Lobby', 'Matchmaking', 'ReadyCheck'):
+            return 404, {'message': 'LOBBY_NOT_FOUND'}
+        return 200, {'gameConfig': {'queueId': self.queue_id}}
+
+    def _start_search(self, m, b, q) -> tuple:
+        if self.phase != 'Lobby':
+            return 400, {'message': 'Not in lobby'}
+        self.search = {'errors': [], 'estimatedQueueTime': self.timeline.queue, 'searchState': 'Searching', 'timeInQueue': 0}
+        self._set_phase('Matchmaking')
+        self._notify(SEARCH_URI)
+        return 204, None
+
+    def _stop_search(self, m, b, q) -> tuple:
+        self._set_phase('Lobby')
+        return 204, None
+
+    def _accept(self, m, b, q) -> tuple:
+        if self.phase != 'ReadyCheck':
+            return 500, {'message': 'No ready check'}
+        self.session = {
+            'localPlayerCellId': 0,
+            'timer': {'phase': 'BAN_PICK', 'adjustedTimeLeftInPhase': int(self.timeline.champ_select * 1000)},
+            'actions': [[{'id': i, 'actorCellId': i, 'championId': 0, 'completed': False, 'type': 'pick'} for i in range(5)]],
+        }
+        self._set_phase('ChampSelect')
+        return 204, None
+
+    def _hover(self, m, b, q) -> tuple:
+        return self._update_action(int(m.group(1)), championId=(b or {}).get('championId', 0))
+
+    def _lock_in(self, m, b, q) -> tuple:
+        return self._update_action(int(m.group(1)), completed=True)
+
+    def _update_action(self, action_id: int, **changes) -> tuple:
+        if self.session is None:
+            return 404, {'message': 'No active delegate'}
+        for action in self.session['actions'][0]:
+            if action['id'] == action_id:
+                action.update(changes)
+                self._notify(CHAMP_SELECT_URI)
+                return 204, None
+        return 404, {'message': 'Action not found'}
+
+    def _conversations(self, m, b, q) -> tuple:
+        if self.phase != 'ChampSelect':
+            return 200, []
+        return 200, [{'id': 'champ-select', 'gameName': '', 'gameTag': '', 'type': 'championSelect'}]
+
+    def _ballot(self, m, b, q) -> tuple:
+        if self.phase != 'PreEndOfGame':
+            return 404, {'message': 'No ballot'}
+        players = [{'summonerId': i, 'championName': f'Champ{i}', 'summonerName': f'Ally{i}'} for i in range(1, 5)]
+        return 200, {'eligiblePlayers': players}
+
+    def _honor(self, m, b, q) -> tuple:
+        self.honored = True
+        return 200, None
+
+    def _play_again(self, m, b, q) -> tuple:
+        if self.phase != 'EndOfGame':
+            return 400, {'message': 'Not in end of game'}
+        self._set_phase('Lobby')
+        return 204, None
+
+    # Riot Client routes
+
+    def rc_routes(self) -> list:
+        return [
+            ('GET', r'/rso-auth/v1/authorization/access-token', lambda m, b, q: (200, {'token': 'sim'}) if self.logged_in else (404, {'message': 'Not found'})),
+            ('POST', r'/rso-auth/v2/authorizations', lambda m, b, q: (200, {'type': 'needs_authentication'})),
+            ('PUT', r'/rso-auth/v1/session/credentials', self._credentials),
+        ]
+
+    def _credentials(self, m, b, q) -> tuple:
+        if not (b or {}).get('username'):
+            return 201, {'error': 'auth_failure', 'type': 'auth'}
+        self.logged_in = True
+        return 201, {'error': '', 'type': 'response'}
+
+    # Live Client Data API routes
+
+    def live_routes(self) -> list:
+        return [
+            ('GET', r'/liveclientdata/allgamedata', self._all_game_data),
+            ('GET', r'/liveclientdata/gamestats', lambda m, b, q: self._game_section(lambda d: d['gameData'])),
+            ('GET', r'/liveclientdata/activeplayer', lambda m, b, q: self._game_section(lambda d: d['activePlayer'])),
+            ('GET', r'/liveclientdata/activeplayername', lambda m, b, q: self._game_section(lambda d: d['activePlayer']['summonerName'])),
+            ('GET', r'/liveclientdata/playerlist', self._player_list),
+            ('GET', r'/liveclientdata/eventdata', self._event_data),
+        ]
+
+    def _all_game_data(self, m, b, q) -> tuple:
+        if not self.game_window_open():
+            return 404, {'errorCode': 'RESOURCE_NOT_FOUND'}
+        return 200, self.game_data(self.game_time())
+
+    def _game_section(self, select) -> tuple:
+        status, data = self._all_game_data(None, None, {})
+        return (status, select(data)) if status == 200 else (status, data)
+
+    def _player_list(self, m, b, q) -> tuple:
+        team = q.get('teamID')
+        return self._game_section(lambda d: [p for p in d['allPlayers'] if team is None or p['team'] == team])
+
+    def _event_data(self, m, b, q) -> tuple:
+        since = int(q.get('eventID', 0))
+        return self._game_section(lambda d: {'Events': [e for e in d['events']['Events'] if e['EventID'] >= since]})
+
+    def game_data(self, game_time: float) -> dict:
+        """Live client payload of the bot's champion and nine others at game_time"""
+        t = self.timeline
+        dead_until = [d + t.respawn for d in t.deaths if d <= game_time < d + t.respawn]
+        is_dead = bool(dead_until)
+        max_health = 600 + 80 * min(18, int(game_time / 60))
+        health = 0 if is_dead else max_health * (0.25 + 0.75 * ((game_time % 90) / 90))
+        items = [{'slot': i, 'consumable': i == 0, 'itemID': 1000 + i} for i in range(min(6, int(game_time / 240) + 1))]
+        players = [{'summonerName': self.username, 'rawChampionName': 'game_character_displayname_Annie', 'team': 'ORDER',
+                    'isDead': is_dead, 'respawnTimer': dead_until[0] - game_time if is_dead else 0, 'items': items}]
+        for i in range(9):
+            players.append({'summonerName': f'Bot{i}', 'rawChampionName': 'game_character_displayname_Ashe',
+                            'team': 'ORDER' if i < 4 else 'CHAOS', 'isDead': False, 'respawnTimer': 0, 'items': items})
+        events = [{'EventID': 0, 'EventName': 'GameStart', 'EventTime': 0}]
+        if game_time >= 90:
+            events.append({'EventID': 1, 'EventName': 'MinionsSpawning', 'EventTime': 65})
+        if game_time >= t.mid_turret:
+            events.append({'EventID': 2, 'EventName': 'TurretKilled', 'EventTime': t.mid_turret, 'TurretKilled': MID_TURRET, 'KillerName': self.username})
+        return {
+            'activePlayer': {'summonerName': f'{self.username}#SIM', 'currentGold': 500 + 4 * game_time % 3500,
+                             'championStats': {'currentHealth': health, 'maxHealth': max_health}},
+            'allPlayers': players,
+            'events': {'Events': events},
+            'gameData': {'gameTime': game_time, 'gameMode': 'CLASSIC'},
+        }
+
+    # Helpers
+
+    def _value(self, value: Any) -> tuple:
+        if value is None:
+            return 404, {'message': 'Not found'}
+        return 200, value
+
+    def _notify(self, uri: str) -> None:
+        """Pushes the current value of uri to WebSocket subscribers"""
+        status, value = self.route('lcu', 'GET', uri, None, {}, count=False)
+        payload = {'uri': uri, 'eventType': 'Update' if status == 200 else 'Delete', 'data': value if status == 200 else None}
+        name = 'OnJsonApiEvent' + uri.replace('/', '_')
+        for ws in list(self.sockets):
+            if name in ws.subscriptions:
+                ws.send(json.dumps([8, name, payload]))
+
+    def route(self, server: str, method: str, path: str, body: Any, query: dict, count: bool = True) -> tuple:
+        """Dispatches a request to a route handler, returns (status, json value)"""
+        routes = {'lcu': self.lcu_routes, 'rc': self.rc_routes, 'live': self.live_routes}[server]()
+        with self.lock:
+            for route_method, pattern, handler in routes:
+                match = re.fullmatch(pattern, path)
+                if route_method == method and match:
+                    if count:
+                        self.requests[f'{server} {method} {pattern}'] += 1
+                    return handler(match, body, query)
+            if count:
+                self.requests[f'{server} {method} unknown'] += 1
+        return 404, {'message': f'No route for {method} {path}'}
+
+    def _write_lockfile(self, path: str, name: str, port: int) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(f'{name}:{os.getpid()}:{port}:simulated:http')
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _server(self) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _handler(self, len(self.servers)))
+        server.daemon_threads = True
+        self.servers.append(server)
+        return server
+
+
+def _handler(sim: LeagueSimulator, index: int) -> type:
+    """Builds a request handler class bound to a simulator server"""
+    name = ('rc', 'lcu', 'live')[index]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # headers and body are sent separately, avoid delayed ACK stalls
+
+        def handle_one_request(self) -> None:
+            start = time.thread_time()
+            try:
+                super().handle_one_request()
+            finally:
+                with sim.lock:
+                    sim.cpu_seconds += time.thread_time() - start
+
+        def _dispatch(self, method: str) -> None:
+            if name == 'lcu' and self.headers.get('Upgrade', '').lower() == 'websocket':
+                WebSocket(sim, self).serve()
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            path, _, query = self.path.partition('?')
+            status, value = sim.route(name, method, path, body, {k: v[0] for k, v in parse_qs(query).items()})
+            data = b'' if value is None else json.dumps(value).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            self._dispatch('GET')
+
+        def do_POST(self) -> None:
+            self._dispatch('POST')
+
+        def do_PUT(self) -> None:
+            self._dispatch('PUT')
+
+        def do_PATCH(self) -> None:
+            self._dispatch('PATCH')
+
+        def do_DELETE(self) -> None:
+            self._dispatch('DELETE')
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return Handler
+
+
+class WebSocket:
+    """Minimal server side of the LCU WebSocket: WAMP subscribe messages in, event messages out"""
+
+    def __init__(self, sim: LeagueSimulator, handler: BaseHTTPRequestHandler) -> None:
+        self.sim = sim
+        self.handler = handler
+        self.sock = handler.connection
+        self.subscriptions = set()
+        self.send_lock = threading.Lock()
+
+    def serve(self) -> None:
+        key = self.handler.headers['Sec-WebSocket-Key']
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.handler.send_response(101)
+        self.handler.send_header('Upgrade', 'websocket')
+        self.handler.send_header('Connection', 'Upgrade')
+        self.handler.send_header('Sec-WebSocket-Accept', accept)
+        self.handler.end_headers()
+        self.handler.wfile.flush()
+        self.sim.sockets.append(self)
+        try:
+            while True:
+                opcode, payload = self._read_frame()
+                if opcode == 8:
+                    break
+                if opcode == 1:
+                    msg = json.loads(payload)
+                    if msg[0] == 5:
+                        self.subscriptions.add(msg[1])
+        except (OSError, ValueError, struct.error):
+            pass
+        finally:
+            self.sim.sockets.remove(self)
+            self.handler.close_connection = True
+
+    def send(self, text: str) -> None:
+        data = text.encode()
+        if len(data) < 126:
+            header = struct.pack('!BB', 0x81, len(data))
+        elif len(data) < 65536:
+            header = struct.pack('!BBH', 0x81, 126, len(data))
+        else:
+            header = struct.pack('!BBQ', 0x81, 127, len(data))
+        try:
+            with self.send_lock:
+                self.sock.sendall(header + data)
+        except OSError:
+            pass
+
+    def _read_frame(self) -> tuple:
+        b1, b2 = struct.unpack('!BB', self._recv(2))
+        length = b2 & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self._recv(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self._recv(8))[0]
+        mask = self._recv(4) if b2 & 0x80 else b'\0\0\0\0'
+        payload = bytes(c ^ mask[i % 4] for i, c in enumerate(self._recv(length)))
+        return b1 & 0x0F, payload
+
+    def _recv(self, n: int) -> bytes:
+        data = b''
+        while len(data) < n:
+            chunk = self.sock.recv(n - len(data))
+            if not chunk:
+                raise OSError("WebSocket closed")
+            data += chunk
+        return data
@@ -0,0 +1,156 @@
+"""
+Measures how long the GUI takes to show its first frame and the bot takes to start leveling
+
+Usage: python -m lolbot.sim.startup --repeat 5
+"""
+
+import argparse
+import json
+import os
+import queue
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TARGETS = ('gui', 'bot')
+MARKER = 'STARTUP '
+
+# Modules that should only load once they are used, reported when a target loaded them before it was ready
+HEAVY_MODULES = ('dearpygui', 'pyautogui', 'keyboard', 'mouse', 'pynput', 'pygetwindow', 'win32gui', 'websocket',
+                 'requests')
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cold start benchmark of the GUI and the bot process")
+    parser.add_argument('--repeat', type=int, default=5, help="fresh processes started per target")
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS))
+    parser.add_argument('--dir', default=None, help="working directory for configs and logs")
+    parser.add_argument('--child', choices=TARGETS, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def start_gui(marks: dict) -> None:
+    """Opens the main window and closes it after the first frame was rendered"""
+    import lolbot.view.main_window as main_window
+    marks['imported'] = time.monotonic()
+    dpg = main_window.dpg
+    render = dpg.render_dearpygui_frame
+
+    def render_once() -> None:
+        render()
+        marks.setdefault('ready', time.monotonic())
+        dpg.stop_dearpygui()
+
+    dpg.render_dearpygui_frame = render_once
+    main_window.MainWindow(600, 420).show()
+
+
+def start_bot(marks: dict) -> None:
+    """Constructs the Client and stops where it would get the first account"""
+    from lolbot.common.config import Constants
+    Constants.create_dirs()
+    from lolbot.bot.client import Client
+    marks['imported'] = time.monotonic()
+
+    class StartupClient(Client):
+        """Client that returns as soon as it is ready to level accounts"""
+
+        def account_loop(self) -> None:
+            marks['ready'] = time.monotonic()
+            marks['modules'] = len(sys.modules)
+            marks['heavy'] = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    StartupClient(queue.SimpleQueue())
+
+
+def child(target: str) -> None:
+    """Runs in the measured process, prints monotonic timestamps of its startup milestones"""
+    marks = {'start': time.monotonic()}
+    try:
+        if target == 'gui':
+            start_gui(marks)
+        else:
+            start_bot(marks)
+    except Exception as e:
+        marks['error'] = f"{type(e).__name__}: {e}"
+    if 'ready' in marks and 'modules' not in marks:
+        marks['modules'] = len(sys.modules)
+        marks['heavy'] = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(MARKER + json.dumps(marks), flush=True)
+
+
+def measure(target: str, work_dir: str, timeout: float = 60) -> dict:
+    """Starts one fresh interpreter for target and returns its milestones in seconds since the process was spawned"""
+    env = dict(os.environ, LOCALAPPDATA=os.path.join(work_dir, 'AppData'))
+    os.makedirs(env['LOCALAPPDATA'], exist_ok=True)
+    spawned = time.monotonic()
+    result = subprocess.run([sys.executable, '-m', 'lolbot.sim.startup', '--child', target], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True, timeout=timeout)
+    lines = [line for line in result.stdout.splitlines() if line.startswith(MARKER)]
+    if not lines:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}"}
+    marks = json.loads(lines[-1][len(MARKER):])
+    measurement = {
+        'interpreter': marks['start'] - spawned,
+        'imports': marks['imported'] - marks['start'] if 'imported' in marks else None,
+        'ready': marks['ready'] - spawned if 'ready' in marks else None,
+        'modules': marks.get('modules'),
+        'heavy': marks.get('heavy', []),
+    }
+    if 'error' in marks:
+        measurement['error'] = marks['error']
+    return measurement
+
+
+def run(args: argparse.Namespace) -> dict:
+    work_dir = args.dir or tempfile.mkdtemp(prefix='lolbot-startup-')
+    results = {}
+    for target in args.targets:
+        runs = [measure(target, work_dir) for _ in range(args.repeat)]
+        completed = [r for r in runs if r.get('ready') is not None]
+        if not completed:
+            results[target] = {'error': runs[-1].get('error', 'did not start')}
+            continue
+        results[target] = {
+            'runs': len(completed),
+            'interpreter': statistics.median(r['interpreter'] for r in completed),
+            'imports': statistics.median(r['imports'] for r in completed),
+            'ready': statistics.median(r['ready'] for r in completed),
+            'modules': completed[-1]['modules'],
+            'heavy': completed[-1]['heavy'],
+        }
+    return results
+
+
+def report(results: dict) -> str:
+    names = {'gui': "Time to first frame", 'bot': "Time to bot running"}
+    lines = []
+    for target, result in results.items():
+        if 'error' in result:
+            lines.append(f"{names[target] + ':':25}unavailable, {result['error']}")
+            continue
+        lines += [
+            f"{names[target] + ':':25}{result['ready'] * 1000:.0f}ms (median of {result['runs']})",
+            f"  Interpreter:           {result['interpreter'] * 1000:.0f}ms",
+            f"  Imports:               {result['imports'] * 1000:.0f}ms",
+            f"  Modules loaded:        {result['modules']}",
+            f"  Heavy modules loaded:  {', '.join(result['heavy']) or 'none'}",
+        ]
+    return '\n'.join(lines)
+
+
+def main(argv: list = None) -> int:
+    args = parse_args(argv)
+    if args.child:
+        child(args.child)
+        return 0
+    results = run(args)
+    print(report(results))
+    return 0 if any('error' not in result for result in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,7 +2,9 @@
 View tab that displays information about the bot
 """
 
+import threading
 import webbrowser
+
 import requests
 
 import dearpygui.dearpygui as dpg
@@ -13,26 +15,32 @@ from lolbot.common.config import Constants
 class AboutTab:
     """Class that displays the About Tab and information about the bot"""
 
+    RELEASES_URL = "https://api.github.com/repos/iholston/lol-bot/releases/latest"
+
     def __init__(self) -> None:
-        response = requests.get("https://api.github.com/repos/iholston/lol-bot/releases/latest")
         self.version = 'v' + Constants.VERSION
-        self.latest_version = response.json()["name"]
-        self.need_update = False
+        self.latest_version = None
+
+    def check_for_update(self) -> None:
+        """Looks up the latest release in the background and shows the update button if it is newer"""
+        try:
+            self.latest_version = requests.get(self.RELEASES_URL, timeout=10).json()["name"]
+        except (requests.exceptions.RequestException, ValueError, KeyError):
+            return
         if self.latest_version != self.version:
-            self.need_update = True
+            dpg.configure_item("UpdateButton", label=f"- Update Available ({self.latest_version})", show=True)
 
     def create_tab(self, parent: int) -> None:
         """Creates About Tab"""
-        with dpg.tab(label="About", parent=parent) as self.about_tab:
+        with dpg.group(parent=parent) as self.about_tab:
             dpg.add_spacer()
             with dpg.group(horizontal=True):
                 dpg.add_button(label='Bot Version', width=100, enabled=False)
                 dpg.add_text(default_value=self.version)
-                if self.need_update:
-                    update = dpg.add_button(label=f"- Update Available ({self.latest_version})", callback=lambda: webbrowser.open('https://github.com/iholston/lol-bot/releases/latest'))
-                    with dpg.tooltip(dpg.last_item()):
-                        dpg.add_text("Get latest release")
-                    dpg.bind_item_theme(update, "__hyperlinkTheme")
+                update = dpg.add_button(tag="UpdateButton", show=False, callback=lambda: webbrowser.open('https://github.com/iholston/lol-bot/releases/latest'))
+                with dpg.tooltip(dpg.last_item()):
+                    dpg.add_text("Get latest release")
+                dpg.bind_item_theme(update, "__hyperlinkTheme")
             with dpg.group(horizontal=True):
                 dpg.add_button(label='Github', width=100, enabled=False)
                 dpg.add_button(label='www.github.com/iholston/lol-bot', callback=lambda: webbrowser.open('www.github.com/iholston/lol-bot'))
@@ -40,6 +48,7 @@ class AboutTab:
                     dpg.add_text("Open link in webbrowser")
             dpg.add_spacer()
             dpg.add_input_text(multiline=True, default_value=self._notes_text(), height=288, width=568, enabled=False)
+        threading.Thread(target=self.check_for_update, daemon=True).start()
 
     @staticmethod
     def _notes_text() -> str:
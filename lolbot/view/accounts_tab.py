@@ -2,29 +2,45 @@
 View tab that handles creation/editing of accounts
 """
 
+import sqlite3
 import subprocess
 import time
-import shutil
 import threading
 from typing import Any
 
 import dearpygui.dearpygui as dpg
+from lolbot.common import account_io
 from lolbot.common.config import Constants
-from lolbot.common.account import Account, AccountManager
+from lolbot.common.account import Account, SQLiteAccountManager
 
 
 class AccountsTab:
     """Class that creates the Accounts Tab and handles creation/editing of accounts"""
 
+    PAGE_SIZE = 25
+
     def __init__(self) -> None:
         self.id = None
-        self.am = AccountManager()
-        self.accounts = None
-        self.accounts_table = None
+        self.am = None  # opened when the tab is first shown
+        self.sorts = {
+            'Newest First': ('order', True),
+            'Oldest First': ('order', False),
+            'Highest Level': ('level', True),
+            'Lowest Level': ('level', False),
+            'Username': ('username', False)
+        }
+        self.sort = 'Newest First'
+        self.search = ''
+        self.below_level = None
+        self.rows = []
+        self.page = []
+        self.page_index = 0
+        self.total = 0
 
     def create_tab(self, parent: int) -> None:
         """Creates Accounts Tab"""
-        with dpg.tab(label="Accounts", parent=parent) as self.id:
+        self.am = SQLiteAccountManager()
+        with dpg.group(parent=parent) as self.id:
             dpg.add_text("Options")
             dpg.add_spacer()
             with dpg.theme(tag="clear_background"):
@@ -39,10 +55,21 @@ class AccountsTab:
                     dpg.add_button(label="Cancel", width=113, callback=lambda: dpg.configure_item("AccountSubmit", show=False))
             with dpg.group(horizontal=True):
                 dpg.add_button(label="Add New Account", width=184, callback=lambda: dpg.configure_item("AccountSubmit", show=True))
-                dpg.add_button(label="Show in File Explorer", width=184, callback=lambda: subprocess.Popen(f"explorer /select, {Constants.ACCOUNT_PATH}"))
+                dpg.add_button(label="Show in File Explorer", width=184, callback=lambda: subprocess.Popen(f"explorer /select, {Constants.ACCOUNT_DB_PATH}"))
                 dpg.add_button(tag="BackupButton", label="Create Backup", width=184, callback=self.create_backup)
                 with dpg.tooltip(dpg.last_item()):
-                    dpg.add_text("Creates a backup of the accounts.json file in the bak folder")
+                    dpg.add_text("Creates a backup of the accounts database in the bak folder")
+            with dpg.file_dialog(tag="ImportDialog", label="Import Accounts", show=False, width=500, height=300, callback=self.import_accounts):
+                dpg.add_file_extension(".csv")
+                dpg.add_file_extension(".jsonl")
+            with dpg.file_dialog(tag="ExportDialog", label="Export Accounts", show=False, width=500, height=300, default_filename="accounts", callback=self.export_accounts):
+                dpg.add_file_extension(".csv")
+                dpg.add_file_extension(".jsonl")
+            with dpg.group(horizontal=True):
+                dpg.add_button(tag="ImportButton", label="Import Accounts", width=184, callback=lambda: dpg.configure_item("ImportDialog", show=True))
+                with dpg.tooltip(dpg.last_item()):
+                    dpg.add_text("Adds accounts from a .csv file with username,password,level\nrows or a .jsonl file. Existing usernames are skipped")
+                dpg.add_button(tag="ExportButton", label="Export Accounts", width=184, callback=lambda: dpg.configure_item("ExportDialog", show=True))
             dpg.add_spacer()
             dpg.add_spacer()
             dpg.add_text("Accounts")
@@ -53,11 +80,14 @@ class AccountsTab:
             self.create_accounts_table()
 
     def create_accounts_table(self) -> None:
-        """Creates a table from account data"""
-        if self.accounts_table is not None:
-            dpg.delete_item(self.accounts_table)
-        self.accounts = self.am.get_all_accounts()
-        with dpg.group(parent=self.id) as self.accounts_table:
+        """Creates the search and paging controls and one reusable row of widgets per visible account"""
+        with dpg.group(parent=self.id):
+            with dpg.group(horizontal=True):
+                dpg.add_input_text(hint="Search username", width=184, callback=self._set_search)
+                dpg.add_combo(items=list(self.sorts.keys()), default_value=list(self.sorts.keys())[0], width=184, callback=self._set_sort)
+                dpg.add_input_int(tag="BelowLevelField", default_value=0, min_value=0, min_clamped=True, width=184, callback=self._set_below_level)
+                with dpg.tooltip(dpg.last_item()):
+                    dpg.add_text("Only show accounts below this level, 0 shows all")
             with dpg.group(horizontal=True):
                 dpg.add_input_text(default_value="      Username", width=147)
                 dpg.bind_item_theme(dpg.last_item(), "clear_background")
@@ -65,49 +95,115 @@ class AccountsTab:
                 dpg.bind_item_theme(dpg.last_item(), "clear_background")
                 dpg.add_input_text(default_value="        Level", width=147)
                 dpg.bind_item_theme(dpg.last_item(), "clear_background")
-            for acc in reversed(self.accounts):
-                with dpg.group(horizontal=True):
-                    dpg.add_button(label=acc['username'], width=147, callback=self.copy_2_clipboard)
-                    with dpg.tooltip(dpg.last_item()):
+            for i in range(AccountsTab.PAGE_SIZE):
+                with dpg.group(horizontal=True, show=False) as row:
+                    username = dpg.add_button(width=147, callback=self.copy_2_clipboard)
+                    with dpg.tooltip(username):
                         dpg.add_text("Copy")
-                    dpg.add_button(label=acc['password'], width=147, callback=self.copy_2_clipboard)
-                    with dpg.tooltip(dpg.last_item()):
+                    password = dpg.add_button(width=147, callback=self.copy_2_clipboard)
+                    with dpg.tooltip(password):
                         dpg.add_text("Copy")
-                    dpg.add_button(label=acc['level'], width=147)
-                    dpg.add_button(label="Edit", callback=self.edit_account_dialog, user_data=acc)
-                    dpg.add_button(label="Delete", callback=self.delete_account_dialog, user_data=acc)
+                    level = dpg.add_button(width=147)
+                    dpg.add_button(label="Edit", callback=self.edit_account_dialog, user_data=i)
+                    dpg.add_button(label="Delete", callback=self.delete_account_dialog, user_data=i)
+                self.rows.append((row, username, password, level))
+            with dpg.group(horizontal=True):
+                dpg.add_button(label="<", width=40, callback=lambda: self.show_page(self.page_index - 1))
+                dpg.add_text(tag="PageLabel")
+                dpg.add_button(label=">", width=40, callback=lambda: self.show_page(self.page_index + 1))
+        self.show_page(0)
+
+    def show_page(self, index: int) -> None:
+        """Loads one page of accounts from the store and fills the row widgets with it"""
+        self.total = self.am.count_accounts(self.search, self.below_level)
+        pages = max(1, -(-self.total // AccountsTab.PAGE_SIZE))
+        self.page_index = min(max(index, 0), pages - 1)
+        sort, descending = self.sorts[self.sort]
+        self.page = self.am.query_accounts(self.search, self.below_level, sort, descending,
+                                           self.page_index * AccountsTab.PAGE_SIZE, AccountsTab.PAGE_SIZE)
+        for i in range(AccountsTab.PAGE_SIZE):
+            if i < len(self.page):
+                self.update_row(i)
+            else:
+                dpg.configure_item(self.rows[i][0], show=False)
+        dpg.set_value("PageLabel", f"Page {self.page_index + 1} of {pages}, {self.total} accounts")
+
+    def update_row(self, i: int) -> None:
+        row, username, password, level = self.rows[i]
+        acc = self.page[i]
+        dpg.configure_item(username, label=acc['username'])
+        dpg.configure_item(password, label=acc['password'])
+        dpg.configure_item(level, label=acc['level'])
+        dpg.configure_item(row, show=True)
+
+    def refresh_accounts(self) -> None:
+        """Reloads the current page"""
+        if self.rows:
+            self.show_page(self.page_index)
+
+    def _set_search(self, sender: int) -> None:
+        self.search = dpg.get_value(sender).strip()
+        self.show_page(0)
+
+    def _set_sort(self, sender: int) -> None:
+        self.sort = dpg.get_value(sender)
+        self.show_page(0)
+
+    def _set_below_level(self, sender: int) -> None:
+        self.below_level = dpg.get_value(sender) or None
+        self.show_page(0)
 
     def add_account(self) -> None:
-        """Adds a new account to accounts.json and updates view"""
+        """Adds a new account and updates view"""
         dpg.configure_item("AccountSubmit", show=False)
         self.am.add_account(Account(dpg.get_value("UsernameField"), dpg.get_value("PasswordField"), dpg.get_value("LevelField")))
         dpg.configure_item("UsernameField", default_value="")
         dpg.configure_item("PasswordField", default_value="")
         dpg.configure_item("LevelField", default_value=False)
-        self.create_accounts_table()
+        self.refresh_accounts()
 
     def edit_account(self, sender, app_data, user_data: Any) -> None:
-        self.am.edit_account(user_data, Account(dpg.get_value("EditUsernameField"), dpg.get_value("EditPasswordField"), dpg.get_value("EditLevelField")))
-        dpg.delete_item("EditAccount")
-        self.create_accounts_table()
+        """Saves an edited account and updates its row in place"""
+        account = Account(dpg.get_value("EditUsernameField"), dpg.get_value("EditPasswordField"), dpg.get_value("EditLevelField"))
+        try:
+            self.am.edit_account(self.page[user_data]['username'], account)
+        except ValueError as e:
+            self.show_error("Edit Failed", str(e))
+            return
+        finally:
+            dpg.delete_item("EditAccount")
+        self.page[user_data] = {'username': account.username, 'password': account.password, 'level': account.level}
+        self.update_row(user_data)
+
+    @staticmethod
+    def show_error(title: str, message: str) -> None:
+        """Shows a message in a modal dialog"""
+        if dpg.does_item_exist("AccountError"):
+            dpg.delete_item("AccountError")
+        with dpg.window(label=title, modal=True, show=True, tag="AccountError", pos=[155, 130], on_close=lambda: dpg.delete_item("AccountError")):
+            dpg.add_text(message)
+            dpg.add_button(label="OK", width=75, callback=lambda: dpg.delete_item("AccountError"))
 
     def edit_account_dialog(self, sender, app_data, user_data: Any) -> None:
+        acc = self.page[user_data]
         with dpg.window(label="Edit Account", modal=True, show=True, tag="EditAccount", height=125, width=250, pos=[155, 110], on_close=lambda: dpg.delete_item("EditAccount")):
-            dpg.add_input_text(tag="EditUsernameField", default_value=user_data['username'], width=234)
-            dpg.add_input_text(tag="EditPasswordField", default_value=user_data['password'], width=234)
-            dpg.add_input_int(tag="EditLevelField", default_value=user_data['level'], width=234)
+            dpg.add_input_text(tag="EditUsernameField", default_value=acc['username'], width=234)
+            dpg.add_input_text(tag="EditPasswordField", default_value=acc['password'], width=234)
+            dpg.add_input_int(tag="EditLevelField", default_value=acc['level'], width=234)
             with dpg.group(horizontal=True):
-                dpg.add_button(label="Submit", width=113, callback=self.edit_account, user_data=user_data['username'])
+                dpg.add_button(label="Submit", width=113, callback=self.edit_account, user_data=user_data)
                 dpg.add_button(label="Cancel", width=113, callback=lambda: dpg.delete_item("EditAccount"))
 
     def delete_account(self, sender, app_data, user_data: Any) -> None:
-        self.am.delete_account(Account(user_data['username'], user_data['password'], user_data['level']))
+        """Deletes an account and refills the current page"""
+        acc = self.page[user_data]
+        self.am.delete_account(Account(acc['username'], acc['password'], acc['level']))
         dpg.delete_item("DeleteAccount")
-        self.create_accounts_table()
+        self.refresh_accounts()
 
     def delete_account_dialog(self, sender, app_data, user_data: Any) -> None:
         with dpg.window(label="Delete Account", modal=True, show=True, tag="DeleteAccount", pos=[125, 130], on_close=lambda: dpg.delete_item("DeleteAccount")):
-            dpg.add_text(f"Account: {user_data['username']} will be deleted")
+            dpg.add_text(f"Account: {self.page[user_data]['username']} will be deleted")
             dpg.add_separator()
             dpg.add_spacer()
             dpg.add_spacer()
@@ -116,13 +212,43 @@ class AccountsTab:
                 dpg.add_button(label="OK", width=140, callback=self.delete_account, user_data=user_data)
                 dpg.add_button(label="Cancel", width=140, callback=lambda: dpg.delete_item("DeleteAccount"))
 
-    @staticmethod
-    def create_backup(sender: int) -> None:
-        bak = f"{time.strftime('%Y%m%d-%H%M%S')}.json"
-        shutil.copyfile(Constants.ACCOUNT_PATH, f"{Constants.BAK_DIR}/{bak}")
+    def create_backup(self, sender: int) -> None:
+        bak = f"{time.strftime('%Y%m%d-%H%M%S')}.db"
+        self.am.backup(f"{Constants.BAK_DIR}/{bak}")
         dpg.configure_item("BackupButton", label="Backup Created!")
         threading.Timer(1, lambda: dpg.configure_item("BackupButton", label="Create Backup")).start()
 
+    def import_accounts(self, sender: int, app_data: dict) -> None:
+        """Imports the selected file in the background, shows progress on the import button"""
+        path = app_data['file_path_name']
+
+        def run() -> None:
+            try:
+                result = account_io.import_accounts(path, self.am, progress=lambda p: dpg.configure_item("ImportButton", label=f"Importing {p.fraction:.0%}"))
+                dpg.configure_item("ImportButton", label=f"Imported {result.added}")
+            except (OSError, ValueError, UnicodeDecodeError, sqlite3.Error):
+                dpg.configure_item("ImportButton", label="Import Failed")
+            finally:
+                self.refresh_accounts()  # batches written before a failure are kept
+                threading.Timer(2, lambda: dpg.configure_item("ImportButton", label="Import Accounts")).start()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def export_accounts(self, sender: int, app_data: dict) -> None:
+        """Exports all accounts to the selected file in the background"""
+        path = app_data['file_path_name']
+
+        def run() -> None:
+            try:
+                result = account_io.export_accounts(path, self.am, progress=lambda p: dpg.configure_item("ExportButton", label=f"Exported {p.read}"))
+                dpg.configure_item("ExportButton", label=f"Exported {result.read}")
+            except (OSError, sqlite3.Error):
+                dpg.configure_item("ExportButton", label="Export Failed")
+            finally:
+                threading.Timer(2, lambda: dpg.configure_item("ExportButton", label="Export Accounts")).start()
+
+        threading.Thread(target=run, daemon=True).start()
+
     @staticmethod
     def copy_2_clipboard(sender: int):
         subprocess.run("clip", text=True, input=dpg.get_item_label(sender))
@@ -3,24 +3,32 @@ View tab that handles bot controls and displays bot output
 """
 
 import os
+import json
+import time
+import asyncio
+import logging
 import multiprocessing
-import requests
 import threading
 from time import sleep
 
 import dearpygui.dearpygui as dpg
 
 from lolbot.common import utils, api
-from lolbot.common.config import ConfigRW
-from lolbot.bot.client import Client
+from lolbot.common.config import ConfigRW, Constants
 
 
 class BotTab:
     """Class that displays the BotTab and handles bot controls/output"""
 
+    INFO_INTERVAL = 2
+    PATCH_TTL = 6 * 60 * 60
+
     def __init__(self, message_queue: multiprocessing.Queue, terminate: threading.Event) -> None:
+        self.log = logging.getLogger(__name__)
         self.message_queue = message_queue
         self.connection = api.Connection()
+        self.game_connection = api.Connection()
+        self.game_connection.set_game_headers()
         self.lobbies = {
             'Draft Pick': 400,
             'Ranked Solo/Duo': 420,
@@ -38,10 +46,13 @@ class BotTab:
         self.config = ConfigRW()
         self.terminate = terminate
         self.bot_thread = None
+        self.info_thread = None
+        self.info = None
+        self.patch = None
 
     def create_tab(self, parent) -> None:
         """Creates Bot Tab"""
-        with dpg.tab(label="Bot", parent=parent) as self.status_tab:
+        with dpg.group(parent=parent) as self.status_tab:
             dpg.add_spacer()
             dpg.add_text(default_value="Controls")
             with dpg.group(horizontal=True):
@@ -55,7 +66,8 @@ class BotTab:
             dpg.add_spacer()
             dpg.add_text(default_value="Output")
             dpg.add_input_text(tag="Output", multiline=True, default_value="", height=162, width=568, enabled=False)
-        self.update_info_panel()
+        self.info_thread = threading.Thread(target=self.info_loop, daemon=True)
+        self.info_thread.start()
 
     def start_bot(self) -> None:
         """Starts bot process"""
@@ -65,6 +77,8 @@ class BotTab:
                 self.message_queue.put("League Installation Path is Invalid. Update Path to START")
                 return
             self.message_queue.put("Clear")
+            self.config.flush()  # the bot process reads the settings file, write pending edits first
+            from lolbot.bot.client import Client  # loaded on first start, the GUI does not need the bot modules
             self.bot_thread = multiprocessing.Process(target=Client, args=(self.message_queue,))
             self.bot_thread.start()
             dpg.configure_item("StartButton", label="Quit Bot")
@@ -94,80 +108,107 @@ class BotTab:
         self.message_queue.put('Closing League Processes')
         threading.Thread(target=utils.close_all_processes).start()
 
-    def update_info_panel(self) -> None:
-        """Updates info panel text"""
-        if not self.terminate.is_set() and not utils.is_league_running():
-            dpg.configure_item("Info", default_value="League is not running")
-        else:
-            if not self.terminate.is_set() and not os.path.exists(self.config.get_data('league_dir')):
-                self.message_queue.put("Clear")
-                self.message_queue.put("League Installation Path is Invalid. Update Path")
-                if not self.terminate.is_set():
-                    threading.Timer(2, self.update_info_panel).start()
+    def info_loop(self) -> None:
+        """Refreshes the info panel from a single background thread until the view closes"""
+        loop = asyncio.new_event_loop()
+        path_warned = False
+        while not self.terminate.is_set():
+            try:
+                league_running = utils.is_league_running()
+                if league_running and not os.path.exists(self.config.get_data('league_dir')):
+                    if not path_warned:
+                        self.message_queue.put("Clear")
+                        self.message_queue.put("League Installation Path is Invalid. Update Path")
+                        path_warned = True
                 else:
-                    self.stop_bot()
-                return
+                    path_warned = False
+                    msg = loop.run_until_complete(self.info_text()) if league_running else "League is not running"
+                    if msg != self.info and not self.terminate.is_set():
+                        dpg.configure_item("Info", default_value=msg)
+                        self.info = msg
+            except Exception as e:
+                self.log.warning(f"Could not refresh info panel: {e}")
+            self.terminate.wait(BotTab.INFO_INTERVAL)
+        loop.close()
+
+    async def info_text(self) -> str:
+        """Reads account, phase and game info concurrently and formats the info panel text"""
+        _account = ""
+        phase = ""
+        game_time = ""
+        champ = ""
+        level = ""
+        try:
+            self.connection.set_lcu_headers()
+        except (OSError, ValueError):
+            pass
+        summoner, gameflow, game = await asyncio.gather(
+            self.connection.request_async('get', '/lol-summoner/v1/current-summoner', policy=api.NO_RETRY),
+            self.connection.request_async('get', '/lol-gameflow/v1/gameflow-phase', policy=api.NO_RETRY),
+            self.game_connection.request_async('get', '/liveclientdata/allgamedata', timeout=2, policy=api.NO_RETRY),
+            return_exceptions=True)
+        try:
+            if not isinstance(summoner, Exception) and summoner.status_code == 200:
+                _account = summoner.json()['displayName']
+                level = f"{summoner.json()['summonerLevel']} - {summoner.json()['percentCompleteForNextLevel']} % to next level"
+            if not isinstance(gameflow, Exception) and gameflow.status_code == 200:
+                phase = gameflow.json()
+                if phase == 'None':
+                    phase = "In Main Menu"
+                elif phase == 'Matchmaking':
+                    phase = 'In Queue'
+                elif phase == 'Lobby':
+                    r = await self.connection.request_async('get', '/lol-lobby/v2/lobby', policy=api.NO_RETRY)
+                    for lobby, id in self.lobbies.items():
+                        if id == r.json()['gameConfig']['queueId']:
+                            phase = lobby + ' Lobby'
+        except Exception:
+            pass
+
+        if (not isinstance(game, Exception) and game.status_code == 200) or phase == "InProgress":
+            try:
+                game_data = game.json()
+                for player in game_data['allPlayers']:
+                    if player['summonerName'] == game_data['activePlayer']['summonerName'].split('#')[0]:
+                        champ = player['rawChampionName'].split('_')[-1]
+                game_time = utils.seconds_to_min_sec(game_data['gameData']['gameTime'])
+            except Exception:
+                pass
+            msg = f"Accnt: {_account}\n"
+            msg = msg + f"Phase: {phase}\n"
+            msg = msg + f"Time: {game_time}\n"
+            msg = msg + f"Champ: {champ}\n"
+            msg = msg + f"Level: {level}"
+        else:
+            msg = f"Accnt: {_account}\n"
+            msg = msg + f"Phase: {phase}\n"
+            patch = await asyncio.get_running_loop().run_in_executor(api.get_executor(), self.league_patch)
+            msg = msg + f"Patch: {patch}\n"
+            msg = msg + f"Level: {level}"
+        return msg
 
-            _account = ""
-            phase = ""
-            league_patch = ""
-            game_time = ""
-            champ = ""
-            level = ""
+    def league_patch(self) -> str:
+        """Returns the latest League patch, cached in memory and on disk for PATCH_TTL seconds"""
+        if self.patch is None and os.path.exists(Constants.PATCH_CACHE_PATH):
+            try:
+                with open(Constants.PATCH_CACHE_PATH, 'r') as f:
+                    self.patch = json.load(f)
+            except (OSError, ValueError):
+                pass
+            if not self.valid_patch(self.patch):
+                self.patch = None
+        if self.patch is None or time.time() - self.patch['fetched'] > BotTab.PATCH_TTL:
             try:
-                if not self.connection.headers:
-                    self.connection.set_lcu_headers()
-                r = self.connection.request('get', '/lol-summoner/v1/current-summoner')
-                if r.status_code == 200:
-                    _account = r.json()['displayName']
-                    level = f"{r.json()['summonerLevel']} - {r.json()['percentCompleteForNextLevel']} % to next level"
-                r = self.connection.request('get', '/lol-gameflow/v1/gameflow-phase')
-                if r.status_code == 200:
-                    phase = r.json()
-                    if phase == 'None':
-                        phase = "In Main Menu"
-                    elif phase == 'Matchmaking':
-                        phase = 'In Queue'
-                    elif phase == 'Lobby':
-                        r = self.connection.request('get', '/lol-lobby/v2/lobby')
-                        for lobby, id in self.lobbies.items():
-                            if id == r.json()['gameConfig']['queueId']:
-                                phase = lobby + ' Lobby'
-            except:
-                try:
-                    self.connection.set_lcu_headers()
-                except:
-                    pass
-            if utils.is_game_running() or phase == "InProgress":
-                try:
-                    response = requests.get('https://127.0.0.1:2999/liveclientdata/allgamedata', timeout=10, verify=False)
-                    if response.status_code == 200:
-                        for player in response.json()['allPlayers']:
-                            if player['summonerName'] == response.json()['activePlayer']['summonerName'].split('#')[0]:
-                                champ = player['rawChampionName'].split('_')[-1]
-                        game_time = utils.seconds_to_min_sec(response.json()['gameData']['gameTime'])
-                except:
-                    try:
-                        self.connection.set_lcu_headers()
-                    except:
-                        pass
-                msg = f"Accnt: {_account}\n"
-                msg = msg + f"Phase: {phase}\n"
-                msg = msg + f"Time: {game_time}\n"
-                msg = msg + f"Champ: {champ}\n"
-                msg = msg + f"Level: {level}"
-            else:
-                try:
-                    r = requests.get('http://ddragon.leagueoflegends.com/api/versions.json')
-                    league_patch = r.json()[0]
-                except:
-                    pass
-                msg = f"Accnt: {_account}\n"
-                msg = msg + f"Phase: {phase}\n"
-                msg = msg + f"Patch: {league_patch}\n"
-                msg = msg + f"Level: {level}"
-            if not self.terminate.is_set():
-                dpg.configure_item("Info", default_value=msg)
-
-        if not self.terminate.is_set():
-            threading.Timer(2, self.update_info_panel).start()
+                r = api.get_session().get('http://ddragon.leagueoflegends.com/api/versions.json', timeout=5)
+                self.patch = {'version': r.json()[0], 'fetched': time.time()}
+                with open(Constants.PATCH_CACHE_PATH, 'w') as f:
+                    json.dump(self.patch, f)
+            except Exception:
+                return self.patch['version'] if self.patch is not None else ""
+        return self.patch['version']
+
+    @staticmethod
+    def valid_patch(patch) -> bool:
+        """Whether a patch cache entry has the version string and fetch time league_patch needs"""
+        return isinstance(patch, dict) and isinstance(patch.get('version'), str) \
+            and isinstance(patch.get('fetched'), (int, float))
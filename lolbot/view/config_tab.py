@@ -8,6 +8,7 @@ import os
 import dearpygui.dearpygui as dpg
 
 from lolbot.common.config import ConfigRW, DefaultSettings
+from lolbot.common.scheduler import POLICIES
 
 
 class ConfigTab:
@@ -20,11 +21,18 @@ class ConfigTab:
             'Beginner': 880,
             'Intermediate': 890
         }
+        self.account_policies = {
+            'File Order': 'in_order',
+            'Closest to Max Level': 'closest',
+            'Round Robin': 'round_robin',
+            'Least Recently Played': 'lru',
+            'Weighted by Level': 'weighted'
+        }
         self.config = ConfigRW()
 
     def create_tab(self, parent: int) -> None:
         """Creates Settings Tab"""
-        with dpg.tab(label="Config", parent=parent) as self.id:
+        with dpg.group(parent=parent) as self.id:
             dpg.add_spacer()
             with dpg.group(horizontal=True):
                 dpg.add_button(label='Configuration', enabled=False, width=180)
@@ -44,6 +52,21 @@ class ConfigTab:
             with dpg.group(horizontal=True):
                 dpg.add_input_text(default_value='Account Max Level', width=180, enabled=False)
                 dpg.add_input_int(tag="MaxLevel", default_value=self.config.get_data('max_level'), min_value=0, step=1, width=380, callback=self._set_level)
+            with dpg.group(horizontal=True):
+                dpg.add_input_text(default_value='Account Order', width=180, enabled=False)
+                with dpg.tooltip(dpg.last_item()):
+                    dpg.add_text("Which account the bot levels next.\nCooldown is the minutes before a played\naccount is picked again, 0 to disable.")
+                policy = self.config.get_data('account_policy')
+                if policy not in POLICIES:
+                    policy = 'in_order'
+                dpg.add_combo(items=list(self.account_policies.keys()), default_value=list(self.account_policies.keys())[
+                    list(self.account_policies.values()).index(policy)], width=284, callback=self._set_account_policy)
+                dpg.add_input_int(default_value=self.config.get_data('account_cooldown'), min_value=0, min_clamped=True, step=0, width=90, callback=self._set_account_cooldown)
+            with dpg.group(horizontal=True):
+                dpg.add_input_text(default_value='Account Coordinator', width=180, enabled=False)
+                with dpg.tooltip(dpg.last_item()):
+                    dpg.add_text("URL of an account coordinator shared by several bots,\ne.g. http://192.168.1.10:8420. Leave blank to use\nthe accounts on this computer.")
+                dpg.add_input_text(default_value=self.config.get_data('coordinator'), hint="http://host:8420", width=380, callback=self._set_coordinator)
             with dpg.group(horizontal=True):
                 dpg.add_input_text(default_value='Champ Pick Order', width=180, enabled=False)
                 with dpg.tooltip(dpg.last_item()):
@@ -114,6 +137,18 @@ class ConfigTab:
         """Sets account max level"""
         self.config.set_data('max_level', dpg.get_value(sender))
 
+    def _set_account_policy(self, sender: int) -> None:
+        """Sets the account scheduling policy"""
+        self.config.set_data('account_policy', self.account_policies.get(dpg.get_value(sender)))
+
+    def _set_account_cooldown(self, sender: int) -> None:
+        """Sets minutes before a played account is picked again"""
+        self.config.set_data('account_cooldown', dpg.get_value(sender))
+
+    def _set_coordinator(self, sender: int) -> None:
+        """Sets the account coordinator url"""
+        self.config.set_data('coordinator', dpg.get_value(sender).strip())
+
     def _set_champs(self, sender: int) -> None:
         """Sets champ pick order"""
         x = dpg.get_value(sender)
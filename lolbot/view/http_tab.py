@@ -21,7 +21,7 @@ class HTTPTab:
 
     def create_tab(self, parent: int) -> None:
         """Creates the HTTPTab"""
-        with dpg.tab(label="HTTP", parent=parent) as self.id:
+        with dpg.group(parent=parent) as self.id:
             dpg.add_text("Method:")
             dpg.add_combo(tag='Method', items=self.methods, default_value='GET', width=569)
             dpg.add_text("URL:")
@@ -75,7 +75,7 @@ class HTTPTab:
             dpg.configure_item('ResponseOutput', default_value='League of Legends is not running')
             return
         try:
-            r = self.connection.request(dpg.get_value('Method').lower(), dpg.get_value('URL').strip(), data=dpg.get_value('Body').strip())
+            r = self.connection.request(dpg.get_value('Method').lower(), dpg.get_value('URL').strip(), data=dpg.get_value('Body').strip(), cache=False)
             dpg.configure_item('StatusOutput', label=r.status_code)
             dpg.configure_item('ResponseOutput', default_value=json.dumps(r.json(), indent=4))
         except Exception as e:
@@ -21,7 +21,7 @@ class LogsTab:
 
     def create_tab(self, parent) -> None:
         """Creates Log Tab"""
-        with dpg.tab(label="Logs", parent=parent) as self.id:
+        with dpg.group(parent=parent) as self.id:
             with dpg.window(label="Delete Files", modal=True, show=False, tag="DeleteFiles", pos=[115, 130]):
                 dpg.add_text("All files in the logs folder will be deleted")
                 dpg.add_separator()
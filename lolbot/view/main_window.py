@@ -9,9 +9,7 @@ import multiprocessing
 
 import dearpygui.dearpygui as dpg
 
-from lolbot.common import api
 from lolbot.common import utils
-from lolbot.common.account import AccountManager
 from lolbot.common.config import Constants
 from lolbot.view.bot_tab import BotTab
 from lolbot.view.accounts_tab import AccountsTab
@@ -26,18 +24,16 @@ class MainWindow:
     """Class that displays the view"""
 
     def __init__(self, width: int, height: int) -> None:
-        multiprocessing.freeze_support()  # https://stackoverflow.com/questions/24944558/pyinstaller-built-windows-exe-fails-with-multiprocessing
         Constants.create_dirs()
 
-        self.account_manager = AccountManager()
-        self.accounts = self.account_manager.get_all_accounts()
         self.message_queue = multiprocessing.Queue()
         self.output_queue = []
-        self.connection = api.Connection()
         self.width = width
         self.height = height
         self.terminate = threading.Event()
         self.tab_bar = None
+        self.tabs = {}  # tab id -> view
+        self.pending = {}  # tab id -> view whose contents are built on first selection
         self.bot_tab = BotTab(self.message_queue, self.terminate)
         self.accounts_tab = AccountsTab()
         self.config_tab = ConfigTab()
@@ -57,13 +53,13 @@ class MainWindow:
                     dpg.add_theme_color(dpg.mvThemeCol_ButtonHovered, [29, 151, 236, 25])
                     dpg.add_theme_color(dpg.mvThemeCol_Text, [29, 151, 236])
             with dpg.tab_bar(callback=self._tab_selected) as self.tab_bar:
-                self.bot_tab.create_tab(self.tab_bar)
-                self.accounts_tab.create_tab(self.tab_bar)
-                self.config_tab.create_tab(self.tab_bar)
-                self.https_tab.create_tab(self.tab_bar)
-                self.logs_tab.create_tab(self.tab_bar)
-                self.about_tab.create_tab(self.tab_bar)
-                self.debug_tab.create_tab(self.tab_bar)
+                for label, view in (('Bot', self.bot_tab), ('Accounts', self.accounts_tab), ('Config', self.config_tab),
+                                    ('HTTP', self.https_tab), ('Logs', self.logs_tab), ('About', self.about_tab),
+                                    ('Debug', self.debug_tab)):
+                    tab = dpg.add_tab(label=label)
+                    self.tabs[tab] = view
+                    self.pending[tab] = view
+            self._build_tab(next(iter(self.tabs)))
         dpg.create_viewport(title='LoL Bot', width=self.width, height=self.height, small_icon=utils.resource_path(Constants.ICON_PATH), resizable=False)
         dpg.setup_dearpygui()
         dpg.show_viewport()
@@ -75,12 +71,23 @@ class MainWindow:
         self.terminate.set()
         dpg.destroy_context()
 
+    def _build_tab(self, tab: int) -> bool:
+        """Creates the contents of a tab the first time it is shown, returns whether they were created now"""
+        view = self.pending.pop(tab, None)
+        if view is None:
+            return False
+        view.create_tab(tab)
+        return True
+
     def _tab_selected(self, sender, app_data, user_data) -> None:
         """Callback for tab select"""
-        if app_data == self.logs_tab.id:
+        if self._build_tab(app_data):
+            return  # freshly built tabs show current data
+        view = self.tabs.get(app_data)
+        if view is self.logs_tab:
             self.logs_tab.create_log_table()
-        if app_data == self.accounts_tab.id:
-            self.accounts_tab.create_accounts_table()
+        if view is self.accounts_tab:
+            self.accounts_tab.refresh_accounts()
 
     def _gui_updater(self) -> None:
         """Updates view each frame, displays up-to-date bot info"""
@@ -1,6 +1,8 @@
-from lolbot.view.main_window import MainWindow
+import multiprocessing
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # https://stackoverflow.com/questions/24944558/pyinstaller-built-windows-exe-fails-with-multiprocessing
+    from lolbot.view.main_window import MainWindow  # imported here so bot processes do not load the GUI
     gui: MainWindow = MainWindow(600, 420)
     gui.show()
@@ -0,0 +1,25 @@
+"""
+Shared test setup. The bot's config paths live under LOCALAPPDATA, point it at a scratch folder before lolbot is imported
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['LOCALAPPDATA'] = tempfile.mkdtemp(prefix='lolbot-tests-')
+
+from lolbot.common import clock  # noqa: E402
+from lolbot.common.config import Constants  # noqa: E402
+
+Constants.create_dirs()
+
+
+@pytest.fixture
+def fast_clock():
+    """Shortens bot sleeps and timeouts so waits in the code under test take milliseconds"""
+    clock.set_scale(100)
+    yield
+    clock.set_scale(1.0)
@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+
+from lolbot.common.account import Account, SQLiteAccountManager
+from lolbot.common.config import Constants
+
+
+@pytest.fixture
+def legacy_json(tmp_path, monkeypatch):
+    path = os.path.join(tmp_path, 'accounts.json')
+    monkeypatch.setattr(Constants, 'ACCOUNT_PATH', path)
+
+    def write(data) -> None:
+        with open(path, 'w') as f:
+            json.dump(data, f)
+    return write
+
+
+def test_migration_imports_legacy_accounts(tmp_path, legacy_json):
+    legacy_json({'accounts': [{'username': 'alpha', 'password': 'a', 'level': 12}, {'username': 'bravo', 'password': 'b'}]})
+    store = SQLiteAccountManager(os.path.join(tmp_path, 'accounts.db'))
+    assert store.get_all_accounts() == [{'username': 'alpha', 'password': 'a', 'level': 12},
+                                        {'username': 'bravo', 'password': 'b', 'level': 0}]
+
+
+def test_migration_skips_malformed_entries(tmp_path, legacy_json):
+    legacy_json({'accounts': [{'username': 'alpha'}, 'bravo', None, {'username': 'charlie', 'password': 'c', 'level': 'x'},
+                              {'username': 'delta', 'password': 'd', 'level': 3}]})
+    path = os.path.join(tmp_path, 'accounts.db')
+    assert [a['username'] for a in SQLiteAccountManager(path).get_all_accounts()] == ['delta']
+    store = SQLiteAccountManager(path)
+    store.add_account(Account('echo', 'e', 0))
+    assert [a['username'] for a in store.get_all_accounts()] == ['delta', 'echo']
+
+
+def test_migration_ignores_a_file_without_an_account_list(tmp_path, legacy_json):
+    legacy_json({'accounts': {'username': 'alpha'}})
+    assert SQLiteAccountManager(os.path.join(tmp_path, 'accounts.db')).get_all_accounts() == []
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteAccountManager(os.path.join(tmp_path, 'accounts.db'))
+
+
+def test_add_account_ignores_an_existing_username(store):
+    store.add_account(Account('alpha', 'a', 1))
+    store.add_account(Account('alpha', 'other', 9))
+    assert store.get_all_accounts() == [{'username': 'alpha', 'password': 'a', 'level': 1}]
+    assert store.add_accounts([Account('alpha', 'a', 1), Account('bravo', 'b', 2)]) == 1
+
+
+def test_get_account_returns_the_first_added_below_max_level(store):
+    store.add_accounts([Account('alpha', 'a', 30), Account('bravo', 'b', 12), Account('charlie', 'c', 3)])
+    assert store.get_account(30) == Account('bravo', 'b', 12)
+    store.set_account_as_leveled(Account('bravo', 'b', 12), 30)
+    assert store.get_account(30) == Account('charlie', 'c', 3)
+    assert store.get_account(3) == Account('', '', 0)
+
+
+def test_edit_account_renames_and_updates(store):
+    store.add_accounts([Account('alpha', 'a', 1), Account('bravo', 'b', 2)])
+    store.edit_account('alpha', Account('alpha2', 'new', 5))
+    assert store.get_all_accounts()[0] == {'username': 'alpha2', 'password': 'new', 'level': 5}
+
+
+def test_edit_account_to_an_existing_username_raises_value_error(store):
+    store.add_accounts([Account('alpha', 'a', 1), Account('bravo', 'b', 2)])
+    with pytest.raises(ValueError, match='bravo'):
+        store.edit_account('alpha', Account('bravo', 'a', 1))
+    assert [a['username'] for a in store.get_all_accounts()] == ['alpha', 'bravo']
+    store.add_account(Account('charlie', 'c', 3))
+    assert len(store.get_all_accounts()) == 3
+
+
+@pytest.fixture
+def accounts(store):
+    store.add_accounts([Account('mid_laner', 'p', 12), Account('adc', 'p', 30), Account('mid_main', 'p', 3),
+                        Account('support', 'p', 12), Account('middle', 'p', 20), Account('jungle', 'p', 0)])
+    return store
+
+
+def usernames(rows: list) -> list:
+    return [row['username'] for row in rows]
+
+
+def test_query_without_filters_pages_in_insertion_order(accounts):
+    assert usernames(accounts.query_accounts(limit=4)) == ['mid_laner', 'adc', 'mid_main', 'support']
+    assert usernames(accounts.query_accounts(offset=4, limit=4)) == ['middle', 'jungle']
+    assert accounts.query_accounts(offset=6) == []
+    assert accounts.count_accounts() == 6
+
+
+def test_query_searches_by_username_prefix(accounts):
+    assert usernames(accounts.query_accounts('mid')) == ['mid_laner', 'mid_main', 'middle']
+    assert usernames(accounts.query_accounts('mid_')) == ['mid_laner', 'mid_main']
+    assert accounts.count_accounts('mid') == 3
+    assert accounts.count_accounts('top') == 0
+
+
+def test_query_filters_below_a_level(accounts):
+    assert usernames(accounts.query_accounts(below_level=12)) == ['mid_main', 'jungle']
+    assert accounts.count_accounts(below_level=30) == 5
+    assert usernames(accounts.query_accounts('mid', below_level=20)) == ['mid_laner', 'mid_main']
+    assert accounts.count_accounts('mid', below_level=20) == 2
+
+
+def test_query_sorts_by_level_then_insertion_order(accounts):
+    assert usernames(accounts.query_accounts(sort='level')) == ['jungle', 'mid_main', 'mid_laner', 'support', 'middle', 'adc']
+    assert usernames(accounts.query_accounts(sort='level', descending=True, limit=3)) == ['adc', 'middle', 'support']
+
+
+def test_query_sorts_by_username(accounts):
+    assert usernames(accounts.query_accounts(sort='username', limit=3)) == ['adc', 'jungle', 'mid_laner']
+    assert usernames(accounts.query_accounts(sort='username', descending=True, offset=1, limit=2)) == ['middle', 'mid_main']
+
+
+def test_query_with_an_unknown_sort_uses_insertion_order(accounts):
+    assert usernames(accounts.query_accounts(sort='password; DROP TABLE accounts', limit=2)) == ['mid_laner', 'adc']
+
+
+def test_query_rows_include_password_and_level(accounts):
+    assert accounts.query_accounts('adc') == [{'username': 'adc', 'password': 'p', 'level': 30}]
@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from lolbot.common.account import Account, SQLiteAccountManager
+from lolbot.common.account_io import export_accounts, import_accounts, parse_csv_row, parse_json_line
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteAccountManager(os.path.join(tmp_path, 'accounts.db'))
+
+
+def write(path: str, text: str) -> str:
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    return path
+
+
+def test_csv_import_skips_header_blank_and_invalid_rows(tmp_path, store):
+    path = write(os.path.join(tmp_path, 'accounts.csv'),
+                 '\ufeffusername,password,level\r\nalpha,a,12\r\n\r\nbravo,b\r\n,nobody,3\r\ncharlie,c,high\r\n"del,ta",d,4\r\n')
+    result = import_accounts(path, store)
+    assert (result.read, result.added, result.duplicates, result.invalid) == (5, 3, 0, 2)
+    assert store.get_all_accounts() == [{'username': 'alpha', 'password': 'a', 'level': 12},
+                                        {'username': 'bravo', 'password': 'b', 'level': 0},
+                                        {'username': 'del,ta', 'password': 'd', 'level': 4}]
+
+
+def test_jsonl_import_skips_invalid_lines(tmp_path, store):
+    lines = [{'username': 'alpha', 'password': 'a', 'level': 3}, {'username': 'bravo', 'password': 'b'}, 'not json',
+             {'username': 'charlie'}, [1, 2]]
+    path = write(os.path.join(tmp_path, 'accounts.jsonl'),
+                 '\n'.join(line if isinstance(line, str) else json.dumps(line) for line in lines) + '\n\n')
+    result = import_accounts(path, store)
+    assert (result.read, result.added, result.invalid) == (5, 2, 3)
+    assert [a['username'] for a in store.get_all_accounts()] == ['alpha', 'bravo']
+
+
+def test_import_counts_duplicates_in_the_file_and_the_store(tmp_path, store):
+    store.add_account(Account('alpha', 'old', 20))
+    path = write(os.path.join(tmp_path, 'accounts.csv'), 'alpha,a,1\nbravo,b,2\nbravo,b2,3\ncharlie,c,3\n')
+    result = import_accounts(path, store, batch_size=2)
+    assert (result.read, result.added, result.duplicates) == (4, 2, 2)
+    assert store.get_all_accounts() == [{'username': 'alpha', 'password': 'old', 'level': 20},
+                                        {'username': 'bravo', 'password': 'b', 'level': 2},
+                                        {'username': 'charlie', 'password': 'c', 'level': 3}]
+
+
+def test_import_reports_progress_after_every_batch(tmp_path, store):
+    path = write(os.path.join(tmp_path, 'accounts.csv'), ''.join(f'user{i},p,{i}\n' for i in range(25)))
+    reports = []
+    import_accounts(path, store, batch_size=10, progress=lambda p: reports.append((p.added, p.fraction)))
+    assert [added for added, _ in reports] == [10, 20, 25]
+    assert reports[-1][1] == 1.0
+    assert all(0 < fraction <= 1 for _, fraction in reports)
+
+
+@pytest.mark.parametrize('name', ['accounts.csv', 'accounts.jsonl'])
+def test_export_then_import_round_trips(tmp_path, store, name):
+    accounts = [Account('alpha', 'pa,ss"word', 1), Account('bravo', 'b', 30), Account('ünïcode', 'c', 0)]
+    store.add_accounts(accounts)
+    path = os.path.join(tmp_path, name)
+    assert export_accounts(path, store).read == 3
+    copy = SQLiteAccountManager(os.path.join(tmp_path, 'copy.db'))
+    assert import_accounts(path, copy).added == 3
+    assert copy.get_all_accounts() == store.get_all_accounts()
+
+
+def test_export_streams_in_batches(tmp_path, store):
+    store.add_accounts([Account(f'user{i:04}', 'p', i % 30) for i in range(2500)])
+    assert [a.username for a in store.iter_accounts(batch_size=1000)][::1000] == ['user0000', 'user1000', 'user2000']
+    path = os.path.join(tmp_path, 'accounts.csv')
+    export_accounts(path, store)
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines[0] == 'username,password,level'
+    assert len(lines) == 2501
+
+
+def test_row_parsers():
+    assert parse_csv_row([' alpha ', 'a', ' 5 ']) == Account('alpha', 'a', 5)
+    assert parse_csv_row(['alpha']) is None
+    assert parse_json_line('{"username": 1, "password": 2}') == Account('1', '2', 0)
+    assert parse_json_line('{"username": "a", "password": "b", "level": "x"}') is None
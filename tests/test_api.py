@@ -0,0 +1,318 @@
+import os
+import socket
+import time
+
+import pytest
+import requests
+
+from lolbot.common import api
+from lolbot.sim.simulator import LeagueSimulator, Timeline
+
+SUMMONER = '/lol-summoner/v1/current-summoner'
+CONVERSATIONS = '/lol-chat/v1/conversations'
+CHAT_ME = '/lol-chat/v1/me'
+
+
+def start_simulator(tmp_path) -> LeagueSimulator:
+    """A simulator with the League Client running and its lockfile written"""
+    sim = LeagueSimulator(Timeline(), os.path.join(tmp_path, 'rc', 'lockfile'), os.path.join(tmp_path, 'lcu', 'lockfile'))
+    sim.start()
+    sim.launch([])
+    sim.logged_in = True
+    sim.launch([])
+    return sim
+
+
+def lcu_connection(lockfile_path: str) -> api.Connection:
+    connection = api.Connection()
+    connection.client_type = 'lcu'
+    connection.host = api.Connection.LCU_HOST
+    connection.client_username = api.Connection.LCU_USERNAME
+    connection.use_lockfile(lockfile_path)
+    return connection
+
+
+@pytest.fixture(scope='module')
+def running_sim(tmp_path_factory):
+    sim = start_simulator(tmp_path_factory.mktemp('sim'))
+    yield sim
+    sim.stop()
+
+
+@pytest.fixture
+def sim(running_sim):
+    running_sim.requests.clear()
+    api.response_cache.invalidate()
+    return running_sim
+
+
+@pytest.fixture
+def lcu(sim):
+    return lcu_connection(sim.league_lockfile)
+
+
+def sent(sim: LeagueSimulator, method: str, path: str) -> int:
+    return sim.requests[f'lcu {method} {path}']
+
+
+def response(status: int, body: bytes = b'', headers: dict = None) -> requests.Response:
+    r = requests.Response()
+    r.status_code = status
+    r._content = body
+    r.headers.update(headers or {})
+    return r
+
+
+def test_get_is_served_from_cache_within_ttl(sim, lcu):
+    first = lcu.request('get', SUMMONER)
+    assert first.json()['displayName'] == 'bot'
+    assert lcu.request('get', SUMMONER) is first
+    assert sent(sim, 'GET', SUMMONER) == 1
+    lcu.request('get', SUMMONER, cache=False)
+    assert sent(sim, 'GET', SUMMONER) == 2
+
+
+def test_expired_entry_is_requested_again(sim, lcu, monkeypatch):
+    monkeypatch.setitem(api.CACHE_TTLS, SUMMONER, 0)
+    lcu.request('get', SUMMONER)
+    lcu.request('get', SUMMONER)
+    assert sent(sim, 'GET', SUMMONER) == 2
+
+
+def test_uncached_endpoints_are_always_sent(sim, lcu):
+    lcu.request('get', '/lol-gameflow/v1/gameflow-phase')
+    lcu.request('get', '/lol-gameflow/v1/gameflow-phase')
+    assert sent(sim, 'GET', '/lol-gameflow/v1/gameflow-phase') == 2
+
+
+def test_write_invalidates_cached_entries_on_its_path(sim, lcu):
+    lcu.request('get', CONVERSATIONS)
+    lcu.request('get', CHAT_ME)
+    lcu.request('post', f'{CONVERSATIONS}/champ-select/messages', data={'body': 'mid'})
+    lcu.request('get', CONVERSATIONS)
+    lcu.request('get', CHAT_ME)
+    assert sent(sim, 'GET', CONVERSATIONS) == 2
+    assert sent(sim, 'GET', CHAT_ME) == 1
+
+
+def test_cache_keys_include_the_client_address():
+    cache = api.ResponseCache()
+    cache.put(('127.0.0.1', '1000', CHAT_ME, ''), response(200), 30)
+    assert cache.get(('127.0.0.1', '2000', CHAT_ME, '')) is None
+    cache.invalidate('/lol-chat/v1')
+    assert cache.get(('127.0.0.1', '1000', CHAT_ME, '')) is None
+
+
+def test_expired_entry_is_revalidated_with_its_etag(lcu, monkeypatch):
+    monkeypatch.setitem(api.CACHE_TTLS, SUMMONER, 0)
+    sent_headers = []
+    replies = [response(200, b'{"displayName": "bot"}', {'ETag': '"v1"', 'Last-Modified': 'Sat, 17 Oct 2026 10:00:00 GMT'}),
+               response(304), response(200, b'{"displayName": "renamed"}', {'ETag': '"v2"'})]
+
+    def transmit(method, path, query, url, data, headers, timeout) -> requests.Response:
+        sent_headers.append(headers)
+        return replies.pop(0)
+
+    monkeypatch.setattr(lcu, '_transmit', transmit)
+    first = lcu.request('get', SUMMONER)
+    assert 'If-None-Match' not in sent_headers[0]
+    revalidated = api.metrics['cache.revalidated']
+    assert lcu.request('get', SUMMONER) is first
+    assert sent_headers[1]['If-None-Match'] == '"v1"'
+    assert sent_headers[1]['If-Modified-Since'] == 'Sat, 17 Oct 2026 10:00:00 GMT'
+    assert sent_headers[1]['Authorization'] == lcu.headers['Authorization']
+    assert api.metrics['cache.revalidated'] == revalidated + 1
+    assert lcu.request('get', SUMMONER).json() == {'displayName': 'renamed'}
+    assert sent_headers[2]['If-None-Match'] == '"v1"'
+
+
+def test_error_responses_are_not_cached(lcu, monkeypatch):
+    replies = [response(404, b'{}'), response(200, b'{"displayName": "bot"}')]
+    monkeypatch.setattr(lcu, '_transmit', lambda *args: replies.pop(0))
+    assert lcu.request('get', SUMMONER).status_code == 404
+    assert lcu.request('get', SUMMONER).status_code == 200
+
+
+class Flaky:
+    """Callable that returns or raises the given results in order"""
+
+    def __init__(self, *results) -> None:
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_retry_until_the_result_is_accepted(fast_clock):
+    func = Flaky(503, 503, 200)
+    policy = api.RetryPolicy('test', attempts=5, base_delay=0.01)
+    assert policy.run(func, lambda status: status == 200) == 200
+    assert func.calls == 3
+
+
+def test_retry_returns_the_last_result_when_attempts_run_out(fast_clock):
+    func = Flaky(503, 502, 504)
+    assert api.RetryPolicy('test', attempts=3, base_delay=0.01).run(func, lambda status: status == 200) == 504
+
+
+def test_retry_reraises_the_last_error(fast_clock):
+    error = requests.exceptions.ConnectionError('refused')
+    func = Flaky(requests.exceptions.Timeout(), error)
+    with pytest.raises(requests.exceptions.ConnectionError) as raised:
+        api.RetryPolicy('test', attempts=2, base_delay=0.01).run(func)
+    assert raised.value is error
+
+
+def test_retry_treats_an_unreadable_response_as_not_accepted(fast_clock):
+    func = Flaky({}, {'state': 'SUCCEEDED'})
+    result = api.RetryPolicy('test', attempts=2, base_delay=0.01).run(func, lambda r: r['state'] == 'SUCCEEDED')
+    assert result == {'state': 'SUCCEEDED'}
+
+
+def test_open_circuit_is_not_retried():
+    func = Flaky(api.CircuitOpenError('open'), 200)
+    with pytest.raises(api.CircuitOpenError):
+        api.RetryPolicy('test', attempts=5).run(func)
+    assert func.calls == 1
+
+
+def test_no_retry_starts_after_the_deadline(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(api, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(api, 'sleep', lambda seconds: now.__setitem__(0, now[0] + seconds))
+    func = Flaky(*[503] * 10)
+    api.RetryPolicy('test', attempts=10, base_delay=1.0, max_delay=1.0, jitter=0, deadline=2.5).run(func, lambda s: s == 200)
+    assert func.calls == 3
+
+
+def test_backoff_doubles_up_to_max_delay():
+    policy = api.RetryPolicy('test', base_delay=0.25, max_delay=1.0, jitter=0)
+    assert [policy.delay(attempt) for attempt in range(4)] == [0.25, 0.5, 1.0, 1.0]
+    jittered = api.RetryPolicy('test', base_delay=1.0, jitter=0.25)
+    assert all(0.75 <= jittered.delay(0) <= 1.25 for _ in range(20))
+
+
+def open_breaker(breaker: api.CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = api.CircuitBreaker('test', failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == api.CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == api.CircuitBreaker.OPEN
+    with pytest.raises(api.CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_breaker_lets_a_single_trial_through():
+    breaker = api.CircuitBreaker('test', failure_threshold=2, reset_timeout=0.05)
+    open_breaker(breaker)
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == api.CircuitBreaker.HALF_OPEN
+    with pytest.raises(api.CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == api.CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_trial_opens_the_breaker_again():
+    breaker = api.CircuitBreaker('test', failure_threshold=2, reset_timeout=0.05)
+    open_breaker(breaker)
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == api.CircuitBreaker.OPEN
+    with pytest.raises(api.CircuitOpenError):
+        breaker.before_call()
+
+
+def test_trial_that_never_reports_back_is_replaced():
+    breaker = api.CircuitBreaker('test', failure_threshold=2, reset_timeout=0.05)
+    open_breaker(breaker)
+    time.sleep(0.06)
+    breaker.before_call()
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == api.CircuitBreaker.HALF_OPEN
+
+
+def test_connection_fails_fast_once_the_client_is_down(tmp_path):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    path = os.path.join(tmp_path, 'lockfile')
+    with open(path, 'w') as f:
+        f.write(f'LeagueClient:1:{port}:secret:http')
+    connection = lcu_connection(path)
+    for _ in range(connection.breaker_threshold):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            connection.request('get', CHAT_ME, timeout=1)
+    with pytest.raises(api.CircuitOpenError):
+        connection.request('get', CHAT_ME, timeout=1)
+
+
+def pooled(connection: api.Connection) -> list:
+    pools = api.get_session().get_adapter(f'{connection.protocol}://').poolmanager.pools
+    return [key for key in pools.keys() if key.key_port == int(connection.port)]
+
+
+def test_connections_share_one_pooled_session(sim, lcu):
+    other = api.Connection()
+    assert other.session is lcu.session is api.get_session()
+    adapter = api.get_session().get_adapter('https://')
+    assert adapter is api.get_session().get_adapter('http://')
+    assert adapter._pool_connections == api.POOL_CONNECTIONS
+    assert adapter._pool_maxsize == api.POOL_MAXSIZE
+
+
+def test_close_pool_drops_sockets_to_an_address(sim, lcu):
+    lcu.request('get', CHAT_ME)
+    assert len(pooled(lcu)) == 1
+    api.close_pool(lcu.protocol, lcu.host, lcu.port)
+    assert pooled(lcu) == []
+    assert lcu.request('get', CHAT_ME).status_code == 200
+
+
+def rewrite(path: str, text: str, mtime: int) -> None:
+    with open(path, 'w') as f:
+        f.write(text)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_connection_follows_a_restarted_client(sim, lcu, tmp_path):
+    path = os.path.join(tmp_path, 'lockfile')
+    with open(sim.league_lockfile) as f:
+        running = f.read()
+    rewrite(path, running, 1_000_000_000)
+    connection = lcu_connection(path)
+    connection.request('get', CHAT_ME)
+    old = pooled(connection)
+    assert old
+
+    rewrite(path, running[:10], 2_000_000_000)  # client still writing the lockfile
+    connection.refresh()
+    assert connection.port == lcu.port
+
+    procname, pid, port, password, protocol = running.split(':')
+    rewrite(path, ':'.join([procname, pid, str(int(port) + 1), password, protocol]), 3_000_000_000)
+    connection.refresh()
+    assert connection.port == str(int(port) + 1)
+    assert old[0] not in api.get_session().get_adapter('http://').poolmanager.pools.keys()
+
+    rewrite(path, running, 4_000_000_000)
+    assert connection.request('get', CHAT_ME).status_code == 200
+    assert connection.port == lcu.port
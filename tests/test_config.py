@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+
+import pytest
+
+from lolbot.common.config import ConfigStore, DefaultSettings, coerce
+
+
+def read(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def write(path: str, settings: dict) -> None:
+    """Edits the file like another process would"""
+    with open(path, 'w') as f:
+        json.dump(settings, f)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = os.path.join(tmp_path, 'configs.json')
+    write(path, {'max_level': 30, 'lobby': 880})
+    return path
+
+
+@pytest.fixture
+def store(path):
+    store = ConfigStore(path)
+    store.DEBOUNCE = 0.05
+    store.POLL = 0.02
+    yield store
+    store.flush()
+
+
+def count_writes(store: ConfigStore) -> list:
+    writes = []
+    write_file = store._write
+
+    def counted(settings: dict) -> None:
+        write_file(settings)
+        writes.append(dict(settings))
+    store._write = counted
+    return writes
+
+
+def test_empty_file_gets_the_defaults(tmp_path):
+    path = os.path.join(tmp_path, 'configs.json')
+    open(path, 'w').close()
+    store = ConfigStore(path)
+    store.flush()
+    assert read(path)['max_level'] == DefaultSettings.MAX_LEVEL
+    assert read(path)['dialog'] == DefaultSettings.DIALOG
+
+
+def test_updates_are_visible_at_once_and_written_together_after_the_debounce(store, path):
+    writes = count_writes(store)
+    store.DEBOUNCE = 0.3
+    store.update({'max_level': 10})
+    timer = store.timer
+    store.update({'lobby': 850})
+    store.update({'max_level': 20})
+    assert store.timer is timer
+    assert store.get('max_level') == 20
+    assert read(path) == {'max_level': 30, 'lobby': 880}
+    timer.join(2)
+    assert len(writes) == 1
+    assert read(path) == {'max_level': 20, 'lobby': 850}
+
+
+def test_flush_writes_pending_changes_now(store, path):
+    store.update({'max_level': 12})
+    store.flush()
+    assert read(path)['max_level'] == 12
+    assert store.timer is None
+
+
+def test_failed_write_leaves_the_file_intact(store, path, monkeypatch):
+    def disk_full(settings: dict, f, **kwargs) -> None:
+        f.write('{"max_level": ')
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(json, 'dump', disk_full)
+    store.update({'champs': [1, 2]})
+    store.flush()
+    assert read(path) == {'max_level': 30, 'lobby': 880}
+    assert os.listdir(os.path.dirname(path)) == ['configs.json']
+    assert store.dirty == {'champs'}
+
+
+def test_write_replaces_the_file_in_one_step(store, path, monkeypatch):
+    replaced = []
+    monkeypatch.setattr(os, 'replace', lambda src, dst: (replaced.append(read(src)), os.rename(src, dst)))
+    store.update({'max_level': 25})
+    store.flush()
+    assert replaced == [{'max_level': 25, 'lobby': 880}]
+    assert read(path) == replaced[0]
+
+
+def test_flush_keeps_keys_changed_by_another_process(store, path):
+    store.update({'max_level': 15})
+    write(path, {'max_level': 30, 'lobby': 880, 'trace': True, 'padding': 'changes the file size'})
+    store.flush()
+    assert read(path) == {'max_level': 15, 'lobby': 880, 'trace': True, 'padding': 'changes the file size'}
+    assert store.get('trace') is True
+
+
+def test_reload_picks_up_an_external_edit(store, path):
+    assert store.reload() == set()
+    write(path, {'max_level': 25, 'lobby': 880, 'timeline': 'true'})
+    assert store.reload() == {'max_level', 'timeline'}
+    assert store.get('max_level') == 25
+    assert store.get('timeline') is True
+
+
+def test_reload_keeps_unsaved_changes(store, path):
+    store.update({'lobby': 840})
+    write(path, {'max_level': 25, 'lobby': 880, 'padding': 'changes the file size'})
+    assert store.reload() == {'max_level', 'padding'}
+    assert store.get('lobby') == 840
+
+
+def test_reload_ignores_a_file_caught_mid_write(store, path):
+    with open(path, 'w') as f:
+        f.write('{"max_level": ')
+    assert store.reload() == set()
+    assert store.get('max_level') == 30
+
+
+def test_watcher_calls_subscribers_with_changed_keys(store, path):
+    changes = []
+    changed = threading.Event()
+    store.on_change(lambda keys: (changes.append(keys), changed.set()))
+    write(path, {'max_level': 18, 'lobby': 880, 'padding': 'changes the file size'})
+    assert changed.wait(2)
+    assert changes[0] == {'max_level', 'padding'}
+
+
+@pytest.mark.parametrize('key, value, expected', [
+    ('max_level', '30', 30),
+    ('max_level', 12.0, 12),
+    ('lobby', 'not a number', 'not a number'),
+    ('trace', 'yes', True),
+    ('trace', 'false', False),
+    ('trace', 0, False),
+    ('champs', (1, 2), [1, 2]),
+    ('account_cooldown', '5', 5),
+    ('max_level', None, None),
+    ('unknown', '30', '30'),
+])
+def test_coerce_converts_to_the_default_type(key, value, expected):
+    assert coerce(key, value) == expected
+    assert type(coerce(key, value)) is type(expected)
@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+import requests
+
+from lolbot.common.account import Account, SQLiteAccountManager
+from lolbot.common.coordinator import Coordinator, RemoteAccountManager, is_loopback
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteAccountManager(os.path.join(tmp_path, 'accounts.db'))
+    for name in ('alpha', 'bravo', 'charlie'):
+        store.add_account(Account(name, f'{name}-password', 10))
+    store.add_account(Account('done', 'done-password', 30))
+    return store
+
+
+@pytest.fixture
+def coordinator(store):
+    coordinator = Coordinator(store, port=0, lease_seconds=0.2)
+    coordinator.start()
+    yield coordinator
+    coordinator.stop()
+
+
+def remote(coordinator: Coordinator, worker: str, key: str = '') -> RemoteAccountManager:
+    return RemoteAccountManager(f'http://127.0.0.1:{coordinator.port}', worker, key)
+
+
+def test_workers_lease_distinct_accounts_below_max_level(coordinator):
+    leased = [coordinator.acquire(f'worker-{i}', 30) for i in range(4)]
+    assert [account['username'] for _, account in leased[:3]] == ['alpha', 'bravo', 'charlie']
+    assert leased[3] == (None, None)
+
+
+def test_expired_lease_is_reclaimed(coordinator):
+    lease, account = coordinator.acquire('worker-1', 30)
+    time.sleep(0.3)
+    assert coordinator.heartbeat(lease.token) is None
+    lease2, account2 = coordinator.acquire('worker-2', 30)
+    assert account2['username'] == account['username']
+    assert lease2.worker == 'worker-2'
+
+
+def test_heartbeat_keeps_the_lease(coordinator):
+    lease, account = coordinator.acquire('worker-1', 30)
+    for _ in range(3):
+        time.sleep(0.1)
+        assert coordinator.heartbeat(lease.token) is lease
+    assert coordinator.acquire('worker-2', 30)[1]['username'] != account['username']
+
+
+def test_leveled_saves_the_level_and_ends_the_lease(coordinator, store):
+    lease, account = coordinator.acquire('worker-1', 30)
+    assert coordinator.leveled(lease.token, 30)
+    assert not coordinator.leveled(lease.token, 30)
+    assert {'username': account['username'], 'password': account['password'], 'level': 30} in store.get_all_accounts()
+    assert coordinator.leases == {}
+
+
+def test_release_returns_the_account_to_the_pool(coordinator):
+    lease, account = coordinator.acquire('worker-1', 30)
+    assert coordinator.release(lease.token)
+    assert coordinator.acquire('worker-2', 30)[1]['username'] == account['username']
+
+
+def test_remote_manager_leases_and_reports_over_http(coordinator, store):
+    worker = remote(coordinator, 'worker-1')
+    account = worker.get_account(30)
+    assert account == Account('alpha', 'alpha-password', 10)
+    assert worker.get_account(30) == account
+    worker.set_account_as_leveled(account, 30)
+    other = remote(coordinator, 'worker-2')
+    assert other.get_account(30).username == 'bravo'
+    other.release()
+    assert {'username': 'alpha', 'password': 'alpha-password', 'level': 30} in store.get_all_accounts()
+
+
+def test_account_listing_has_no_passwords(coordinator):
+    accounts = remote(coordinator, 'worker-1').get_all_accounts()
+    assert accounts[0] == {'username': 'alpha', 'level': 10}
+    assert all('password' not in a for a in accounts)
+
+
+def test_requests_without_the_key_are_rejected(store):
+    coordinator = Coordinator(store, port=0, key='secret')
+    coordinator.start()
+    try:
+        with pytest.raises(requests.HTTPError):
+            remote(coordinator, 'worker-1').get_account(30)
+        worker = remote(coordinator, 'worker-1', key='secret')
+        assert worker.get_account(30).username == 'alpha'
+        worker.release()
+    finally:
+        coordinator.stop()
+
+
+def test_key_is_required_off_loopback(store):
+    assert is_loopback('localhost') and is_loopback('127.0.0.1') and is_loopback('::1')
+    assert not is_loopback('0.0.0.0') and not is_loopback('bot-host')
+    with pytest.raises(ValueError):
+        Coordinator(store, host='0.0.0.0', port=0)
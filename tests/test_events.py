@@ -0,0 +1,201 @@
+import json
+import threading
+import time
+
+from lolbot.common.events import EventStream
+
+PHASE = EventStream.GAMEFLOW_PHASE
+
+
+class Response:
+
+    def __init__(self, data, status_code: int = 200) -> None:
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        if isinstance(self.data, Exception):
+            raise self.data
+        return self.data
+
+
+class FakeConnection:
+    """Serves GET requests from a dict, on_request runs while a request is in flight"""
+
+    def __init__(self, values: dict, on_request=None) -> None:
+        self.values = values
+        self.on_request = on_request
+        self.headers = {}
+
+    def request(self, method: str, uri: str) -> Response:
+        if self.on_request:
+            self.on_request(uri)
+        if uri not in self.values:
+            return Response({'message': 'not found'}, 404)
+        return Response(self.values[uri])
+
+
+class FakeSocket:
+
+    def __init__(self) -> None:
+        self.sent = []
+
+    def send(self, message: str) -> None:
+        self.sent.append(json.loads(message))
+
+
+def event(uri: str, data, event_type: str = 'Update') -> str:
+    return json.dumps([EventStream.EVENT, EventStream.event_name(uri), {'uri': uri, 'eventType': event_type, 'data': data}])
+
+
+def connected_stream(values: dict, on_request=None, uris: tuple = (PHASE,)) -> EventStream:
+    stream = EventStream(FakeConnection(values, on_request), uris=uris)
+    stream._on_open(FakeSocket())
+    assert stream.connected.wait(1)
+    return stream
+
+
+def test_open_subscribes_and_seeds_current_values():
+    ws = FakeSocket()
+    stream = EventStream(FakeConnection({PHASE: 'Lobby'}), uris=(PHASE,))
+    stream._on_open(ws)
+    assert ws.sent == [[EventStream.SUBSCRIBE, 'OnJsonApiEvent_lol-gameflow_v1_gameflow-phase']]
+    assert stream.connected.wait(1)
+    assert stream.get(PHASE) == 'Lobby'
+
+
+def test_event_during_seed_request_is_not_overwritten_by_the_stale_response():
+    stream = None
+
+    def deliver_event(uri: str) -> None:
+        stream._on_message(None, event(uri, 'Matchmaking'))
+
+    stream = EventStream(FakeConnection({PHASE: 'Lobby'}, deliver_event), uris=(PHASE,))
+    stream._on_open(FakeSocket())
+    assert stream.connected.wait(1)
+    assert stream.get(PHASE) == 'Matchmaking'
+
+
+def test_wait_for_change_returns_the_current_value_if_it_already_differs():
+    stream = connected_stream({PHASE: 'Lobby'})
+    start = time.monotonic()
+    assert stream.wait_for_change(PHASE, 'None', timeout=5) == 'Lobby'
+    assert time.monotonic() - start < 1
+
+
+def test_wait_for_change_wakes_on_event():
+    stream = connected_stream({PHASE: 'Lobby'})
+    threading.Timer(0.05, stream._on_message, args=(None, event(PHASE, 'Matchmaking'))).start()
+    assert stream.wait_for_change(PHASE, 'Lobby', timeout=5) == 'Matchmaking'
+
+
+def test_wait_for_change_times_out_with_the_unchanged_value():
+    stream = connected_stream({PHASE: 'Lobby'})
+    start = time.monotonic()
+    assert stream.wait_for_change(PHASE, 'Lobby', timeout=0.1) == 'Lobby'
+    assert time.monotonic() - start >= 0.1
+
+
+def test_wait_for_change_returns_on_disconnect():
+    stream = connected_stream({PHASE: 'Lobby'})
+    threading.Timer(0.05, stream._set_disconnected).start()
+    start = time.monotonic()
+    assert stream.wait_for_change(PHASE, 'Lobby', timeout=5) == 'Lobby'
+    assert time.monotonic() - start < 1
+
+
+def test_delete_event_clears_the_value():
+    stream = connected_stream({PHASE: 'Lobby'})
+    stream._on_message(None, event(PHASE, 'Lobby', 'Delete'))
+    assert stream.get(PHASE) is None
+
+
+def test_callbacks_only_run_when_the_value_changes():
+    stream = connected_stream({PHASE: 'Lobby'})
+    calls = []
+    called = threading.Event()
+    stream.subscribe(PHASE, lambda uri, data: (calls.append(data), called.set()))
+    stream._on_message(None, event(PHASE, 'Lobby'))
+    stream._on_message(None, event(PHASE, 'Matchmaking'))
+    assert called.wait(1)
+    time.sleep(0.05)
+    assert calls == ['Matchmaking']
+
+
+def test_events_for_other_uris_and_malformed_messages_are_ignored():
+    stream = connected_stream({PHASE: 'Lobby'})
+    stream._on_message(None, event('/lol-chat/v1/me', {'name': 'x'}))
+    stream._on_message(None, 'not json')
+    stream._on_message(None, json.dumps([0, 'welcome']))
+    assert stream.get('/lol-chat/v1/me') is None
+    assert stream.get(PHASE) == 'Lobby'
+
+
+def test_unreadable_seed_response_does_not_stop_seeding_the_others():
+    ready = EventStream.READY_CHECK
+    stream = connected_stream({PHASE: ValueError('not json'), ready: {'state': 'InProgress'}}, uris=(PHASE, ready))
+    assert stream.get(PHASE) is None
+    assert stream.get(ready) == {'state': 'InProgress'}
+
+
+def test_events_are_delivered_while_seeding():
+    seeding = threading.Event()
+    release = threading.Event()
+
+    def slow_request(uri: str) -> None:
+        seeding.set()
+        release.wait(5)
+
+    stream = EventStream(FakeConnection({PHASE: 'Lobby'}, slow_request), uris=(PHASE,))
+    stream._on_open(FakeSocket())
+    assert seeding.wait(1)
+    stream._on_message(None, event(PHASE, 'Matchmaking'))
+    assert stream.get(PHASE) == 'Matchmaking'
+    assert not stream.is_connected()
+    release.set()
+    assert stream.connected.wait(1)
+    assert stream.get(PHASE) == 'Matchmaking'
+
+
+def test_socket_closed_while_seeding_is_not_marked_connected():
+    release = threading.Event()
+    stream = EventStream(FakeConnection({PHASE: 'Lobby'}, lambda uri: release.wait(5)), uris=(PHASE,))
+    stream._on_open(FakeSocket())
+    stream._set_disconnected()
+    release.set()
+    time.sleep(0.1)
+    assert not stream.is_connected()
+
+
+def test_callbacks_run_one_at_a_time_in_order():
+    stream = connected_stream({PHASE: 'None'})
+    calls = []
+    running = []
+    done = threading.Event()
+
+    def callback(uri: str, data) -> None:
+        running.append(data)
+        assert len(running) == 1, 'callbacks overlapped'
+        time.sleep(0.01)
+        calls.append(data)
+        running.remove(data)
+        if data == 'InProgress':
+            done.set()
+
+    stream.subscribe(PHASE, callback)
+    phases = ['Lobby', 'Matchmaking', 'ReadyCheck', 'ChampSelect', 'InProgress']
+    for phase in phases:
+        stream._on_message(None, event(PHASE, phase))
+    assert done.wait(2)
+    assert calls == phases
+
+
+def test_failing_callback_does_not_stop_dispatch():
+    stream = connected_stream({PHASE: 'None'})
+    calls = []
+    called = threading.Event()
+    stream.subscribe(PHASE, lambda uri, data: 1 / 0)
+    stream.subscribe(PHASE, lambda uri, data: (calls.append(data), called.set()))
+    stream._on_message(None, event(PHASE, 'Lobby'))
+    assert called.wait(1)
+    assert calls == ['Lobby']
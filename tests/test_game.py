@@ -0,0 +1,69 @@
+import pytest
+import requests
+
+from lolbot.bot.game import Game, GameError
+from lolbot.common import utils, window
+from lolbot.common.config import Constants
+from lolbot.common.window import WindowBackend
+
+
+class GameWindow(WindowBackend):
+
+    def __init__(self) -> None:
+        self.open = True
+
+    def find(self, title: str) -> int:
+        return 1 if self.open and title == utils.LEAGUE_GAME_CLIENT_WINNAME else 0
+
+    def rect(self, handle: int) -> tuple:
+        return 0, 0, 1920, 1080
+
+    def is_valid(self, handle: int) -> bool:
+        return self.open
+
+
+class BrokenLiveClient:
+    """Live client whose updates fail with error"""
+
+    def __init__(self, error: Exception) -> None:
+        self.error = error
+        self.status_code = 200
+
+    def update(self, timeout: float, events: bool) -> bool:
+        raise self.error
+
+
+@pytest.fixture
+def game():
+    Constants.create_dirs()
+    desktop = GameWindow()
+    window.set_backend(desktop)
+    game = Game()
+    yield game, desktop
+    window.set_backend(None)
+
+
+def test_malformed_responses_end_the_game(game):
+    game, _ = game
+    game.live_client = BrokenLiveClient(KeyError('championStats'))
+    for _ in range(Game.MAX_BAD_RESPONSES - 1):
+        assert game.update_state() is False
+    with pytest.raises(GameError):
+        game.update_state()
+
+
+def test_transport_errors_are_left_to_the_circuit_breaker(game):
+    game, _ = game
+    game.live_client = BrokenLiveClient(requests.exceptions.ConnectionError())
+    for _ in range(Game.MAX_BAD_RESPONSES + 5):
+        assert game.update_state() is False
+    assert game.connection_errors == 0
+
+
+def test_closed_game_window_ends_the_game(game):
+    game, desktop = game
+    game.live_client = BrokenLiveClient(ValueError('bad json'))
+    desktop.open = False
+    window.registry.invalidate()
+    with pytest.raises(utils.WindowNotFound):
+        game.update_state()
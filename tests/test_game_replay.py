@@ -0,0 +1,70 @@
+import argparse
+import os
+
+import pytest
+
+from lolbot.bot.game import GameSnapshot, GameState
+from lolbot.bot.timeline import Timeline
+from lolbot.common import inputs, process, window
+from lolbot.sim import game_replay
+
+
+def game_state(game_time: int) -> GameState:
+    if game_time < 3:
+        return GameState.LOADING_SCREEN
+    if game_time < 80:
+        return GameState.PRE_MINIONS
+    return GameState.EARLY_GAME if game_time < 600 else GameState.LATE_GAME
+
+
+def recorded_game(path: str) -> str:
+    """A 12 minute game with a death, a low hp retreat and gold to spend every few minutes"""
+    timeline = Timeline({'result': 'complete'})
+    for tick, game_time in enumerate(range(0, 720, 2), start=1):
+        hp = 0.2 if 300 <= game_time < 310 else 1.0
+        dead = 400 <= game_time < 420
+        timeline.add_tick(GameSnapshot(tick=tick, game_time=game_time, game_state=game_state(game_time), is_dead=dead,
+                                       respawn_in=420 - game_time if dead else 0, current_gold=game_time * 10,
+                                       max_health=1200, current_hp_ratio=hp, low_hp=hp < 0.3,
+                                       buying_items=game_time % 180 == 0 and game_time > 0, consumables=2,
+                                       mid_turret_destroyed=game_time >= 600))
+    timeline.save(path)
+    return path
+
+
+@pytest.fixture
+def replay(tmp_path):
+    def replay(timeline: str, tolerance: int = 0) -> dict:
+        args = argparse.Namespace(timeline=timeline, seed=0, tolerance=tolerance, save=None, dir=str(tmp_path))
+        return game_replay.run(args)
+    cwd = os.getcwd()
+    yield replay
+    os.chdir(cwd)
+    inputs.set_backend(None)
+    window.set_backend(None)
+    process.set_provider(None)
+
+
+def test_replay_takes_the_same_actions_on_every_run(tmp_path, replay):
+    path = recorded_game(os.path.join(tmp_path, 'game.timeline'))
+    first, second = replay(path), replay(path)
+    assert first['completed']
+    assert first['actual'] and first['actual'] == second['actual']
+    assert {'buy', 'attack', 'retreat', 'dead', 'back'} <= set(first['replayed_actions'])
+
+
+def test_replayed_timeline_matches_itself(tmp_path, replay):
+    baseline = os.path.join(tmp_path, 'baseline.timeline')
+    replay(recorded_game(os.path.join(tmp_path, 'game.timeline')))['timeline'].save(baseline)
+    results = replay(baseline)
+    assert results['divergence'] is None
+    assert results['recorded_actions'] == results['replayed_actions']
+
+
+def test_tolerance_allows_actions_a_few_ticks_apart(tmp_path, replay):
+    baseline = os.path.join(tmp_path, 'baseline.timeline')
+    timeline = replay(recorded_game(os.path.join(tmp_path, 'game.timeline')))['timeline']
+    timeline.columns['action_tick'][0] += 1
+    timeline.save(baseline)
+    assert replay(baseline)['divergence'] == 0
+    assert replay(baseline, tolerance=1)['divergence'] is None
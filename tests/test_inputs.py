@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from lolbot.common.inputs import Action, InputExecutor, RecordingBackend
+
+
+@pytest.fixture
+def recorded(fast_clock):
+    backend = RecordingBackend()
+    return backend, InputExecutor(backend)
+
+
+def kinds(backend: RecordingBackend) -> list:
+    return [(kind, arg) for _, kind, arg in backend.events]
+
+
+def test_coalesce_drops_moves_followed_by_a_move():
+    actions = [Action('move', (1, 1)), Action('move', (2, 2)), Action('click', 'left'), Action('move', (3, 3)),
+               Action('press', 'a'), Action('move', (4, 4))]
+    assert InputExecutor.coalesce(actions) == [Action('move', (2, 2)), Action('click', 'left'), Action('move', (3, 3)),
+                                               Action('press', 'a'), Action('move', (4, 4))]
+
+
+def test_run_sends_coalesced_actions_in_order(recorded):
+    backend, executor = recorded
+    executor.run(Action('move', (10, 10)), Action('move', (20, 30)), Action('click', 'right'), Action('write', 'gg'))
+    assert kinds(backend) == [('move', (20, 30)), ('click', 'right'), ('write', 'gg')]
+    assert backend.cursor == (20, 30)
+
+
+def test_move_to_the_current_position_is_skipped(recorded):
+    backend, executor = recorded
+    executor.click(5, 5)
+    executor.click(5, 5)
+    assert kinds(backend) == [('move', (5, 5)), ('click', 'left'), ('click', 'left')]
+    assert executor.stats()['move.skipped'][0] == 1
+    assert executor.stats()['move'][0] == 1
+
+
+def test_attack_move_holds_the_key_around_both_clicks(recorded):
+    backend, executor = recorded
+    executor.attack_move(100.4, 200.6)
+    assert kinds(backend) == [('move', (100, 201)), ('key_down', 'a'), ('click', 'left'), ('click', 'left'),
+                              ('key_up', 'a')]
+
+
+def test_submitted_sequences_run_one_after_another(recorded):
+    backend, executor = recorded
+    first = executor.submit(Action('press', 'q'), Action('press', 'w'))
+    second = executor.submit(Action('press', 'e'))
+    first.wait(5)
+    second.wait(5)
+    assert kinds(backend) == [('press', 'q'), ('press', 'w'), ('press', 'e')]
+
+
+def test_backend_error_is_raised_to_the_caller_and_the_executor_keeps_running(recorded):
+    backend, executor = recorded
+
+    def fail(key: str) -> None:
+        raise RuntimeError('no input')
+
+    backend.press = fail
+    with pytest.raises(RuntimeError):
+        executor.press('q')
+    executor.write('ok')
+    assert kinds(backend) == [('write', 'ok')]
+
+
+def test_missing_desktop_backend_raises_in_the_caller(monkeypatch):
+    def unavailable() -> None:
+        raise ImportError('No module named keyboard')
+
+    monkeypatch.setattr('lolbot.common.inputs.DirectInputBackend', unavailable)
+    executor = InputExecutor()
+    with pytest.raises(ImportError):
+        executor.press('q')
+    assert executor.thread is None
+
+
+def test_run_gives_up_on_a_stuck_backend(recorded, monkeypatch):
+    backend, executor = recorded
+    released = threading.Event()
+    backend.press = lambda key: released.wait(5)
+    monkeypatch.setattr(executor, 'RUN_TIMEOUT', 0.05)
+    with pytest.raises(TimeoutError):
+        executor.press('q')
+    released.set()
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from lolbot.common import lockfile
+from lolbot.common.lockfile import Lockfile, LockfileData
+
+
+def write(path: str, text: str) -> None:
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = os.path.join(tmp_path, 'lockfile')
+    write(path, 'LeagueClient:1234:50000:secret:https')
+    return path
+
+
+def test_read_parses_the_fields(path):
+    assert Lockfile(path).read() == LockfileData('LeagueClient', '1234', '50000', 'secret', 'https')
+
+
+def test_unchanged_file_is_not_read_again(path, monkeypatch):
+    cache = Lockfile(path)
+    data = cache.read()
+    monkeypatch.setattr('builtins.open', lambda *args, **kwargs: pytest.fail('lockfile read again'))
+    assert cache.read() is data
+
+
+def test_rewritten_file_is_read_again(path):
+    cache = Lockfile(path)
+    first = cache.read()
+    write(path, 'LeagueClient:5678:50123:other:https')
+    second = cache.read()
+    assert second is not first
+    assert (second.pid, second.port, second.password) == ('5678', '50123', 'other')
+
+
+def test_rewrite_with_the_same_size_is_detected_by_mtime(path):
+    cache = Lockfile(path)
+    cache.read()
+    st = os.stat(path)
+    write(path, 'LeagueClient:1234:50001:secret:https')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert cache.read().port == '50001'
+
+
+@pytest.mark.parametrize('partial', ['', 'LeagueClient:1234:', 'LeagueClient:1234:50001:secret:https:extra'])
+def test_partly_written_file_raises_and_is_retried(path, partial):
+    cache = Lockfile(path)
+    data = cache.read()
+    write(path, partial)
+    with pytest.raises(ValueError):
+        cache.read()
+    assert cache.data is data
+    write(path, 'LeagueClient:1234:50001:secret:http')
+    assert cache.read().port == '50001'
+
+
+def test_missing_file_raises_file_not_found(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Lockfile(os.path.join(tmp_path, 'lockfile')).read()
+
+
+def test_get_shares_one_cache_per_path(path, tmp_path):
+    assert lockfile.get(path) is lockfile.get(path)
+    assert lockfile.get(path) is not lockfile.get(os.path.join(tmp_path, 'other'))
@@ -0,0 +1,125 @@
+import pytest
+
+from lolbot.common.process import ProcessInfo, ProcessTable, ProcessTerminator, StaticProvider
+
+
+class StubbornProvider(StaticProvider):
+    """Processes ignore close requests and only exit when killed"""
+
+    def close(self, pids: list) -> None:
+        pass
+
+
+class UnkillableProvider(StaticProvider):
+    """Processes never exit"""
+
+    def close(self, pids: list) -> None:
+        pass
+
+    def kill(self, pids: list) -> None:
+        pass
+
+
+def test_names_are_matched_case_insensitively():
+    provider = StaticProvider()
+    pid = provider.start('LeagueClient.exe')
+    table = ProcessTable(provider)
+    assert table.running('leagueclient.EXE')
+    assert table.running('RiotClientUx.exe', 'LeagueClient.exe')
+    assert not table.running('RiotClientUx.exe')
+    assert table.pids('LEAGUECLIENT.exe') == [pid]
+
+
+def test_checks_are_served_from_one_snapshot_until_invalidated():
+    provider = StaticProvider()
+    table = ProcessTable(provider, ttl=60)
+    assert not table.running('League of Legends.exe')
+    provider.start('League of Legends.exe')
+    assert not table.running('League of Legends.exe')
+    assert table.stats['snapshot'] == 1
+    table.invalidate()
+    assert table.running('League of Legends.exe')
+    assert table.stats['snapshot'] == 2
+
+
+def test_on_exit_reports_processes_that_disappeared():
+    provider = StaticProvider()
+    game = provider.start('League of Legends.exe')
+    provider.start('LeagueClient.exe')
+    table = ProcessTable(provider)
+    exited = []
+    table.on_exit(exited.append)
+    table.refresh()
+    provider.kill([game])
+    table.refresh()
+    assert exited == [ProcessInfo(game, 'League of Legends.exe')]
+    table.refresh()
+    assert len(exited) == 1
+
+
+def test_reused_pid_counts_as_an_exit():
+    provider = StaticProvider([ProcessInfo(8, 'League of Legends.exe')])
+    table = ProcessTable(provider)
+    exited = []
+    table.on_exit(exited.append)
+    table.refresh()
+    provider.running[8] = ProcessInfo(8, 'notepad.exe')
+    table.refresh()
+    assert exited == [ProcessInfo(8, 'League of Legends.exe')]
+
+
+def test_failing_exit_callback_does_not_stop_the_others():
+    provider = StaticProvider()
+    pid = provider.start('League of Legends.exe')
+    table = ProcessTable(provider)
+    exited = []
+    table.on_exit(lambda p: 1 / 0)
+    table.on_exit(exited.append)
+    table.refresh()
+    provider.kill([pid])
+    table.refresh()
+    assert [p.pid for p in exited] == [pid]
+
+
+def test_started_returns_the_start_time_of_running_processes():
+    provider = StaticProvider()
+    pid = provider.start('LeagueClient.exe')
+    table = ProcessTable(provider)
+    assert table.started(pid) == provider.started[pid]
+    assert table.started(pid + 1) is None
+
+
+def test_terminate_kills_all_matching_processes(fast_clock):
+    provider = StaticProvider()
+    pids = [provider.start('RiotClientUx.exe'), provider.start('RiotClientServices.exe')]
+    client = provider.start('LeagueClient.exe')
+    teardown = ProcessTerminator(ProcessTable(provider)).terminate(['riotclientux.exe', 'RiotClientServices.exe'])
+    assert sorted(p.pid for p in teardown.requested) == pids
+    assert teardown.remaining == []
+    assert list(provider.running) == [client]
+
+
+def test_terminate_without_matches_does_nothing():
+    provider = StaticProvider()
+    provider.start('LeagueClient.exe')
+    teardown = ProcessTerminator(ProcessTable(provider)).terminate(['League of Legends.exe'])
+    assert teardown.requested == []
+    assert len(provider.running) == 1
+
+
+@pytest.mark.parametrize('grace', [0, 0.5])
+def test_processes_ignoring_close_are_killed(fast_clock, grace):
+    provider = StubbornProvider()
+    pid = provider.start('RiotClientUx.exe')
+    teardown = ProcessTerminator(ProcessTable(provider)).terminate(['RiotClientUx.exe'], grace=grace)
+    assert [p.pid for p in teardown.forced] == [pid]
+    assert teardown.remaining == []
+    assert not provider.running
+
+
+def test_processes_that_survive_kill_are_reported(fast_clock):
+    provider = UnkillableProvider()
+    pid = provider.start('League of Legends.exe')
+    teardown = ProcessTerminator(ProcessTable(provider)).terminate(['League of Legends.exe'], timeout=1)
+    assert [p.pid for p in teardown.remaining] == [pid]
+    assert 'still running: League of Legends.exe' in str(teardown)
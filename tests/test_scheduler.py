@@ -0,0 +1,131 @@
+import os
+from collections import Counter
+
+import pytest
+
+from lolbot.common import scheduler
+from lolbot.common.account import Account, SQLiteAccountManager
+from lolbot.common.scheduler import AccountScheduler
+
+MAX_LEVEL = 30
+
+
+class FakeTime:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(scheduler, 'time', fake)
+    return fake
+
+
+@pytest.fixture
+def path(tmp_path):
+    return os.path.join(tmp_path, 'accounts.db')
+
+
+@pytest.fixture
+def store(path):
+    store = SQLiteAccountManager(path)
+    store.add_accounts([Account('alpha', 'a', 5), Account('bravo', 'b', 20), Account('charlie', 'c', 12),
+                        Account('done', 'd', MAX_LEVEL)])
+    return store
+
+
+def picks(accounts: AccountScheduler, count: int, clock: FakeTime = None) -> list:
+    result = []
+    for _ in range(count):
+        result.append(accounts.get_account(MAX_LEVEL).username)
+        if clock is not None:
+            clock.now += 1
+    return result
+
+
+def test_in_order_picks_the_first_added_account(store, clock):
+    assert picks(AccountScheduler(store, 'in_order'), 3) == ['alpha', 'alpha', 'alpha']
+
+
+def test_closest_picks_the_highest_level_below_max(store, clock):
+    accounts = AccountScheduler(store, 'closest')
+    assert accounts.get_account(MAX_LEVEL).username == 'bravo'
+    accounts.set_account_as_leveled(Account('bravo', 'b', 20), MAX_LEVEL)
+    assert accounts.get_account(MAX_LEVEL).username == 'charlie'
+
+
+def test_round_robin_rotates_through_the_accounts(store, clock):
+    assert picks(AccountScheduler(store, 'round_robin'), 5) == ['alpha', 'bravo', 'charlie', 'alpha', 'bravo']
+
+
+def test_lru_picks_the_least_recently_played(store, clock):
+    accounts = AccountScheduler(store, 'lru')
+    assert picks(accounts, 3, clock) == ['alpha', 'bravo', 'charlie']
+    accounts.add_account(Account('echo', 'e', 0))
+    assert picks(accounts, 2, clock) == ['echo', 'alpha']
+
+
+def test_weighted_picks_in_proportion_to_level(path, clock):
+    store = SQLiteAccountManager(path)
+    store.add_accounts([Account('low', 'l', 0), Account('high', 'h', 2)])
+    counts = Counter(picks(AccountScheduler(store, 'weighted'), 40))
+    assert counts == {'high': 30, 'low': 10}
+
+
+def test_unknown_policy_falls_back_to_in_order(store, clock):
+    accounts = AccountScheduler(store, 'random')
+    assert accounts.policy == 'in_order'
+    assert accounts.get_account(MAX_LEVEL).username == 'alpha'
+
+
+def test_cooldown_skips_recently_played_accounts(store, clock):
+    accounts = AccountScheduler(store, 'in_order', cooldown=60)
+    assert picks(accounts, 3, clock) == ['alpha', 'bravo', 'charlie']
+    clock.now += 60
+    assert accounts.get_account(MAX_LEVEL).username == 'alpha'
+
+
+def test_cooling_account_is_picked_when_no_other_is_left(path, clock):
+    store = SQLiteAccountManager(path)
+    store.add_account(Account('solo', 's', 0))
+    accounts = AccountScheduler(store, 'in_order', cooldown=60)
+    assert picks(accounts, 2, clock) == ['solo', 'solo']
+
+
+def test_no_account_below_max_level(path, clock):
+    store = SQLiteAccountManager(path)
+    store.add_account(Account('done', 'd', MAX_LEVEL))
+    assert AccountScheduler(store).get_account(MAX_LEVEL) == Account('', '', 0)
+
+
+def test_edits_through_the_scheduler_apply_without_a_rebuild(store, clock):
+    accounts = AccountScheduler(store, 'in_order')
+    accounts.get_account(MAX_LEVEL)
+    accounts.edit_account('alpha', Account('alpha2', 'a', 5))
+    accounts.delete_account(Account('bravo', 'b', 20))
+    assert picks(accounts, 2) == ['alpha2', 'alpha2']
+    accounts.set_account_as_leveled(Account('alpha2', 'a', 5), MAX_LEVEL)
+    assert accounts.get_account(MAX_LEVEL).username == 'charlie'
+
+
+def test_rebuilds_after_another_connection_writes(store, path, clock):
+    accounts = AccountScheduler(store, 'closest')
+    assert accounts.get_account(MAX_LEVEL).username == 'bravo'
+    other = SQLiteAccountManager(path)
+    other.add_account(Account('foxtrot', 'f', 29))
+    assert accounts.get_account(MAX_LEVEL).username == 'foxtrot'
+    other.delete_account(Account('foxtrot', '', 0))
+    other.edit_account('charlie', Account('charlie', 'c', 25))
+    assert accounts.get_account(MAX_LEVEL).username == 'charlie'
+
+
+def test_rebuild_keeps_the_play_history(store, path, clock):
+    accounts = AccountScheduler(store, 'round_robin')
+    assert picks(accounts, 2) == ['alpha', 'bravo']
+    SQLiteAccountManager(path).add_account(Account('golf', 'g', 1))
+    assert picks(accounts, 3) == ['charlie', 'golf', 'alpha']
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+from lolbot.common import process, utils, window
+from lolbot.common.process import ProcessInfo, StaticProvider
+from lolbot.common.window import WindowBackend, WindowRegistry
+
+
+class FakeDesktop(WindowBackend):
+    """Top level windows by title, each with a handle and a rectangle"""
+
+    def __init__(self) -> None:
+        self.windows = {}
+        self.next_handle = 100
+        self.calls = []
+
+    def open(self, title: str, rect: tuple) -> int:
+        self.next_handle += 1
+        self.windows[title] = (self.next_handle, rect)
+        return self.next_handle
+
+    def close(self, title: str) -> None:
+        self.windows.pop(title, None)
+
+    def find(self, title: str) -> int:
+        self.calls.append('find')
+        return self.windows[title][0] if title in self.windows else 0
+
+    def rect(self, handle: int) -> tuple:
+        self.calls.append('rect')
+        return next(rect for h, rect in self.windows.values() if h == handle)
+
+    def is_valid(self, handle: int) -> bool:
+        return any(h == handle for h, _ in self.windows.values())
+
+
+@pytest.fixture
+def desktop():
+    desktop = FakeDesktop()
+    window.set_backend(desktop)
+    yield desktop
+    window.set_backend(None)
+
+
+def test_get_is_served_from_cache_within_ttl():
+    desktop = FakeDesktop()
+    handle = desktop.open('Client', (0, 0, 1280, 720))
+    registry = WindowRegistry(desktop, ttl=60)
+    assert registry.get('Client').handle == handle
+    assert registry.get('Client').rect == (0, 0, 1280, 720)
+    assert desktop.calls == ['find', 'rect']
+    assert registry.lookups == {'find': 1, 'hit': 1}
+
+
+def test_expired_entry_refreshes_the_rectangle_without_searching():
+    desktop = FakeDesktop()
+    handle = desktop.open('Client', (0, 0, 1280, 720))
+    registry = WindowRegistry(desktop, ttl=0.01)
+    registry.get('Client')
+    desktop.windows['Client'] = (handle, (100, 50, 1380, 770))
+    time.sleep(0.02)
+    assert registry.get('Client').rect == (100, 50, 1380, 770)
+    assert registry.lookups['find'] == 1
+    assert registry.lookups['rect'] == 1
+
+
+def test_destroyed_window_is_searched_again():
+    desktop = FakeDesktop()
+    desktop.open('Client', (0, 0, 1280, 720))
+    registry = WindowRegistry(desktop, ttl=0.01)
+    registry.get('Client')
+    desktop.close('Client')
+    time.sleep(0.02)
+    assert not registry.exists('Client')
+    assert registry.lookups['find'] == 2
+
+
+def test_missing_window_is_not_open():
+    registry = WindowRegistry(FakeDesktop(), ttl=60)
+    win = registry.get('Client')
+    assert not win.open
+    assert win.rect == (0, 0, 0, 0)
+
+
+def test_to_pixels_maps_ratios_into_the_window():
+    desktop = FakeDesktop()
+    desktop.open('Client', (100, 200, 1380, 920))
+    assert WindowRegistry(desktop).get('Client').to_pixels((0.5, 0.25)) == (740, 380)
+
+
+def test_close_game_forgets_the_game_window(desktop, fast_clock):
+    provider = StaticProvider([ProcessInfo(4242, utils.GAME_PROCESS_NAME)])
+    process.set_provider(provider)
+    try:
+        desktop.open(utils.LEAGUE_GAME_CLIENT_WINNAME, (0, 0, 1920, 1080))
+        original_kill = provider.kill
+
+        def kill(pids: list) -> None:
+            original_kill(pids)
+            desktop.close(utils.LEAGUE_GAME_CLIENT_WINNAME)
+
+        provider.kill = kill
+        assert utils.exists(utils.LEAGUE_GAME_CLIENT_WINNAME)
+        utils.close_game()
+        assert not process.table.running(utils.GAME_PROCESS_NAME)
+        assert not utils.exists(utils.LEAGUE_GAME_CLIENT_WINNAME)
+        with pytest.raises(utils.WindowNotFound):
+            utils.size(utils.LEAGUE_GAME_CLIENT_WINNAME)
+    finally:
+        process.set_provider(None)